@@ -0,0 +1,141 @@
+import sys
+
+import click
+
+from hatch.commands.utils import (
+    CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting,
+    echo_warning
+)
+from .history import (
+    DEFAULT_HISTORY, DEFAULT_THRESHOLD, compare_results, create_entry,
+    find_entry, load_history, save_history
+)
+from .suite import (
+    DEFAULT_REPEAT, DEFAULT_SCALE, SCALES, run_benchmarks, select_benchmarks
+)
+
+
+def format_time(seconds):
+    if seconds >= 1:
+        return '{:.3f}s'.format(seconds)
+    elif seconds >= 0.001:
+        return '{:.3f}ms'.format(seconds * 1000)
+    return '{:.3f}us'.format(seconds * 1000000)
+
+
+@click.group(context_settings=CONTEXT_SETTINGS)
+def benchmarks():
+    """Times hatch's hot paths on synthetic projects and virtual envs,
+    keeping a history of results to compare against.
+    """
+
+
+@benchmarks.command('list', context_settings=CONTEXT_SETTINGS,
+                    short_help='Lists benchmarks')
+@click.option('--scale', type=click.Choice(SCALES), default=DEFAULT_SCALE,
+              help='The fixture sizes to list. (default: {})'.format(DEFAULT_SCALE))
+def list_benchmarks(scale):
+    for name, _, _ in select_benchmarks(scale):
+        echo_info(name)
+
+
+@benchmarks.command(context_settings=CONTEXT_SETTINGS,
+                    short_help='Runs benchmarks and records the results')
+@click.option('-k', 'patterns', multiple=True,
+              help='Only runs benchmarks whose name contains this. Can be repeated.')
+@click.option('--scale', type=click.Choice(SCALES), default=DEFAULT_SCALE,
+              help='The fixture sizes to use. (default: {})'.format(DEFAULT_SCALE))
+@click.option('--repeat', type=click.IntRange(min=1), default=DEFAULT_REPEAT,
+              help='How many times to time each benchmark. (default: {})'.format(DEFAULT_REPEAT))
+@click.option('--label', help='Names the results. (default: the current commit)')
+@click.option('--history', type=click.Path(dir_okay=False), default=DEFAULT_HISTORY,
+              help='The JSON file results are appended to.')
+@click.option('--no-save', is_flag=True, help='Does not record the results.')
+def run(patterns, scale, repeat, label, history, no_save):
+    """Runs benchmarks at a scale of `smoke`, `quick` or `full` and
+    appends their min, median, mean and standard deviation to the
+    history file.
+    """
+    def callback(name, result):
+        echo_success('{}: '.format(name), nl=False)
+        echo_info('{} median, {} min (+/- {})'.format(
+            format_time(result['median']), format_time(result['min']), format_time(result['stdev'])
+        ))
+
+    echo_waiting('Running `{}` benchmarks...'.format(scale))
+    results = run_benchmarks(scale, patterns, repeat, callback)
+    if not results:
+        echo_failure('No benchmarks selected.')
+        sys.exit(1)
+
+    if not no_save:
+        entries = load_history(history)
+        entry = create_entry(results, scale, label)
+        entries.append(entry)
+        save_history(entries, history)
+        echo_success('Recorded results as `{}` in `{}`'.format(entry['label'], history))
+
+
+@benchmarks.command(context_settings=CONTEXT_SETTINGS,
+                    short_help='Compares two recorded results')
+@click.argument('base', required=False)
+@click.argument('head', required=False)
+@click.option('--threshold', type=float, default=DEFAULT_THRESHOLD,
+              help='The relative increase of a median that is a regression. '
+                   '(default: {})'.format(DEFAULT_THRESHOLD))
+@click.option('--history', type=click.Path(dir_okay=False), default=DEFAULT_HISTORY,
+              help='The JSON file results were recorded in.')
+def compare(base, head, threshold, history):
+    """Compares the medians of the results labeled BASE and HEAD, which
+    may also be given as a commit prefix. By default, the last two
+    recorded results are compared. Exits with 1 if any benchmark
+    regressed by more than the threshold.
+    """
+    entries = load_history(history)
+
+    if head:
+        head_entry = find_entry(entries, head)
+    else:
+        head_entry = entries[-1] if entries else None
+
+    if base:
+        base_entry = find_entry(entries, base)
+    else:
+        previous = [entry for entry in entries if entry is not head_entry]
+        base_entry = previous[-1] if previous else None
+
+    for name, entry in (('base', base_entry), ('head', head_entry)):
+        if entry is None:
+            echo_failure('Unable to find {} results in `{}`.'.format(name, history))
+            sys.exit(1)
+
+    if base_entry['scale'] != head_entry['scale']:
+        echo_warning('Comparing results at different scales: `{}` and `{}`'.format(
+            base_entry['scale'], head_entry['scale']
+        ))
+
+    echo_waiting('Comparing `{}` to `{}`...'.format(head_entry['label'], base_entry['label']))
+
+    regressions = 0
+    for name, base_median, head_median, change, regressed in compare_results(
+            base_entry['results'], head_entry['results'], threshold):
+        message = '{}: {} -> {} ({:+.1%})'.format(
+            name, format_time(base_median), format_time(head_median), change
+        )
+        if regressed:
+            regressions += 1
+            echo_failure(message)
+        elif change < -threshold:
+            echo_success(message)
+        else:
+            echo_info(message)
+
+    if regressions:
+        echo_failure('{} benchmark{} regressed by more than {:.0%}.'.format(
+            regressions, '' if regressions == 1 else 's', threshold
+        ))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    benchmarks()
@@ -0,0 +1,154 @@
+import os
+
+from hatch.utils import ON_WINDOWS, ensure_dir_exists
+
+# Source trees are made of packages holding this many modules, nested so
+# that directories never get too large.
+MODULES_PER_PACKAGE = 50
+PACKAGES_PER_LEVEL = 20
+
+# Every this many modules, one was compiled.
+COMPILED_RATIO = 10
+
+SHEBANG_TEMPLATE = '#!{}\n'
+SCRIPT_BODY = (
+    '# -*- coding: utf-8 -*-\n'
+    'import re\n'
+    'import sys\n'
+    'from package.cli import main\n'
+    "if __name__ == '__main__':\n"
+    "    sys.argv[0] = re.sub(r'(-script\\.pyw?|\\.exe)?$', '', sys.argv[0])\n"
+    '    sys.exit(main())\n'
+)
+
+
+def write_file(path, contents=''):
+    with open(path, 'w') as f:
+        f.write(contents)
+
+
+def get_package_dirs(d, count):
+    """Returns `count` package directories under `d`, breadth first."""
+    dirs = []
+    level = [d]
+
+    while len(dirs) < count:
+        next_level = []
+        for parent in level:
+            for i in range(PACKAGES_PER_LEVEL):
+                path = os.path.join(parent, 'package{}'.format(i))
+                dirs.append(path)
+                next_level.append(path)
+                if len(dirs) == count:
+                    return dirs
+        level = next_level
+
+    return dirs
+
+
+def make_packages(d, files):
+    """Creates `files` modules spread over nested packages, returning the
+    directories that hold them.
+    """
+    package_dirs = get_package_dirs(d, max(1, -(-files // MODULES_PER_PACKAGE)))
+    remaining = files
+    for package_dir in package_dirs:
+        ensure_dir_exists(package_dir)
+        count = min(MODULES_PER_PACKAGE, remaining)
+        write_file(os.path.join(package_dir, '__init__.py'))
+        for i in range(1, count):
+            write_file(os.path.join(package_dir, 'module{}.py'.format(i)))
+        remaining -= count
+
+    return package_dirs
+
+
+def make_source_tree(d, files):
+    write_file(os.path.join(d, 'setup.py'), 'from setuptools import setup\nsetup()\n')
+    return make_packages(d, files)
+
+
+def make_compiled_files(package_dirs):
+    """Scatters `__pycache__` directories with compiled modules across the
+    packages, as running the project's tests would. Returns how many files
+    were created.
+    """
+    created = 0
+
+    for package_dir in package_dirs:
+        modules = [name for name in os.listdir(package_dir) if name.endswith('.py')]
+        compiled = modules[::COMPILED_RATIO]
+        if not compiled:
+            continue
+
+        cache_dir = os.path.join(package_dir, '__pycache__')
+        ensure_dir_exists(cache_dir)
+        for name in compiled:
+            write_file(os.path.join(cache_dir, name[:-3] + '.cpython-36.pyc'), 'x' * 64)
+        created += len(compiled)
+
+    return created
+
+
+def make_build_artifacts(d):
+    for name in ('build', 'dist', 'package.egg-info'):
+        ensure_dir_exists(os.path.join(d, name))
+        write_file(os.path.join(d, name, 'artifact'), 'x' * 64)
+
+
+def make_venv(d, scripts, origin):
+    """Creates the layout of a virtual env with `scripts` console scripts
+    whose shebangs point to the env at `origin`, returning the package
+    directories of its site-packages.
+    """
+    exe_dir = os.path.join(d, 'Scripts' if ON_WINDOWS else 'bin')
+    ensure_dir_exists(exe_dir)
+    write_file(os.path.join(d, 'pyvenv.cfg'), 'home = /usr/bin\n')
+
+    site_packages = os.path.join(d, 'lib', 'python3.6', 'site-packages')
+    package_dirs = make_packages(site_packages, scripts)
+    make_compiled_files(package_dirs)
+
+    for i in range(scripts):
+        write_file(os.path.join(exe_dir, 'script{}'.format(i)), '')
+    set_venv_origin(d, origin)
+
+    return package_dirs
+
+
+def set_venv_origin(d, origin):
+    """Points every script's shebang at the env at `origin`, like after
+    the env was moved from there.
+    """
+    exe_dir = os.path.join(d, 'Scripts' if ON_WINDOWS else 'bin')
+    shebang = SHEBANG_TEMPLATE.format(os.path.join(origin, os.path.basename(exe_dir), 'python'))
+
+    for name in os.listdir(exe_dir):
+        write_file(os.path.join(exe_dir, name), shebang + SCRIPT_BODY)
+
+
+def make_version_files(d, packages):
+    """Creates a project with `packages` top-level packages, where only
+    the last one to be searched defines a version.
+    """
+    write_file(os.path.join(d, 'setup.py'), 'from setuptools import setup\nsetup()\n')
+
+    for i in range(packages):
+        package_dir = os.path.join(d, 'package{:06}'.format(i))
+        ensure_dir_exists(package_dir)
+        write_file(os.path.join(package_dir, '__init__.py'), 'import os\n' * 20)
+
+    write_file(
+        os.path.join(d, 'package{:06}'.format(packages - 1), '__about__.py'),
+        "__version__ = '1.0.0'\n"
+    )
+
+
+def make_nested_dir(d, depth):
+    """Creates a project with a directory `depth` levels below its root,
+    returning that directory.
+    """
+    write_file(os.path.join(d, 'pyproject.toml'), '')
+    path = os.path.join(d, *('level{}'.format(i) for i in range(depth)))
+    ensure_dir_exists(path)
+    return path
@@ -0,0 +1,85 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from atomicwrites import atomic_write
+
+from hatch.utils import ensure_dir_exists
+from .suite import ROOT
+
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'history.json')
+
+# A benchmark regressed if its median grew by more than this fraction.
+DEFAULT_THRESHOLD = 0.1
+
+
+def load_history(path=DEFAULT_HISTORY):
+    if not os.path.isfile(path):
+        return []
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_history(history, path=DEFAULT_HISTORY):
+    ensure_dir_exists(os.path.dirname(os.path.abspath(path)))
+    with atomic_write(path, overwrite=True) as f:
+        f.write(json.dumps(history, indent=2))
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):  # no cov
+        return None
+
+
+def create_entry(results, scale, label=None):
+    commit = get_commit()
+    return {
+        'label': label or commit or time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': sys.platform,
+        'scale': scale,
+        'results': results,
+    }
+
+
+def find_entry(history, label):
+    """Returns the most recent entry with `label`, or with a label or
+    commit starting with it.
+    """
+    for entry in reversed(history):
+        if entry['label'] == label:
+            return entry
+
+    for entry in reversed(history):
+        if entry['label'].startswith(label) or (entry['commit'] or '').startswith(label):
+            return entry
+
+
+def compare_results(base, head, threshold=DEFAULT_THRESHOLD):
+    """Compares the medians of benchmarks present in both results,
+    returning each name with both medians, the relative change and
+    whether it is a regression beyond `threshold`.
+    """
+    comparisons = []
+
+    for name, result in head.items():
+        if name not in base:
+            continue
+
+        base_median = base[name]['median']
+        head_median = result['median']
+        change = (head_median - base_median) / base_median if base_median else 0.0
+        comparisons.append((name, base_median, head_median, change, change > threshold))
+
+    return comparisons
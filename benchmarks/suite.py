@@ -0,0 +1,178 @@
+import os
+import statistics
+import sys
+import time
+from collections import OrderedDict, namedtuple
+from copy import deepcopy
+from itertools import count
+from tempfile import TemporaryDirectory
+
+from hatch import process
+from hatch.clean import clean_package, remove_compiled_scripts
+from hatch.create import create_package
+from hatch.grow import bump_package_version
+from hatch.settings import copy_default_settings
+from hatch.utils import find_project_root
+from hatch.venv import fix_venv
+from . import fixtures
+
+SCALES = ('smoke', 'quick', 'full')
+DEFAULT_SCALE = 'quick'
+DEFAULT_REPEAT = 5
+
+# Files in a source tree and console scripts in a virtual env.
+TREE_SIZES = {'smoke': [200], 'quick': [10000], 'full': [10000, 100000, 500000]}
+VENV_SIZES = {'smoke': [20], 'quick': [1000], 'full': [1000, 5000]}
+
+# The repository root, so cold starts import this checkout of hatch.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Benchmark = namedtuple('Benchmark', ('name', 'setup', 'sizes', 'number'))
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name, sizes=None, number=1):
+    """Registers a benchmark. The decorated function is given an empty
+    directory and a size from `sizes` for the chosen scale, and returns
+    a function to time along with a function to call before every
+    repetition, or None. Timings are divided by `number` calls.
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, sizes or {}, number)
+        return setup
+    return decorator
+
+
+@benchmark('clean_package', TREE_SIZES)
+def bench_clean_package(d, size):
+    package_dirs = fixtures.make_source_tree(d, size)
+
+    def reset():
+        fixtures.make_compiled_files(package_dirs)
+        fixtures.make_build_artifacts(d)
+
+    return lambda: clean_package(d), reset
+
+
+@benchmark('remove_compiled_scripts', TREE_SIZES)
+def bench_remove_compiled_scripts(d, size):
+    package_dirs = fixtures.make_source_tree(d, size)
+    return lambda: remove_compiled_scripts(d), lambda: fixtures.make_compiled_files(package_dirs)
+
+
+@benchmark('fix_venv', VENV_SIZES)
+def bench_fix_venv(d, size):
+    venv_dir = os.path.join(d, 'venv')
+    origin = os.path.join(d, 'origin')
+    package_dirs = fixtures.make_venv(venv_dir, size, origin)
+
+    def reset():
+        fixtures.set_venv_origin(venv_dir, origin)
+        fixtures.make_compiled_files(package_dirs)
+
+    return lambda: fix_venv(venv_dir), reset
+
+
+@benchmark('fix_venv_current', VENV_SIZES)
+def bench_fix_venv_current(d, size):
+    venv_dir = os.path.join(d, 'venv')
+    fixtures.make_venv(venv_dir, size, venv_dir)
+    fix_venv(venv_dir)
+    return lambda: fix_venv(venv_dir), None
+
+
+@benchmark('bump_package_version', {'smoke': [20], 'quick': [1000], 'full': [1000, 10000]})
+def bench_bump_package_version(d, size):
+    fixtures.make_version_files(d, size)
+    return lambda: bump_package_version(d), None
+
+
+@benchmark('create_package', number=5)
+def bench_create_package(d, size):
+    settings = copy_default_settings()
+    counter = count()
+
+    def run():
+        project_dir = os.path.join(d, 'ok{}'.format(next(counter)))
+        os.mkdir(project_dir)
+        create_package(project_dir, 'ok', deepcopy(settings))
+
+    return run, None
+
+
+@benchmark('find_project_root', {'smoke': [3], 'quick': [3], 'full': [0, 3]}, number=1000)
+def bench_find_project_root(d, size):
+    path = fixtures.make_nested_dir(d, size)
+    return lambda: find_project_root(path), None
+
+
+@benchmark('cli_cold_start')
+def bench_cli_cold_start(d, size):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (ROOT, env.get('PYTHONPATH'))))
+    command = [sys.executable, '-m', 'hatch', '--version']
+    return lambda: process.check_output(command, 'hatch', env=env, cwd=d), None
+
+
+def get_result_name(name, size):
+    return name if size is None else '{}[{}]'.format(name, size)
+
+
+def select_benchmarks(scale=DEFAULT_SCALE, patterns=None):
+    """Returns the name, benchmark and size of everything to run at
+    `scale`, keeping only names containing one of `patterns`.
+    """
+    selected = []
+
+    for bench in BENCHMARKS.values():
+        for size in bench.sizes.get(scale, [None]):
+            name = get_result_name(bench.name, size)
+            if not patterns or any(pattern in name for pattern in patterns):
+                selected.append((name, bench, size))
+
+    return selected
+
+
+def time_benchmark(bench, size, repeat=DEFAULT_REPEAT):
+    """Returns the time of each repetition, in seconds per call."""
+    timings = []
+
+    with TemporaryDirectory() as d:
+        d = os.path.realpath(d)
+        run, reset = bench.setup(d, size)
+
+        for _ in range(repeat):
+            if reset is not None:
+                reset()
+
+            start = time.perf_counter()
+            for _ in range(bench.number):
+                run()
+            timings.append((time.perf_counter() - start) / bench.number)
+
+    return timings
+
+
+def summarize_timings(timings):
+    return OrderedDict([
+        ('min', min(timings)),
+        ('median', statistics.median(timings)),
+        ('mean', statistics.mean(timings)),
+        ('stdev', statistics.stdev(timings) if len(timings) > 1 else 0.0),
+        ('repeat', len(timings)),
+    ])
+
+
+def run_benchmarks(scale=DEFAULT_SCALE, patterns=None, repeat=DEFAULT_REPEAT, callback=None):
+    """Runs the selected benchmarks, calling `callback` with the name
+    and summary of each as it finishes, and returns all summaries.
+    """
+    results = OrderedDict()
+
+    for name, bench, size in select_benchmarks(scale, patterns):
+        results[name] = summarize_timings(time_benchmark(bench, size, repeat))
+        if callback is not None:
+            callback(name, results[name])
+
+    return results
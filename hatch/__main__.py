@@ -1,3 +1,2 @@
-import sys
-from hatch.cli import hatch
-sys.exit(hatch())
+from hatch.client import main
+main()
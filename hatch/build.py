@@ -1,11 +1,55 @@
+import hashlib
+import json
+import os
 import subprocess
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import mkdtemp
 
-from hatch.config import get_proper_python
-from hatch.utils import NEED_SUBPROCESS_SHELL, chdir
+from atomicwrites import atomic_write
+
+from hatch import process
+from hatch.clean import EVERYWHERE_MATCHER, ROOT_MATCHER
+from hatch.config import PROJECT_STATE_DIR, get_proper_python
+from hatch.env import RACY_MODIFICATION_WINDOW, get_python_info
+from hatch.exceptions import BuildBackendError
+from hatch.pep517 import get_build_system, start_build_backend
+from hatch.trace import span
+from hatch.utils import (
+    NEED_SUBPROCESS_SHELL, basepath, ensure_dir_exists, remove_path
+)
+
+BUILD_CACHE_VERSION = 1
+
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def get_wheel_config_settings(universal=None, name=None):
+    build_options = []
+
+    if universal:
+        build_options.append('--universal')
+
+    if name:
+        build_options.extend(['--plat-name', name])
+
+    return {'--build-option': build_options} if build_options else None
 
 
 def build_package(d, build_dir, universal=None, name=None,
                   pypath=None, verbose=False):
+    """Builds a source distribution and a wheel. Projects declaring their
+    build system in `pyproject.toml` are built by its backend, which will
+    raise `BuildBackendError` if it fails to.
+    """
+    build_system = get_build_system(d)
+    if build_system:
+        with start_build_backend(d, build_system, pypath, verbose) as backend:
+            backend.build('sdist', build_dir)
+            backend.build('wheel', build_dir, get_wheel_config_settings(universal, name))
+        return 0
+
     command = [pypath or get_proper_python(), 'setup.py']
 
     if not verbose:  # no cov
@@ -22,7 +66,320 @@ def build_package(d, build_dir, universal=None, name=None,
     if name:
         command.extend(['--plat-name', name])
 
-    with chdir(d):
-        result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+    result = process.run(command, cwd=d, shell=NEED_SUBPROCESS_SHELL)
+
+    return result.returncode
+
+
+def build_sdist(d, build_dir, pypath=None, verbose=False):
+    command = [pypath or get_proper_python(), 'setup.py']
+
+    if not verbose:  # no cov
+        command.append('--quiet')
+
+    command.extend(['sdist', '--dist-dir', build_dir])
+
+    result = process.run(command, cwd=d, shell=NEED_SUBPROCESS_SHELL)
+    return result.returncode
+
+
+def build_wheel(d, build_dir, universal=None, name=None, pypath=None, verbose=False):
+    """Builds a wheel using only a temporary directory for intermediate
+    files, so wheels for different interpreters can be built at once.
+    """
+    temp_dir = mkdtemp()
+    wheel_dir = os.path.join(temp_dir, 'dist')
+    command = [pypath or get_proper_python(), 'setup.py']
+
+    if not verbose:  # no cov
+        command.append('--quiet')
+
+    command.extend([
+        'egg_info', '--egg-base', temp_dir,
+        'build', '--build-base', os.path.join(temp_dir, 'build'),
+        'bdist_wheel', '--bdist-dir', os.path.join(temp_dir, 'bdist'), '--dist-dir', wheel_dir
+    ])
+
+    if universal:
+        command.append('--universal')
+
+    if name:
+        command.extend(['--plat-name', name])
+
+    try:
+        result = process.run(command, cwd=d, shell=NEED_SUBPROCESS_SHELL)
+        if result.returncode == 0:
+            ensure_dir_exists(build_dir)
+            for file in os.listdir(wheel_dir):
+                os.replace(os.path.join(wheel_dir, file), os.path.join(build_dir, file))
+    finally:
+        remove_path(temp_dir)
 
     return result.returncode
+
+
+def time_build(f, *args):
+    start = time.time()
+    try:
+        return_code = f(*args)
+    # The interpreter could not be started or the backend failed.
+    except (OSError, BuildBackendError):
+        return_code = 1
+    return return_code, time.time() - start
+
+
+def build_matrix(d, build_dir, targets, universal=None, name=None, verbose=False, jobs=None):
+    """Builds a wheel for each of the named Python paths in `targets`
+    concurrently, along with a single source distribution using the
+    first one. Returns the name, return code and duration of each build,
+    starting with the source distribution.
+    """
+    # basic handling of https://github.com/pypa/setuptools/issues/1185
+    sdist_dir = basepath(build_dir) if build_dir == os.path.join(d, 'dist') else build_dir
+
+    build_system = get_build_system(d)
+    if build_system:
+        return build_matrix_with_backend(
+            d, build_system, build_dir, sdist_dir, targets, universal, name, verbose, jobs
+        )
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        futures = [('sdist', executor.submit(
+            time_build, build_sdist, d, sdist_dir, targets[0][1], verbose
+        ))]
+        for target, pypath in targets:
+            futures.append((target, executor.submit(
+                time_build, build_wheel, d, build_dir, universal, name, pypath, verbose
+            )))
+
+        return [(target, ) + future.result() for target, future in futures]
+
+
+def unpack_sdist(path, d):
+    """Extracts a source distribution made by a build backend into `d`,
+    raising `BuildBackendError` for members that would end up elsewhere.
+    """
+    try:
+        with tarfile.open(path) as f:
+            if hasattr(tarfile, 'data_filter'):
+                f.extractall(d, filter='data')
+                return
+
+            root = os.path.join(os.path.realpath(d), '')
+            for member in f.getmembers():  # no cov
+                target = os.path.realpath(os.path.join(d, member.name))
+                if (
+                    not target.startswith(root) or member.issym() or member.islnk() or
+                    not (member.isfile() or member.isdir())
+                ):
+                    raise BuildBackendError(
+                        'Refusing to extract `{}` from `{}`.'.format(member.name, path)
+                    )
+            f.extractall(d)  # no cov
+    except tarfile.TarError as e:
+        raise BuildBackendError('Unable to extract `{}`: {}'.format(path, e))
+
+
+def build_matrix_with_backend(d, build_system, build_dir, sdist_dir, targets,
+                              universal=None, name=None, verbose=False, jobs=None):
+    """Like `build_matrix`, except the wheels are built from the unpacked
+    source distribution so that the backends never share a source tree.
+    Each target's backend is only started once, and the first one also
+    builds the source distribution.
+    """
+    config_settings = get_wheel_config_settings(universal, name)
+    backends = {}
+    sdists = []
+
+    def get_backend(target, pypath):
+        if target not in backends:
+            backends[target] = start_build_backend(d, build_system, pypath, verbose)
+        return backends[target]
+
+    def build_backend_sdist():
+        sdist = get_backend(*targets[0]).build('sdist', sdist_dir)
+        sdists.append(os.path.join(d, sdist_dir, sdist))
+        return 0
+
+    def build_backend_wheel(target, pypath):
+        if not sdists:
+            return 1
+
+        source_dir = mkdtemp()
+        try:
+            unpack_sdist(sdists[0], source_dir)
+            root = os.path.join(source_dir, os.listdir(source_dir)[0])
+            get_backend(target, pypath).build('wheel', build_dir, config_settings, cwd=root)
+        finally:
+            remove_path(source_dir)
+
+        return 0
+
+    try:
+        results = [('sdist', ) + time_build(build_backend_sdist)]
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+            futures = [
+                (target, executor.submit(time_build, build_backend_wheel, target, pypath))
+                for target, pypath in targets
+            ]
+        results.extend((target, ) + future.result() for target, future in futures)
+    finally:
+        for backend in backends.values():
+            backend.close()
+
+    return results
+
+
+def get_build_options(universal=None, name=None, pypath=None):
+    """Returns what, besides the project itself, determines a build's
+    artifacts, or None if that can't be known.
+    """
+    try:
+        info = get_python_info(pypath)
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return
+
+    return {
+        'python': info['executable'],
+        'python_version': info['version'],
+        'universal': bool(universal),
+        'name': name,
+    }
+
+
+def get_build_cache_file(d):
+    return os.path.join(d, PROJECT_STATE_DIR, 'build.json')
+
+
+def load_build_cache(d):
+    try:
+        with open(get_build_cache_file(d), 'r') as f:
+            cache = json.loads(f.read())
+    except (OSError, ValueError):
+        cache = {}
+
+    if cache.get('version') != BUILD_CACHE_VERSION:
+        cache = {'version': BUILD_CACHE_VERSION, 'files': {}, 'builds': {}}
+
+    return cache
+
+
+def save_build_cache(d, cache):
+    cache_file = get_build_cache_file(d)
+
+    try:
+        ensure_dir_exists(os.path.dirname(cache_file))
+        with atomic_write(cache_file, overwrite=True) as f:
+            f.write(json.dumps(cache, indent=4, sort_keys=True))
+    except OSError:  # no cov
+        pass
+
+
+def iter_build_inputs(d, build_dir):
+    """Yields the paths, relative to `d`, of the files that may affect
+    a build, skipping hidden directories and build artifacts.
+    """
+    build_dir = os.path.abspath(build_dir)
+    directories = [('', ROOT_MATCHER)]
+
+    while directories:
+        relative_root, matcher = directories.pop()
+        root = os.path.join(d, relative_root)
+
+        for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+            relative_path = os.path.join(relative_root, entry.name)
+            name = os.path.normcase(entry.name)
+            # Metadata is regenerated by every build, wherever it lives.
+            if matcher.match(name) or name.endswith('.egg-info'):
+                continue
+            elif entry.is_dir(follow_symlinks=False):
+                if not (
+                    name.startswith('.') or
+                    (not relative_root and name == 'venv') or
+                    os.path.abspath(entry.path) == build_dir
+                ):
+                    directories.append((relative_path, EVERYWHERE_MATCHER))
+            elif entry.is_file():
+                yield relative_path
+
+
+def hash_file(path):
+    hasher = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+@span('fingerprint_project', 'filesystem')
+def fingerprint_project(d, build_dir, cache):
+    """Returns a hash of everything that may affect a build. Files are
+    only hashed if their size or modification time differ from what is
+    recorded in the cache, which is updated accordingly.
+    """
+    files = {}
+    fingerprint = hashlib.sha256()
+    now = time.time()
+
+    for relative_path in iter_build_inputs(d, build_dir):
+        stat = os.stat(os.path.join(d, relative_path))
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        entry = cache['files'].get(relative_path)
+        if entry and entry[:2] == signature and entry[2]:
+            file_hash = entry[2]
+        else:
+            file_hash = hash_file(os.path.join(d, relative_path))
+
+        # The hash of a file that was just modified can't be trusted later.
+        racy = now - stat.st_mtime_ns / 10**9 < RACY_MODIFICATION_WINDOW
+        files[relative_path] = signature + [None if racy else file_hash]
+
+        fingerprint.update('{}\0{}\0'.format(
+            relative_path.replace(os.sep, '/'), file_hash
+        ).encode('utf-8'))
+
+    cache['files'] = files
+    return fingerprint.hexdigest()
+
+
+def get_artifacts(build_dir):
+    artifacts = {}
+
+    try:
+        entries = list(os.scandir(build_dir))
+    except OSError:
+        return artifacts
+
+    for entry in entries:
+        if entry.is_file():
+            stat = entry.stat()
+            artifacts[entry.name] = [stat.st_size, stat.st_mtime_ns]
+
+    return artifacts
+
+
+def build_is_up_to_date(cache, build_dir, fingerprint, options):
+    build = cache['builds'].get(os.path.abspath(build_dir))
+    if not build or build['fingerprint'] != fingerprint or build['options'] != options:
+        return False
+
+    artifacts = get_artifacts(build_dir)
+    return bool(build['artifacts']) and all(
+        artifacts.get(name) == signature for name, signature in build['artifacts'].items()
+    )
+
+
+def record_build(cache, build_dir, fingerprint, options, previous_artifacts):
+    artifacts = get_artifacts(build_dir)
+
+    cache['builds'][os.path.abspath(build_dir)] = {
+        'fingerprint': fingerprint,
+        'options': options,
+        'artifacts': {
+            name: signature for name, signature in artifacts.items()
+            if previous_artifacts.get(name) != signature
+        },
+    }
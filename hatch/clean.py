@@ -1,9 +1,10 @@
-import itertools
 import os
-from os.path import join
-from pathlib import Path
+import re
+from fnmatch import translate
 
-from hatch.utils import is_project, remove_path
+from hatch.trace import span
+from hatch.trash import LOCAL_TRASH_NAME, remove_paths
+from hatch.utils import is_project
 
 DELETE_IN_ROOT = {
     '.cache',
@@ -22,72 +23,57 @@ DELETE_EVERYWHERE = {
 }
 ALL_PATTERNS = DELETE_IN_ROOT | DELETE_EVERYWHERE
 
+# The contents of these are never ours to clean.
+SKIP_DIRECTORIES = {'.git', '.tox', LOCAL_TRASH_NAME}
 
-def remove_compiled_scripts(d, detect_project=True):
-    removed = set()
-
-    for root, _, files in generate_walker(d, detect_project):
-        for file in files:
-            if file.endswith('.pyc'):
-                removed.add(join(root, file))
-
-    removed = sorted(removed)
-
-    for p in reversed(removed):
-        remove_path(p)
-
-    return removed
 
+def compile_patterns(patterns):
+    return re.compile('|'.join(
+        '(?:{})'.format(translate(os.path.normcase(pattern))) for pattern in sorted(patterns)
+    ))
 
-def find_globs(walker, patterns, matches):
-    for root, dirs, files in walker:
-        for d in dirs:
-            d = join(root, d)
-            for pattern in patterns:
-                for p in Path(d).glob(pattern):
-                    matches.add(str(p))
 
-        sub_files = set()
-        for p in matches:
-            if root.startswith(p):
-                for f in files:
-                    sub_files.add(join(root, f))
+ROOT_MATCHER = compile_patterns(ALL_PATTERNS)
+ROOT_MATCHER_EDITABLE = compile_patterns(ALL_PATTERNS - {'*.egg-info'})
+EVERYWHERE_MATCHER = compile_patterns(DELETE_EVERYWHERE)
+COMPILED_MATCHER = compile_patterns({'*.pyc'})
 
-        matches.update(sub_files)
 
+def generate_candidates(d, root_matcher, matcher, detect_project=True):
+    """Lazily yields what should be removed in a single walk, using
+    `root_matcher` for the entries of `d` and `matcher` for everything
+    below it. Matching directories are yielded but not descended into.
+    """
+    root_skip = set(SKIP_DIRECTORIES)
+    if detect_project and is_project(d):
+        root_skip.add('venv')
 
-def clean_package(d, editable=False, detect_project=True):
-    removed = set()
-    patterns = ALL_PATTERNS.copy()
-    if editable:
-        patterns.remove('*.egg-info')
+    directories = [(d, root_matcher, root_skip)]
+    while directories:
+        root, root_matcher, skip = directories.pop()
 
-    root = Path(d)
-    for pattern in patterns:
-        for p in root.glob(pattern):
-            full_path = str(p)
-            removed.add(full_path)
-            if p.is_dir():
-                find_globs(os.walk(full_path), DELETE_EVERYWHERE, removed)
+        try:
+            entries = list(os.scandir(root))
+        except OSError:  # no cov
+            continue
 
-    find_globs(generate_walker(d, detect_project), DELETE_EVERYWHERE, removed)
+        for entry in entries:
+            name = os.path.normcase(entry.name)
+            if root_matcher.match(name):
+                yield entry.path
+            elif name not in skip and entry.is_dir(follow_symlinks=False):
+                directories.append((entry.path, matcher, SKIP_DIRECTORIES))
 
-    removed = sorted(removed)
 
-    for p in reversed(removed):
-        remove_path(p)
-
-    return removed
-
-
-def generate_walker(d, detect_project=True):
-    walker = os.walk(d)
-    r, dirs, f = next(walker)
+@span('remove_compiled_scripts', 'filesystem')
+def remove_compiled_scripts(d, detect_project=True):
+    return sorted(remove_paths(generate_candidates(
+        d, COMPILED_MATCHER, COMPILED_MATCHER, detect_project
+    ), wait=True))
 
-    try:
-        if detect_project and is_project(d):
-            dirs.remove('venv')
-    except ValueError:
-        pass
 
-    return itertools.chain(((r, dirs, f),), walker)
+@span('clean_package', 'filesystem')
+def clean_package(d, editable=False, detect_project=True, wait=True):
+    return sorted(remove_paths(generate_candidates(
+        d, ROOT_MATCHER_EDITABLE if editable else ROOT_MATCHER, EVERYWHERE_MATCHER, detect_project
+    ), wait=wait))
@@ -1,39 +1,112 @@
+import time
+from importlib import import_module
+
 import click
 
-from hatch.commands import (
-    build, clean, conda, config, env, grow, init, install, new, pypath,
-    python, release, shed, shell, test, uninstall, update
-)
-from hatch.commands.utils import CONTEXT_SETTINGS
+from hatch import __version__
+from hatch.commands.utils import CONTEXT_SETTINGS, echo_info, echo_warning
+from hatch.process import clear_records, get_records, summarize_records
+from hatch.trace import clear_events, get_trace_file, span, write_trace
+from hatch.utils import format_size
+
+# Commands are only imported when invoked so that cheap commands
+# don't pay for the dependencies of expensive ones, e.g. twine.
+COMMANDS = {
+    'build': 'hatch.commands.build',
+    'clean': 'hatch.commands.clean',
+    'conda': 'hatch.commands.conda',
+    'config': 'hatch.commands.config',
+    'daemon': 'hatch.commands.daemon',
+    'env': 'hatch.commands.env',
+    'grow': 'hatch.commands.grow',
+    'init': 'hatch.commands.init',
+    'install': 'hatch.commands.install',
+    'new': 'hatch.commands.new',
+    'pypath': 'hatch.commands.pypath',
+    'python': 'hatch.commands.python',
+    'release': 'hatch.commands.release',
+    'shed': 'hatch.commands.shed',
+    'shell': 'hatch.commands.shell',
+    'sync': 'hatch.commands.sync',
+    'test': 'hatch.commands.test',
+    'uninstall': 'hatch.commands.uninstall',
+    'update': 'hatch.commands.update',
+}
+ALIASES = {
+    'use': 'shell',
+}
 
 
-class AliasedGroup(click.Group):  # no cov
+class LazyGroup(click.Group):
+    def list_commands(self, ctx):
+        return sorted(set(COMMANDS) | set(self.commands))
+
     def get_command(self, ctx, cmd_name):
-        if cmd_name == 'use':
-            return shell
+        cmd_name = ALIASES.get(cmd_name, cmd_name)
+
+        if cmd_name not in self.commands and cmd_name in COMMANDS:
+            with span('import {}'.format(COMMANDS[cmd_name]), 'command'):
+                module = import_module(COMMANDS[cmd_name])
+            self.add_command(getattr(module, cmd_name))
+
         return click.Group.get_command(self, ctx, cmd_name)
 
+    def parse_args(self, ctx, args):
+        ctx.meta['hatch.argv'] = list(args)
+        return click.Group.parse_args(self, ctx, args)
+
+    def invoke(self, ctx):
+        trace_file = get_trace_file()
+        if not trace_file:
+            return click.Group.invoke(self, ctx)
+
+        try:
+            with span('hatch', 'command', {'argv': ctx.meta.get('hatch.argv')}):
+                return click.Group.invoke(self, ctx)
+        finally:
+            try:
+                write_trace(trace_file)
+            except OSError as e:
+                echo_warning('Unable to write the trace to `{}`: {}'.format(trace_file, e), err=True)
+            clear_events()
+
+
+def format_seconds(seconds):
+    return '-' if seconds is None else '{:.2f}s'.format(seconds)
+
+
+def echo_timings(start):
+    """Shows how long every phase of the command took, as well as the CPU
+    time and peak memory of the processes it started, when known.
+    """
+    elapsed = time.perf_counter() - start
+    rows = [('Phase', 'Count', 'Wall', 'User', 'System', 'Max RSS')]
+    for phase, count, wall_time, user_time, system_time, max_rss in summarize_records(get_records()):
+        rows.append((
+            phase, str(count), format_seconds(wall_time), format_seconds(user_time),
+            format_seconds(system_time), '-' if max_rss is None else format_size(max_rss)
+        ))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+
+    click.echo(err=True)
+    echo_info('Timings:', err=True)
+    if len(rows) > 1:
+        for row in rows:
+            click.echo('  '.join(
+                [row[0].ljust(widths[0])] +
+                [value.rjust(width) for value, width in zip(row[1:], widths[1:])]
+            ), err=True)
+    echo_info('Total: {}'.format(format_seconds(elapsed)), err=True)
+
 
-@click.group(cls=AliasedGroup, context_settings=CONTEXT_SETTINGS)
-@click.version_option()
-def hatch():
-    pass
-
-
-hatch.add_command(build)
-hatch.add_command(clean)
-hatch.add_command(conda)
-hatch.add_command(config)
-hatch.add_command(env)
-hatch.add_command(grow)
-hatch.add_command(init)
-hatch.add_command(install)
-hatch.add_command(new)
-hatch.add_command(pypath)
-hatch.add_command(python)
-hatch.add_command(release)
-hatch.add_command(shed)
-hatch.add_command(shell)
-hatch.add_command(test)
-hatch.add_command(uninstall)
-hatch.add_command(update)
+@click.group(cls=LazyGroup, context_settings=CONTEXT_SETTINGS)
+@click.version_option(version=__version__)
+@click.option('--timings', is_flag=True,
+              help='Shows how long each phase took, e.g. pip or pytest, once done.')
+@click.pass_context
+def hatch(ctx, timings):
+    if timings:
+        clear_records()
+        start = time.perf_counter()
+        ctx.call_on_close(lambda: echo_timings(start))
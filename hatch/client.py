@@ -0,0 +1,168 @@
+import json
+import os
+import signal
+import socket
+import sys
+from array import array
+
+from appdirs import user_data_dir
+
+from hatch import __version__
+
+# Only the standard library and appdirs are imported here so that
+# commands forwarded to a daemon don't pay for importing hatch itself.
+
+SOCKET_ENV_VAR = 'HATCH_DAEMON_SOCKET'
+SOCKET_NAME = 'daemon.sock'
+
+# These need a terminal of their own, e.g. to prompt for input or a
+# password without echoing it, or manage the daemon itself. Commands
+# run by the daemon have no controlling terminal.
+LOCAL_COMMANDS = ('daemon', 'init', 'new', 'release', 'shell', 'use')
+
+# Forwarded to the process group running a command.
+FORWARDED_SIGNALS = ('SIGINT', 'SIGTERM', 'SIGHUP', 'SIGQUIT')
+
+STDIO_FDS = (0, 1, 2)
+FD_SIZE = array('i').itemsize
+
+DAEMON_SUPPORTED = hasattr(socket, 'AF_UNIX') and hasattr(os, 'fork')
+
+
+def get_socket_path(env=None):
+    env = os.environ if env is None else env
+    return env.get(SOCKET_ENV_VAR) or os.path.join(user_data_dir('hatch', ''), SOCKET_NAME)
+
+
+def get_command_name(argv):
+    for arg in argv:
+        if not arg.startswith('-'):
+            return arg
+
+
+def send_message(sock, message, fds=()):
+    data = (json.dumps(message) + '\n').encode('utf-8')
+    if fds:
+        sent = sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array('i', fds))])
+        data = data[sent:]
+    sock.sendall(data)
+
+
+def recv_message(sock, max_fds=0):
+    """Reads a message and, if `max_fds` is set, the file descriptors sent
+    along with it. Returns None for the message if the connection closed.
+    """
+    chunks = []
+    fds = array('i')
+    while not chunks or not chunks[-1].endswith(b'\n'):
+        if max_fds and not chunks:
+            chunk, ancdata, _, _ = sock.recvmsg(4096, socket.CMSG_SPACE(max_fds * FD_SIZE))
+            for level, kind, cmsg_data in ancdata:
+                if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                    fds.frombytes(cmsg_data[:len(cmsg_data) - len(cmsg_data) % FD_SIZE])
+        else:
+            chunk = sock.recv(4096)
+
+        if not chunk:
+            return None, list(fds)
+        chunks.append(chunk)
+
+    return json.loads(b''.join(chunks).decode('utf-8')), list(fds)
+
+
+def connect(path=None):
+    """Returns a connection to the daemon, or None if none is running."""
+    path = path or get_socket_path()
+    if not os.path.exists(path):
+        return
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return
+
+    return sock
+
+
+def request(message, path=None):
+    """Sends a control message, e.g. `status`, to the daemon and returns
+    its reply, or None if no daemon is running.
+    """
+    sock = connect(path)
+    if sock is None:
+        return
+
+    with sock:
+        send_message(sock, message)
+        reply, _ = recv_message(sock)
+        return reply
+
+
+def forward(argv, path=None):
+    """Runs a command in the daemon with this process's environment,
+    working directory and standard streams, returning its exit code.
+    Returns None if the command should run in this process instead.
+    """
+    if get_command_name(argv) in LOCAL_COMMANDS or not DAEMON_SUPPORTED:
+        return
+
+    sock = connect(path)
+    if sock is None:
+        return
+
+    for stream in (sys.stdout, sys.stderr):
+        stream.flush()
+
+    with sock:
+        try:
+            send_message(sock, {
+                'command': 'run',
+                'version': __version__,
+                'executable': sys.executable,
+                'argv': argv,
+                'env': dict(os.environ),
+                'cwd': os.getcwd(),
+            }, STDIO_FDS)
+            reply, _ = recv_message(sock)
+        except OSError:
+            return
+
+        if reply is None or 'fallback' in reply:
+            return
+
+        pgid = reply['pid']
+
+        def forward_signal(signum, frame):
+            try:
+                os.killpg(pgid, signum)
+            except OSError:  # no cov
+                pass
+
+        handlers = {}
+        for name in FORWARDED_SIGNALS:
+            signum = getattr(signal, name, None)
+            if signum is not None:
+                handlers[signum] = signal.signal(signum, forward_signal)
+
+        try:
+            reply, _ = recv_message(sock)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    if reply is None:
+        sys.stderr.write('The hatch daemon exited before the command finished.\n')
+        return 1
+
+    return reply['exit']
+
+
+def main():
+    code = forward(sys.argv[1:])
+    if code is None:
+        from hatch.cli import hatch
+        return hatch()
+
+    sys.exit(code)
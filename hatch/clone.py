@@ -0,0 +1,190 @@
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from hatch.trace import span
+from hatch.utils import ON_LINUX
+
+LINK_MODES = ('auto', 'reflink', 'hardlink', 'copy')
+
+# From linux/fs.h
+FICLONE = 0x40049409
+
+# Errors meaning a method can't be used for a pair of files, as
+# opposed to a failure that would also affect a regular copy.
+UNSUPPORTED_ERRORS = {
+    errno.EINVAL, errno.ENOSYS, errno.ENOTSUP, errno.ENOTTY,
+    errno.EOPNOTSUPP, errno.EPERM, errno.EXDEV,
+}
+COPY_BUFFER_SIZE = 1024 * 1024
+
+__reflink_unsupported = set()
+
+
+class CloneStats:
+    def __init__(self):
+        self.files = 0
+        self.total_bytes = 0
+        self.shared_bytes = 0
+
+    def update(self, other):
+        self.files += other.files
+        self.total_bytes += other.total_bytes
+        self.shared_bytes += other.shared_bytes
+
+
+def reflink_file(src, dst):  # no cov
+    """Creates `dst` as a copy-on-write clone of `src`, which only some
+    file systems like Btrfs and XFS support.
+    """
+    if not ON_LINUX:
+        raise OSError(errno.ENOTSUP, 'Reflinks are only supported on Linux.')
+
+    import fcntl
+
+    with open(src, 'rb') as f_src, open(dst, 'wb') as f_dst:
+        try:
+            fcntl.ioctl(f_dst.fileno(), FICLONE, f_src.fileno())
+        except OSError:
+            f_dst.close()
+            os.remove(dst)
+            raise
+
+    shutil.copystat(src, dst)
+
+
+def copy_file(src, dst):
+    """Copies `src` to `dst` in the kernel when possible, which avoids
+    moving the data through user space.
+    """
+    with open(src, 'rb') as f_src, open(dst, 'wb') as f_dst:
+        size = os.fstat(f_src.fileno()).st_size
+
+        for method in ('copy_file_range', 'sendfile'):
+            if not (ON_LINUX and hasattr(os, method)):
+                continue
+
+            try:
+                copied = 0
+                while copied < size:
+                    if method == 'copy_file_range':
+                        sent = os.copy_file_range(f_src.fileno(), f_dst.fileno(), size - copied)
+                    else:
+                        sent = os.sendfile(f_dst.fileno(), f_src.fileno(), None, size - copied)
+                    if not sent:
+                        break
+                    copied += sent
+                break
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRORS:
+                    raise
+                f_src.seek(0)
+                f_dst.seek(0)
+                f_dst.truncate()
+        else:
+            shutil.copyfileobj(f_src, f_dst, COPY_BUFFER_SIZE)
+
+    shutil.copystat(src, dst)
+
+
+def clone_file(src, dst, mode='auto'):
+    """Creates `dst` from `src` with a reflink in the `auto` and `reflink`
+    modes or a hard link in the `hardlink` mode, falling back to a copy.
+    Returns whether the data is shared rather than duplicated.
+
+    Hard linked files also share their permissions and any in-place
+    modifications, so they are never created unless asked for.
+    """
+    if mode in ('auto', 'reflink'):
+        device = os.stat(src).st_dev
+        if (
+            device not in __reflink_unsupported and
+            device == os.stat(os.path.dirname(os.path.abspath(dst))).st_dev
+        ):
+            try:
+                reflink_file(src, dst)
+                return True
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRORS:
+                    raise
+                __reflink_unsupported.add(device)
+
+    if mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return True
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRORS | {errno.EMLINK}:
+                raise
+
+    copy_file(src, dst)
+    return False
+
+
+def clone_files(files, mode='auto', copy_only=None):
+    stats = CloneStats()
+
+    for src, dst in files:
+        size = os.stat(src).st_size
+        if copy_only and copy_only(src):
+            copy_file(src, dst)
+            shared = False
+        else:
+            shared = clone_file(src, dst, mode)
+
+        stats.files += 1
+        stats.total_bytes += size
+        if shared:
+            stats.shared_bytes += size
+
+    return stats
+
+
+@span('clone_tree', 'filesystem')
+def clone_tree(src, dst, mode='auto', copy_only=None, link_prefixes=(), workers=None):
+    """Recreates the directory `src` at `dst` with `clone_file`, copying
+    each directory's files concurrently. Files for which `copy_only`
+    returns true are always copied so they may safely be modified.
+
+    Absolute symlinks into `src`, or any of `link_prefixes`, will
+    point to the equivalent location in `dst`.
+    """
+    if mode not in LINK_MODES:
+        raise ValueError('Unknown link mode `{}`.'.format(mode))
+
+    src = os.path.abspath(src)
+    dst = os.path.abspath(dst)
+    link_prefixes = [src] + list(link_prefixes)
+    stats = CloneStats()
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        directories = [(src, dst)]
+        while directories:
+            src_dir, dst_dir = directories.pop()
+            os.makedirs(dst_dir, exist_ok=True)
+            files = []
+
+            for entry in os.scandir(src_dir):
+                target = os.path.join(dst_dir, entry.name)
+
+                if entry.is_symlink():
+                    link = os.readlink(entry.path)
+                    for prefix in link_prefixes:
+                        if link.startswith(prefix + os.sep):
+                            link = dst + link[len(prefix):]
+                            break
+                    os.symlink(link, target)
+                elif entry.is_dir():
+                    directories.append((entry.path, target))
+                else:
+                    files.append((entry.path, target))
+
+            if files:
+                futures.append(executor.submit(clone_files, files, mode, copy_only))
+
+    for future in futures:
+        stats.update(future.result())
+
+    return stats
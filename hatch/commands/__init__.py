@@ -1,17 +0,0 @@
-from hatch.commands.build import build
-from hatch.commands.clean import clean
-from hatch.commands.conda import conda
-from hatch.commands.config import config
-from hatch.commands.env import env
-from hatch.commands.grow import grow
-from hatch.commands.init import init
-from hatch.commands.install import install
-from hatch.commands.new import new
-from hatch.commands.pypath import pypath
-from hatch.commands.python import python
-from hatch.commands.release import release
-from hatch.commands.shed import shed
-from hatch.commands.shell import shell
-from hatch.commands.test import test
-from hatch.commands.uninstall import uninstall
-from hatch.commands.update import update
@@ -3,12 +3,18 @@ import sys
 
 import click
 
-from hatch.build import build_package
+from hatch.build import (
+    build_is_up_to_date, build_matrix, build_package, fingerprint_project,
+    get_artifacts, get_build_options, load_build_cache, record_build,
+    save_build_cache
+)
 from hatch.clean import clean_package
 from hatch.commands.utils import (
     CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting
 )
 from hatch.env import get_editable_package_location
+from hatch.exceptions import BuildBackendError
+from hatch.pep517 import get_build_system
 from hatch.settings import load_settings
 from hatch.utils import basepath, resolve_path
 
@@ -22,7 +28,11 @@ from hatch.utils import basepath, resolve_path
               ))
 @click.option('-p', '--path', help='A relative or absolute path to a project.')
 @click.option('-py', '--python', 'pyname',
-              help='The named Python path to use. This overrides --pypath.')
+              help=(
+                  'The named Python path to use. This overrides --pypath. '
+                  'A forward-slash-separated list of names builds a wheel '
+                  'with each one.'
+              ))
 @click.option('-pp', '--pypath',
               help='An absolute path to a Python executable.')
 @click.option('-u', '--universal', is_flag=True,
@@ -33,9 +43,18 @@ from hatch.utils import basepath, resolve_path
               help='A relative or absolute path to the desired build directory.')
 @click.option('-c', '--clean', 'clean_first', is_flag=True,
               help='Removes build artifacts before building.')
+@click.option('-f', '--force', is_flag=True,
+              help='Builds even if nothing changed since the last build.')
+@click.option('-m', '--matrix', is_flag=True,
+              help='Builds a wheel with every named Python path.')
+@click.option('-j', '--jobs', type=click.IntRange(1),
+              help=(
+                  'The maximum number of concurrent builds when building '
+                  'with multiple Python paths. Defaults to the number of CPUs.'
+              ))
 @click.option('-v', '--verbose', is_flag=True, help='Increases verbosity.')
 def build(package, local, path, pyname, pypath, universal, name, build_dir,
-          clean_first, verbose):
+          clean_first, force, matrix, jobs, verbose):
     """Builds a project, producing a source distribution and a wheel.
 
     The path to the project is derived in the following order:
@@ -47,7 +66,22 @@ def build(package, local, path, pyname, pypath, universal, name, build_dir,
     3. The option --path, which can be a relative or absolute path.
     4. The current directory.
 
-    The path must contain a `setup.py` file.
+    The path must contain a `setup.py` file, or a `pyproject.toml` file
+    with a `[build-system]` table.
+
+    Projects declaring their build system are built by calling its backend
+    from a single helper process, which runs in an isolated environment with
+    the build requirements installed. Such environments are created once per
+    set of requirements and Python and reused afterwards.
+
+    When building with multiple named Python paths, each wheel is built in
+    its own temporary directory at the same time, and the source distribution
+    is only built once with the first one. If the project declares its build
+    system, the wheels are built from the source distribution.
+
+    Unless --force is used, nothing will be built if no file in the project
+    has changed since the last build with the same options and its artifacts
+    are still present. Hidden directories are not considered.
     """
     if package:
         echo_waiting('Locating package...')
@@ -83,17 +117,33 @@ def build(package, local, path, pyname, pypath, universal, name, build_dir,
     else:
         build_dir = os.path.join(path, 'dist')
 
-    if pyname:
+    targets = None
+    if pyname or matrix:
         try:
             settings = load_settings()
         except FileNotFoundError:
             echo_failure('Unable to locate config file. Try `hatch config --restore`.')
             sys.exit(1)
 
-        pypath = settings.get('pypaths', {}).get(pyname, None)
-        if not pypath:
-            echo_failure('Python path named `{}` does not exist or is invalid.'.format(pyname))
-            sys.exit(1)
+        pypaths = settings.get('pypaths', {})
+        if matrix:
+            pynames = list(pypaths)
+            if not pynames:
+                echo_failure('There are no saved Python paths. Add '
+                             'one via `hatch pypath NAME PATH`.')
+                sys.exit(1)
+        else:
+            pynames = pyname.split('/')
+
+        for pyname in pynames:
+            if not pypaths.get(pyname):
+                echo_failure('Python path named `{}` does not exist or is invalid.'.format(pyname))
+                sys.exit(1)
+
+        if len(pynames) > 1 or matrix:
+            targets = [(pyname, pypaths[pyname]) for pyname in pynames]
+        else:
+            pypath = pypaths[pynames[0]]
 
     if clean_first:
         echo_waiting('Removing build artifacts...')
@@ -102,7 +152,47 @@ def build(package, local, path, pyname, pypath, universal, name, build_dir,
     # basic handling of https://github.com/pypa/setuptools/issues/1185
     bd = basepath(build_dir) if build_dir == os.path.join(path, 'dist') else build_dir
 
-    return_code = build_package(path, bd, universal, name, pypath, verbose)
+    if targets:
+        options = [get_build_options(universal, name, target_pypath) for _, target_pypath in targets]
+        options = None if None in options else {'matrix': options}
+    else:
+        options = get_build_options(universal, name, pypath)
+
+    cache = fingerprint = None
+    if options is not None and (
+        os.path.isfile(os.path.join(path, 'setup.py')) or get_build_system(path)
+    ):
+        cache = load_build_cache(path)
+        fingerprint = fingerprint_project(path, build_dir, cache)
+
+    if cache is not None and not force and build_is_up_to_date(cache, build_dir, fingerprint, options):
+        echo_success('Build is up to date.')
+        save_build_cache(path, cache)
+        return_code = 0
+    else:
+        previous_artifacts = get_artifacts(build_dir)
+
+        if targets:
+            echo_waiting('Building with {} Python paths...'.format(len(targets)))
+            results = build_matrix(path, build_dir, targets, universal, name, verbose, jobs)
+
+            return_code = 0
+            for target, target_return_code, elapsed in results:
+                if target_return_code == 0:
+                    echo_success('{} -> built in {:.2f} seconds'.format(target, elapsed))
+                else:
+                    echo_failure('{} -> failed after {:.2f} seconds'.format(target, elapsed))
+                    return_code = 1
+        else:
+            try:
+                return_code = build_package(path, bd, universal, name, pypath, verbose)
+            except BuildBackendError as e:
+                echo_failure(str(e))
+                return_code = 1
+
+        if cache is not None and return_code == 0:
+            record_build(cache, build_dir, fingerprint, options, previous_artifacts)
+            save_build_cache(path, cache)
 
     if os.path.isdir(build_dir):
         echo_success('Files found in `{}`:\n'.format(build_dir))
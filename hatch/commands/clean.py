@@ -27,8 +27,13 @@ from hatch.utils import resolve_path
                   "Disables the detection of a project's dedicated virtual "
                   'env. By default, it will not be considered.'
               ))
+@click.option('-w', '--wait', is_flag=True,
+              help=(
+                  'Waits until removed directories are fully deleted rather '
+                  'than finishing that in the background.'
+              ))
 @click.option('-v', '--verbose', is_flag=True, help='Shows removed paths.')
-def clean(package, local, path, compiled_only, no_detect, verbose):
+def clean(package, local, path, compiled_only, no_detect, wait, verbose):
     """Removes a project's build artifacts.
 
     The path to the project is derived in the following order:
@@ -43,6 +48,8 @@ def clean(package, local, path, compiled_only, no_detect, verbose):
     All `*.pyc`/`*.pyd`/`*.pyo` files and `__pycache__` directories will be removed.
     Additionally, the following patterns will be removed from the root of the path:
     `.cache`, `.coverage`, `.eggs`, `.tox`, `build`, `dist`, and `*.egg-info`.
+    Matching directories are removed as a whole, and the contents of any
+    `.git` or `.tox` directories are never considered.
 
     If the path was derived from the optional package argument, the pattern
     `*.egg-info` will not be applied so as to not break that installation.
@@ -79,7 +86,9 @@ def clean(package, local, path, compiled_only, no_detect, verbose):
     if compiled_only:
         removed_paths = remove_compiled_scripts(path, detect_project=not no_detect)
     else:
-        removed_paths = clean_package(path, editable=package or local, detect_project=not no_detect)
+        removed_paths = clean_package(
+            path, editable=package or local, detect_project=not no_detect, wait=wait
+        )
 
     if verbose:
         if removed_paths:
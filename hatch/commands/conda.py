@@ -1,6 +1,7 @@
 import os
 import subprocess
 import sys
+from tempfile import TemporaryDirectory
 
 import click
 import userpath
@@ -10,12 +11,11 @@ from hatch.commands.utils import (
     echo_warning
 )
 from hatch.conda import get_conda_new_exe_path
+from hatch.context import ExecutionContext, locate_exe_dir
 from hatch.exceptions import InvalidVirtualEnv
 from hatch.utils import (
-    NEED_SUBPROCESS_SHELL, ON_MACOS, ON_WINDOWS, conda_available,
-    download_file, is_os_64bit, temp_chdir
+    ON_MACOS, ON_WINDOWS, conda_available, download_file, is_os_64bit
 )
-from hatch.venv import locate_exe_dir
 
 
 @click.command(context_settings=CONTEXT_SETTINGS, short_help='Installs Miniconda')
@@ -70,7 +70,7 @@ def conda(location, force, head, install_only, show):  # no cov
                 else:
                     url = 'https://repo.continuum.io/miniconda/Miniconda3-latest-Linux-x86.sh'
 
-        with temp_chdir() as d:
+        with TemporaryDirectory() as d:
             fname = os.path.join(d, installer_name)
             echo_waiting('Downloading installer to a temporary directory... ', nl=False)
             download_file(url, fname)
@@ -86,7 +86,7 @@ def conda(location, force, head, install_only, show):  # no cov
 
             try:
                 echo_waiting('Installing, please wait...')
-                subprocess.run(command, shell=NEED_SUBPROCESS_SHELL, check=True)
+                ExecutionContext(cwd=d).run(command, check=True)
             except subprocess.CalledProcessError:
                 echo_failure('Installation has seemingly failed! ', nl=False)
                 if force:
@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+import time
+
+import click
+
+from hatch import process
+from hatch.client import DAEMON_SUPPORTED, get_socket_path, request
+from hatch.commands.utils import (
+    CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting,
+    echo_warning
+)
+from hatch.daemon import LOG_FILE, Daemon
+from hatch.exceptions import DaemonError
+from hatch.utils import ensure_dir_exists
+
+# How long to wait for a daemon started in the background to listen.
+START_TIMEOUT = 10
+
+
+def echo_status(status):
+    echo_success('PID: ', nl=False)
+    echo_info(str(status['pid']))
+    echo_success('Version: ', nl=False)
+    echo_info(status['version'])
+    echo_success('Socket: ', nl=False)
+    echo_info(status['socket'])
+    echo_success('Uptime: ', nl=False)
+    echo_info('{:.0f}s'.format(status['uptime']))
+    echo_success('Commands served: ', nl=False)
+    echo_info(str(status['requests']))
+
+
+def start_daemon(path):
+    ensure_dir_exists(os.path.dirname(LOG_FILE))
+    with open(LOG_FILE, 'a') as log:
+        daemon_process = process.popen(
+            [sys.executable, '-m', 'hatch', 'daemon', '--foreground'], 'daemon',
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = request({'command': 'status'}, path)
+        if status is not None:
+            return status
+        elif daemon_process.poll() is not None:
+            break
+        time.sleep(0.05)
+
+
+@click.command(context_settings=CONTEXT_SETTINGS,
+               short_help='Keeps hatch loaded in the background for faster commands')
+@click.option('-f', '--foreground', is_flag=True,
+              help='Runs the daemon in this process until interrupted.')
+@click.option('-s', '--status', is_flag=True,
+              help='Shows whether a daemon is running.')
+@click.option('--stop', is_flag=True, help='Stops the running daemon.')
+def daemon(foreground, status, stop):
+    """Starts a daemon that keeps hatch's commands imported and the caches
+    of interpreter metadata and installed distributions in memory. While
+    it runs, `hatch` forwards its arguments, environment variables,
+    working directory and standard streams to it, so commands start in
+    milliseconds. When no daemon is running, commands run as usual.
+
+    Every command runs in a fresh fork of the daemon. `shell`, `init`,
+    `new` and `release` always run on their own because they need the
+    terminal, e.g. to prompt for a password, as do commands run by
+    another Python interpreter than the daemon's or from an environment
+    whose home or data directories differ from the daemon's. Only the
+    user running the daemon can connect to it.
+
+    The socket is located in hatch's data directory unless the environment
+    variable `HATCH_DAEMON_SOCKET` is set. This requires Unix domain
+    sockets and is therefore unavailable on Windows.
+
+    \b
+    $ hatch daemon
+    Started the daemon with PID 4242.
+    $ hatch daemon --stop
+    Stopped the daemon with PID 4242.
+    """
+    if not DAEMON_SUPPORTED:
+        echo_failure('The daemon requires Unix domain sockets, which are unavailable on this platform.')
+        sys.exit(1)
+
+    path = get_socket_path()
+    running = request({'command': 'status'}, path)
+
+    if status:
+        if running is None:
+            echo_warning('The daemon is not running.')
+        else:
+            echo_status(running)
+        return
+
+    if stop:
+        if running is None:
+            echo_warning('The daemon is not running.')
+            return
+
+        stopped = request({'command': 'stop'}, path)
+        echo_success('Stopped the daemon with PID {}.'.format((stopped or running)['pid']))
+        return
+
+    if running is not None:
+        echo_warning('The daemon is already running with PID {}.'.format(running['pid']))
+        return
+
+    if not foreground:
+        echo_waiting('Starting the daemon...')
+        started = start_daemon(path)
+        if started is None:
+            echo_failure('The daemon failed to start. See `{}` for details.'.format(LOG_FILE))
+            sys.exit(1)
+
+        echo_success('Started the daemon with PID {}.'.format(started['pid']))
+        return
+
+    echo_waiting('Loading commands...')
+    server = Daemon(path)
+    server.warm()
+
+    try:
+        server.serve(ready=lambda: echo_success('Listening on `{}`'.format(path)))
+    except DaemonError as e:
+        echo_failure(str(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+    echo_success('Stopped.')
@@ -1,18 +1,20 @@
 import os
 import sys
+import time
 
 import click
 
 from hatch.commands.utils import (
     CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting
 )
+from hatch.clone import LINK_MODES
 from hatch.config import get_venv_dir
-from hatch.env import (
-    get_editable_packages, get_python_implementation, get_python_version
-)
+from hatch.context import ExecutionContext
+from hatch.env import get_editable_packages, get_python_info
 from hatch.settings import load_settings
+from hatch.utils import format_size
 from hatch.venv import (
-    clone_venv, create_venv, fix_available_venvs, get_available_venvs, venv
+    clone_venv, create_venv, fix_available_venvs, get_available_venvs
 )
 
 
@@ -24,18 +26,22 @@ def list_envs(ctx, param, value):
 
     if venvs:
         echo_success('Virtual environments found in `{}`:\n'.format(get_venv_dir()))
+        context = ExecutionContext()
         for venv_name, venv_dir in venvs:
-            with venv(venv_dir):
-                echo_success('{} ->'.format(venv_name))
-                if value == 1:
-                    echo_info('  Version: {}'.format(get_python_version()))
-                elif value == 2:
-                    echo_info('  Version: {}'.format(get_python_version()))
-                    echo_info('  Implementation: {}'.format(get_python_implementation()))
-                else:
-                    echo_info('  Version: {}'.format(get_python_version()))
-                    echo_info('  Implementation: {}'.format(get_python_implementation()))
-                    echo_info('  Local packages: {}'.format(', '.join(sorted(get_editable_packages()))))
+            venv_context = context.with_venv(venv_dir)
+            echo_success('{} ->'.format(venv_name))
+            python_info = get_python_info(context=venv_context)
+            if value == 1:
+                echo_info('  Version: {}'.format(python_info['version']))
+            elif value == 2:
+                echo_info('  Version: {}'.format(python_info['version']))
+                echo_info('  Implementation: {}'.format(python_info['implementation']))
+            else:
+                echo_info('  Version: {}'.format(python_info['version']))
+                echo_info('  Implementation: {}'.format(python_info['implementation']))
+                echo_info('  Local packages: {}'.format(
+                    ', '.join(sorted(get_editable_packages(venv_context)))
+                ))
 
     # I don't want to move users' virtual environments
     # temporarily for tests as one may be in use.
@@ -50,8 +56,16 @@ def restore_envs(ctx, param, value):
     if not value or ctx.resilient_parsing:
         return
 
-    fix_available_venvs()
+    start = time.time()
+    results = fix_available_venvs()
+    elapsed = time.time() - start
+
     echo_success('Successfully restored all available virtual envs.')
+    echo_info('Fixed {} scripts and removed {} compiled files in {} virtual envs in {:.2f} seconds.'.format(
+        sum(len(fixed) for _, fixed, _ in results),
+        sum(len(removed) for _, _, removed in results),
+        len(results), elapsed
+    ))
     ctx.exit()
 
 
@@ -66,6 +80,12 @@ def restore_envs(ctx, param, value):
               help='Gives the virtual environment access to the global site-packages.')
 @click.option('-c', '--clone',
               help='Specifies an existing virtual env to clone. (Experimental)')
+@click.option('-lm', '--link-mode', type=click.Choice(LINK_MODES), default='auto',
+              help=(
+                  'How --clone shares files with the original env. `auto` tries '
+                  'reflinks, then copies. Hard linked files are shared by both '
+                  'envs so must not be modified in place.'
+              ))
 @click.option('-v', '--verbose', is_flag=True, help='Increases verbosity.')
 @click.option('-r', '--restore', is_flag=True, is_eager=True, callback=restore_envs,
               help=(
@@ -78,7 +98,7 @@ def restore_envs(ctx, param, value):
                   'Shows available virtual envs. Can stack up to 3 times to '
                   'show more info.'
               ))
-def env(name, pyname, pypath, global_packages, clone, verbose, restore, show):
+def env(name, pyname, pypath, global_packages, clone, link_mode, verbose, restore, show):
     """Creates a new virtual env that can later be utilized with the
     `shell` command.
 
@@ -138,8 +158,11 @@ def env(name, pyname, pypath, global_packages, clone, verbose, restore, show):
             echo_failure('Virtual env `{name}` does not exist.'.format(name=clone))
             sys.exit(1)
         echo_waiting('Cloning virtual env `{}`...'.format(clone))
-        clone_venv(origin, venv_dir)
+        stats = clone_venv(origin, venv_dir, link_mode=link_mode)
         echo_success('Successfully cloned virtual env `{}` from `{}` to `{}`.'.format(name, clone, venv_dir))
+        echo_info('Shared {} of {} in {} files with `{}`.'.format(
+            format_size(stats.shared_bytes), format_size(stats.total_bytes), stats.files, clone
+        ))
     else:
         echo_waiting('Creating virtual env `{}`...'.format(name))
         result = create_venv(venv_dir, pypath, use_global=global_packages, verbose=verbose)
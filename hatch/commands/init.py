@@ -7,11 +7,12 @@ from hatch.commands.utils import (
     CONTEXT_SETTINGS, echo_failure, echo_success, echo_waiting, echo_warning
 )
 from hatch.config import get_venv_dir
+from hatch.context import ExecutionContext
 from hatch.create import create_package
-from hatch.env import install_packages
+from hatch.env import install_packages, install_project
 from hatch.settings import copy_default_settings, load_settings
 from hatch.utils import basepath
-from hatch.venv import create_venv, venv
+from hatch.venv import create_venv
 
 
 @click.command(context_settings=CONTEXT_SETTINGS,
@@ -93,7 +94,8 @@ def init(name, no_env, pyname, pypath, global_packages, env_name, basic, cli,
             'The default project structure will be used.'
         )
 
-    cwd = os.getcwd()
+    context = ExecutionContext()
+    cwd = context.cwd
     package_name = name or click.prompt('Project name', default=basepath(cwd))
 
     if interactive or not name:
@@ -133,10 +135,9 @@ def init(name, no_env, pyname, pypath, global_packages, env_name, basic, cli,
         create_venv(venv_dir, pypath=pypath, use_global=global_packages)
         echo_success('complete!')
 
-        with venv(venv_dir):
-            echo_waiting('Installing locally in the virtual env... ', nl=False)
-            install_packages(['-q', '-e', '.'])
-            echo_success('complete!')
+        echo_waiting('Installing locally in the virtual env... ', nl=False)
+        install_project(venv_dir, cwd, context=context.with_venv(venv_dir))
+        echo_success('complete!')
 
     for vname in venvs:
         venv_dir = os.path.join(get_venv_dir(), vname)
@@ -145,7 +146,6 @@ def init(name, no_env, pyname, pypath, global_packages, env_name, basic, cli,
             create_venv(venv_dir, pypath=pypath, use_global=global_packages)
             echo_success('complete!')
 
-        with venv(venv_dir):
-            echo_waiting('Installing locally in virtual env `{}`... '.format(vname), nl=False)
-            install_packages(['-q', '-e', '.'])
-            echo_success('complete!')
+        echo_waiting('Installing locally in virtual env `{}`... '.format(vname), nl=False)
+        install_packages(['-q', '-e', '.'], context.with_venv(venv_dir))
+        echo_success('complete!')
@@ -1,5 +1,4 @@
 import os
-import subprocess
 import sys
 
 import click
@@ -7,12 +6,11 @@ import click
 from hatch.commands.utils import (
     CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting
 )
-from hatch.config import get_proper_pip, get_venv_dir
-from hatch.env import install_packages
-from hatch.utils import (
-    NEED_SUBPROCESS_SHELL, ON_WINDOWS, get_admin_command, is_project, venv_active
-)
-from hatch.venv import create_venv, is_venv, venv
+from hatch.config import get_venv_dir
+from hatch.context import ExecutionContext
+from hatch.env import install_project
+from hatch.utils import ON_WINDOWS, get_admin_command, is_project
+from hatch.venv import create_venv, is_venv
 
 
 @click.command(context_settings=CONTEXT_SETTINGS, short_help='Installs packages')
@@ -61,6 +59,7 @@ def install(packages, no_detect, env_name, editable, global_install, admin, quie
     # command so we catch this case and turn our command into
     # a string later.
     windows_admin_command = None
+    context = ExecutionContext()
 
     if editable:
         packages = ['-e', *packages]
@@ -71,31 +70,30 @@ def install(packages, no_detect, env_name, editable, global_install, admin, quie
             echo_failure('Virtual env named `{}` does not exist.'.format(env_name))
             sys.exit(1)
 
-        with venv(venv_dir):
-            command = [get_proper_pip(), 'install', *packages] + (['-q'] if quiet else [])
-            echo_waiting('Installing in virtual env `{}`...'.format(env_name))
-            result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
-    elif not venv_active() and not no_detect and is_project():
-        venv_dir = os.path.join(os.getcwd(), 'venv')
+        venv_context = context.with_venv(venv_dir)
+        command = [venv_context.pip, 'install', *packages] + (['-q'] if quiet else [])
+        echo_waiting('Installing in virtual env `{}`...'.format(env_name))
+        result = venv_context.run(command)
+    elif not context.venv_active and not no_detect and is_project(context.cwd):
+        venv_dir = os.path.join(context.cwd, 'venv')
         if not is_venv(venv_dir):
             echo_info('A project has been detected!')
             echo_waiting('Creating a dedicated virtual env... ', nl=False)
             create_venv(venv_dir)
             echo_success('complete!')
 
-            with venv(venv_dir):
-                echo_waiting('Installing this project in the virtual env... ', nl=False)
-                install_packages(['-q', '-e', '.'])
-                echo_success('complete!')
+            echo_waiting('Installing this project in the virtual env... ', nl=False)
+            install_project(venv_dir, context.cwd, context=context.with_venv(venv_dir))
+            echo_success('complete!')
 
-        with venv(venv_dir):
-            command = [get_proper_pip(), 'install', *packages] + (['-q'] if quiet else [])
-            echo_waiting('Installing for this project...')
-            result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+        venv_context = context.with_venv(venv_dir)
+        command = [venv_context.pip, 'install', *packages] + (['-q'] if quiet else [])
+        echo_waiting('Installing for this project...')
+        result = venv_context.run(command)
     else:
-        command = [get_proper_pip(), 'install'] + (['-q'] if quiet else [])
+        command = [context.pip, 'install'] + (['-q'] if quiet else [])
 
-        if not venv_active():  # no cov
+        if not context.venv_active:  # no cov
             if global_install:
                 if not admin:
                     if ON_WINDOWS:
@@ -111,6 +109,6 @@ def install(packages, no_detect, env_name, editable, global_install, admin, quie
             command = windows_admin_command + [' '.join(command)]
 
         echo_waiting('Installing...')
-        result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+        result = context.run(command)
 
     sys.exit(result.returncode)
@@ -7,11 +7,11 @@ from hatch.commands.utils import (
     CONTEXT_SETTINGS, echo_failure, echo_success, echo_waiting, echo_warning
 )
 from hatch.config import get_venv_dir
+from hatch.context import ExecutionContext
 from hatch.create import create_package
-from hatch.env import install_packages
+from hatch.env import install_packages, install_project
 from hatch.settings import copy_default_settings, load_settings
-from hatch.utils import chdir
-from hatch.venv import create_venv, venv
+from hatch.venv import create_venv
 
 
 @click.command(context_settings=CONTEXT_SETTINGS,
@@ -130,29 +130,27 @@ def new(name, no_env, pyname, pypath, global_packages, env_name, basic, cli,
             sys.exit(1)
 
     os.makedirs(d)
-    with chdir(d, cwd=origin):
-        create_package(d, package_name, settings)
-        echo_success('Created project `{}`'.format(package_name))
-
-        if not no_env:
-            venv_dir = os.path.join(d, 'venv')
-            echo_waiting('Creating its own virtual env... ', nl=False)
+    context = ExecutionContext(cwd=d)
+    create_package(d, package_name, settings)
+    echo_success('Created project `{}`'.format(package_name))
+
+    if not no_env:
+        venv_dir = os.path.join(d, 'venv')
+        echo_waiting('Creating its own virtual env... ', nl=False)
+        create_venv(venv_dir, pypath=pypath, use_global=global_packages)
+        echo_success('complete!')
+
+        echo_waiting('Installing locally in the virtual env... ', nl=False)
+        install_project(venv_dir, d, context=context.with_venv(venv_dir))
+        echo_success('complete!')
+
+    for vname in venvs:
+        venv_dir = os.path.join(get_venv_dir(), vname)
+        if not os.path.exists(venv_dir):
+            echo_waiting('Creating virtual env `{}`... '.format(vname), nl=False)
             create_venv(venv_dir, pypath=pypath, use_global=global_packages)
             echo_success('complete!')
 
-            with venv(venv_dir):
-                echo_waiting('Installing locally in the virtual env... ', nl=False)
-                install_packages(['-q', '-e', '.'])
-                echo_success('complete!')
-
-        for vname in venvs:
-            venv_dir = os.path.join(get_venv_dir(), vname)
-            if not os.path.exists(venv_dir):
-                echo_waiting('Creating virtual env `{}`... '.format(vname), nl=False)
-                create_venv(venv_dir, pypath=pypath, use_global=global_packages)
-                echo_success('complete!')
-
-            with venv(venv_dir):
-                echo_waiting('Installing locally in virtual env `{}`... '.format(vname), nl=False)
-                install_packages(['-q', '-e', '.'])
-                echo_success('complete!')
+        echo_waiting('Installing locally in virtual env `{}`... '.format(vname), nl=False)
+        install_packages(['-q', '-e', '.'], context.with_venv(venv_dir))
+        echo_success('complete!')
@@ -6,6 +6,7 @@ import sys
 import click
 import userpath
 
+from hatch import process
 from hatch.commands.utils import (
     CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting,
     echo_warning
@@ -49,7 +50,7 @@ def python(version, name, head):  # no cov
 
     echo_waiting('Installing Python {}...'.format(version))
     try:
-        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        process.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     except subprocess.CalledProcessError as e:
         echo_failure('The installation was seemingly unsuccessful.')
         click.echo(e.stdout)
@@ -1,16 +1,26 @@
 import os
-import subprocess
 import sys
+import time
 
 import click
-from twine.utils import DEFAULT_REPOSITORY, TEST_REPOSITORY
+from twine.exceptions import InvalidConfiguration
+from twine.utils import (
+    DEFAULT_CONFIG_FILE, DEFAULT_REPOSITORY, TEST_REPOSITORY,
+    get_repository_from_config
+)
 
 from hatch.commands.utils import (
-    CONTEXT_SETTINGS, echo_failure, echo_info, echo_waiting
+    CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting,
+    echo_warning
 )
 from hatch.env import get_editable_package_location
 from hatch.settings import SETTINGS_FILE, load_settings
-from hatch.utils import NEED_SUBPROCESS_SHELL, resolve_path
+from hatch.upload import (
+    DEFAULT_UPLOAD_JOBS, get_distributions, get_indexed_files,
+    get_keyring_password, get_project_names, get_recorded_uploads,
+    get_simple_index_url, record_uploads, upload_files
+)
+from hatch.utils import format_size, resolve_path
 
 
 @click.command(context_settings=CONTEXT_SETTINGS, short_help='Uploads to PyPI')
@@ -39,8 +49,23 @@ from hatch.utils import NEED_SUBPROCESS_SHELL, resolve_path
               help='Uses the test version of PyPI. Equivalent to \'-r {}\''.format(TEST_REPOSITORY))
 @click.option('-s', '--strict', is_flag=True,
               help='Aborts if a distribution already exists.')
-def release(package, local, path, username, repo, repo_url, test_pypi, strict):
-    """Uploads all files in a directory to PyPI using Twine.
+@click.option('-j', '--jobs', type=click.IntRange(1), default=DEFAULT_UPLOAD_JOBS,
+              help='The maximum number of files to upload at once (default: {}).'.format(
+                  DEFAULT_UPLOAD_JOBS
+              ))
+@click.option('-ci', '--check-index', is_flag=True,
+              help=(
+                  'Queries the repository\'s simple index once before uploading '
+                  'and only sends files it doesn\'t have.'
+              ))
+@click.option('-iu', '--index-url',
+              help=(
+                  'The URL of the repository\'s simple index, if it can\'t be '
+                  'derived from the upload URL. Implies --check-index.'
+              ))
+def release(package, local, path, username, repo, repo_url, test_pypi, strict, jobs,
+            check_index, index_url):
+    """Uploads all distributions in a directory to PyPI.
 
     The path to the build directory is derived in the following order:
 
@@ -57,8 +82,17 @@ def release(package, local, path, username, repo, repo_url, test_pypi, strict):
 
     The PyPI username can be saved in the config file entry `pypi_username`
     or the `TWINE_USERNAME` environment variable.
-    If the `TWINE_PASSWORD` environment variable is not set, a hidden prompt
-    will be provided for the password.
+    If the `TWINE_PASSWORD` environment variable is not set, the password
+    is looked up in `.pypirc` and then the system keyring like twine does,
+    before a hidden prompt is provided.
+
+    Wheels and source distributions are uploaded concurrently, reusing
+    connections between files. Uploads failing because of connection
+    errors or temporary server errors are retried a few times.
+
+    Successful uploads are recorded in a ledger per repository, so files
+    with the same name and contents are never sent there again, e.g. when
+    re-running a partially failed release.
     """
     if package:
         echo_waiting('Locating package...')
@@ -111,9 +145,6 @@ def release(package, local, path, username, repo, repo_url, test_pypi, strict):
             )
             sys.exit(1)
 
-    command = [sys.executable, '-m', 'twine', 'upload', '-u', username,
-               '{}{}*'.format(path, os.path.sep)]
-
     if test_pypi:
         # Print all error messages before exiting
         any_failed = False
@@ -128,17 +159,67 @@ def release(package, local, path, username, repo, repo_url, test_pypi, strict):
             any_failed = True
         if any_failed:
             sys.exit(1)
-        command.extend(['-r', TEST_REPOSITORY, '--repository-url', TEST_REPOSITORY])
+        repo = repo_url = TEST_REPOSITORY
     else:  # no cov
-        # Only pass these to twine if they are given to us. Otherwise,
-        # fall back onto the default twine behavior
-        if repo:
-            command.extend(['-r', repo])
-        if repo_url:
-            command.extend(['--repository-url', repo_url])
+        # Fall back onto the default twine behavior
+        repo = repo or os.environ.get('TWINE_REPOSITORY') or 'pypi'
+        repo_url = repo_url or os.environ.get('TWINE_REPOSITORY_URL')
+
+    try:
+        repository = get_repository_from_config(DEFAULT_CONFIG_FILE, repo, repo_url)
+    except InvalidConfiguration as e:
+        echo_failure(str(e))
+        sys.exit(1)
+
+    distributions = get_distributions(path)
+    if not distributions:
+        echo_failure('No distributions found in `{}`.'.format(path))
+        sys.exit(1)
+
+    password = (
+        os.environ.get('TWINE_PASSWORD') or repository.get('password') or
+        get_keyring_password(repository['repository'], username) or
+        click.prompt('Password', hide_input=True)
+    )
+
+    url = repository['repository']
+    existing = get_recorded_uploads(url)
+
+    if check_index or index_url:
+        index_url = index_url or get_simple_index_url(url)
+        echo_waiting('Checking {} for existing files...'.format(index_url))
+        indexed = get_indexed_files(index_url, get_project_names(distributions), username, password)
+        if indexed is None:
+            echo_warning('Unable to query the index, uploading all files.')
+        else:
+            # Existing files can't be replaced, whatever their contents.
+            for name, sha256 in indexed.items():
+                if sha256 or name not in existing:
+                    existing[name] = sha256
+
+    def report(result):
+        if result.status == 'uploaded':
+            echo_success('{} -> {} in {:.2f} seconds ({}/s)'.format(
+                result.name, format_size(result.size), result.elapsed,
+                format_size(int(result.throughput))
+            ))
+        elif result.status == 'skipped':
+            echo_info('{} -> {}, skipped'.format(result.name, result.message))
+        else:
+            echo_failure('{} -> failed: {}'.format(result.name, result.message))
+
+    echo_waiting('Uploading {} files to {}...'.format(len(distributions), url))
+    start = time.time()
+    results = upload_files(
+        distributions, url, username, password,
+        skip_existing=not strict, jobs=jobs, callback=report, existing=existing
+    )
+    elapsed = time.time() - start
+    record_uploads(url, results)
 
-    if not strict:
-        command.append('--skip-existing')
+    total_size = sum(result.size for result in results if result.status == 'uploaded')
+    echo_info('Uploaded {} in {:.2f} seconds ({}/s).'.format(
+        format_size(total_size), elapsed, format_size(int(total_size / elapsed) if elapsed else 0)
+    ))
 
-    result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
-    sys.exit(result.returncode)
+    sys.exit(1 if any(result.status == 'failed' for result in results) else 0)
@@ -8,7 +8,7 @@ from hatch.commands.utils import (
 )
 from hatch.config import get_venv_dir
 from hatch.settings import load_settings, save_settings
-from hatch.utils import remove_path
+from hatch.trash import remove_paths
 
 
 @click.command(context_settings=CONTEXT_SETTINGS,
@@ -17,8 +17,13 @@ from hatch.utils import remove_path
               help='Forward-slash-separated list of named Python paths.')
 @click.option('-e', '--env', 'env_name',
               help='Forward-slash-separated list of named virtual envs.')
+@click.option('-w', '--wait', is_flag=True,
+              help=(
+                  'Waits until removed virtual envs are fully deleted rather '
+                  'than finishing that in the background.'
+              ))
 @click.pass_context
-def shed(ctx, pyname, env_name):
+def shed(ctx, pyname, env_name, wait):
     """Removes named Python paths or virtual environments.
 
     \b
@@ -67,10 +72,14 @@ def shed(ctx, pyname, env_name):
                 echo_warning('Python path named `{}` already does not exist.'.format(pyname))
 
     if env_name:
+        venvs = []
         for env_name in env_name.split('/'):
             venv_dir = os.path.join(get_venv_dir(), env_name)
             if os.path.exists(venv_dir):
-                remove_path(venv_dir)
-                echo_success('Successfully removed virtual env named `{}`.'.format(env_name))
+                venvs.append((env_name, venv_dir))
             else:
                 echo_warning('Virtual env named `{}` already does not exist.'.format(env_name))
+
+        remove_paths([venv_dir for _, venv_dir in venvs], wait=wait)
+        for env_name, _ in venvs:
+            echo_success('Successfully removed virtual env named `{}`.'.format(env_name))
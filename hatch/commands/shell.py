@@ -1,5 +1,4 @@
 import os
-import subprocess
 import sys
 from tempfile import TemporaryDirectory
 
@@ -9,13 +8,12 @@ from hatch.commands.utils import (
     UNKNOWN_OPTIONS, echo_failure, echo_info, echo_success, echo_waiting
 )
 from hatch.config import get_venv_dir
-from hatch.env import install_packages
+from hatch.context import ExecutionContext, locate_exe_dir
+from hatch.env import install_project
 from hatch.settings import load_settings
 from hatch.shells import run_shell
-from hatch.utils import (
-    NEED_SUBPROCESS_SHELL, get_random_venv_name, is_project, resolve_path
-)
-from hatch.venv import create_venv, is_venv, venv
+from hatch.utils import get_random_venv_name, is_project, resolve_path
+from hatch.venv import create_venv, is_venv
 
 
 @click.command(context_settings=UNKNOWN_OPTIONS,
@@ -121,23 +119,23 @@ def shell(env_name, command, shell_name, temp_env, pyname, pypath, global_packag
     $ which python
     /tmp/tmpzg73untp/Ihqd/bin/python
     """
+    context = ExecutionContext()
     venv_dir = None
-    if resolve_path(env_name) == os.getcwd():
+    if resolve_path(env_name) == context.cwd:
         env_name = ''
 
     if not (env_name or temp_env):
-        if is_project():
-            venv_dir = os.path.join(os.getcwd(), 'venv')
+        if is_project(context.cwd):
+            venv_dir = os.path.join(context.cwd, 'venv')
             if not is_venv(venv_dir):
                 echo_info('A project has been detected!')
                 echo_waiting('Creating a dedicated virtual env... ', nl=False)
                 create_venv(venv_dir, use_global=global_packages)
                 echo_success('complete!')
 
-                with venv(venv_dir):
-                    echo_waiting('Installing this project in the virtual env... ', nl=False)
-                    install_packages(['-q', '-e', '.'])
-                    echo_success('complete!')
+                echo_waiting('Installing this project in the virtual env... ', nl=False)
+                install_project(venv_dir, context.cwd, context=context.with_venv(venv_dir))
+                echo_success('complete!')
         else:
             echo_failure('No project found.')
             sys.exit(1)
@@ -146,7 +144,7 @@ def shell(env_name, command, shell_name, temp_env, pyname, pypath, global_packag
         echo_failure('Cannot use more than one virtual env at a time!')
         sys.exit(1)
 
-    if not command and '_HATCHING_' in os.environ:
+    if not command and '_HATCHING_' in context.env:
         echo_failure(
             'Virtual environments cannot be nested, sorry! To leave '
             'the current one type `exit` or press `Ctrl+D`.'
@@ -181,16 +179,15 @@ def shell(env_name, command, shell_name, temp_env, pyname, pypath, global_packag
     result = None
 
     try:
+        venv_context = context.with_venv(venv_dir)
         if command:
-            with venv(venv_dir):
-                echo_waiting('Running `{}` in {}...'.format(
-                    ' '.join(c if len(c.split()) == 1 else '"{}"'.format(c) for c in command),
-                    '`{}`'.format(env_name) if env_name else "this project's env"
-                ))
-                result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL).returncode
+            echo_waiting('Running `{}` in {}...'.format(
+                ' '.join(c if len(c.split()) == 1 else '"{}"'.format(c) for c in command),
+                '`{}`'.format(env_name) if env_name else "this project's env"
+            ))
+            result = venv_context.run(command).returncode
         else:
-            with venv(venv_dir) as exe_dir:
-                result = run_shell(exe_dir, shell_name)
+            result = run_shell(locate_exe_dir(venv_dir), shell_name, venv_context.env)
     finally:
         result = 1 if result is None else result
         if temp_dir is not None:
@@ -0,0 +1,156 @@
+import os
+import sys
+
+import click
+
+from hatch.commands.utils import (
+    CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting,
+    echo_warning
+)
+from hatch.config import get_venv_dir
+from hatch.context import ExecutionContext
+from hatch.env import (
+    get_installed_distributions, get_python_info, install_project, load_env_sync
+)
+from hatch.exceptions import RequirementsError
+from hatch.sync import (
+    get_missing_requirements, get_unrequired_distributions, parse_requirements
+)
+from hatch.utils import get_requirements_file, is_project
+from hatch.venv import create_venv, is_venv
+
+
+def run_pip(context, args, dry_run=False):
+    if dry_run:
+        click.echo(' '.join(args))
+        return 0
+
+    return context.run([context.pip] + args).returncode
+
+
+def sync_requirements(context, reqs, keep, dry_run, quiet):
+    """Brings the env active in `context` in line with a requirements file,
+    returning the exit code.
+    """
+    try:
+        parsed = parse_requirements(reqs)
+    except RequirementsError as e:
+        echo_failure(str(e))
+        return 1
+
+    info = get_python_info(context=context)
+    markers = info['markers']
+    verbosity = ['-q'] if quiet else []
+
+    missing = get_missing_requirements(parsed, get_installed_distributions(context=context), markers)
+    if missing:
+        echo_waiting('Installing {} missing or outdated requirements...'.format(
+            len(missing) - missing.count('-e')
+        ))
+        constraints = []
+        for constraint_file in parsed['constraint_files']:
+            constraints.extend(['-c', constraint_file])
+
+        return_code = run_pip(
+            context, ['install'] + verbosity + parsed['options'] + constraints + missing, dry_run
+        )
+        if return_code != 0:
+            return return_code
+
+    unrequired = []
+    if not keep:
+        if parsed['unnamed']:
+            echo_warning(
+                'Unable to tell what unnamed requirements depend on, so nothing '
+                'will be uninstalled.'
+            )
+        else:
+            # What hatch installed for itself, like `hatch test` does.
+            protected = load_env_sync(info['prefix']).get('packages', [])
+            unrequired = get_unrequired_distributions(
+                parsed, get_installed_distributions(context=context), markers, info['prefix'],
+                protected
+            )
+
+    if unrequired:
+        echo_waiting('Uninstalling {} unrequired packages...'.format(len(unrequired)))
+        return_code = run_pip(context, ['uninstall', '-y'] + verbosity + unrequired, dry_run)
+        if return_code != 0:
+            return return_code
+
+    if not (missing or unrequired):
+        echo_success('Already in sync with `{}`.'.format(os.path.basename(reqs)))
+
+    return 0
+
+
+@click.command(context_settings=CONTEXT_SETTINGS,
+               short_help='Syncs a virtual env with a requirements file')
+@click.option('-r', '--requirements', 'reqs',
+              help='The requirements file to use, rather than locating one.')
+@click.option('-nd', '--no-detect', is_flag=True,
+              help=(
+                  "Disables the use of a project's dedicated virtual env. "
+                  'This is useful if you need to be in a project root but '
+                  'wish to not target its virtual env.'
+              ))
+@click.option('-e', '--env', 'env_name', help='The named virtual env to use.')
+@click.option('-d', '--dev', is_flag=True,
+              help='When locating a requirements file, only use the dev version.')
+@click.option('-k', '--keep', is_flag=True,
+              help='Does not uninstall packages that nothing requires.')
+@click.option('-n', '--dry-run', is_flag=True,
+              help='Shows the pip commands that would run without running them.')
+@click.option('-q', '--quiet', is_flag=True, help='Decreases verbosity.')
+def sync(reqs, no_detect, env_name, dev, keep, dry_run, quiet):
+    """Makes a virtual env match a requirements file, by default one named
+    `requirements.txt` or a dev version of that in the current directory.
+
+    The file is read like pip does, including other files with `-r` and
+    `-c` as well as editable `-e` installs, and compared to what is already
+    installed in the env without running pip. Then pip is only called once
+    to install everything that is missing or doesn't satisfy the file, and
+    once to uninstall everything that neither the file nor an editable
+    install depends on. The packages `pip`, `setuptools`, `wheel` and
+    `hatch` are never uninstalled, nor are those that other commands like
+    `hatch test` installed in a project's env.
+
+    If the option --env is supplied, that named virtual env is synced.
+    Otherwise, this will attempt to detect a project and use its virtual
+    env, unless a virtual env is active. Only virtual envs can be synced.
+    """
+    context = ExecutionContext()
+    reqs = reqs or get_requirements_file(context.cwd, dev=dev)
+    if not reqs:
+        echo_failure('Unable to locate a requirements file.')
+        sys.exit(1)
+
+    if env_name:
+        venv_dir = os.path.join(get_venv_dir(), env_name)
+        if not os.path.exists(venv_dir):
+            echo_failure('Virtual env named `{}` does not exist.'.format(env_name))
+            sys.exit(1)
+
+        echo_waiting('Syncing virtual env `{}`...'.format(env_name))
+        return_code = sync_requirements(context.with_venv(venv_dir), reqs, keep, dry_run, quiet)
+    elif not context.venv_active and not no_detect and is_project(context.cwd):
+        venv_dir = os.path.join(context.cwd, 'venv')
+        if not is_venv(venv_dir):
+            echo_info('A project has been detected!')
+            echo_waiting('Creating a dedicated virtual env... ', nl=False)
+            create_venv(venv_dir)
+            echo_success('complete!')
+
+            echo_waiting('Installing this project in the virtual env... ', nl=False)
+            install_project(venv_dir, context.cwd, context=context.with_venv(venv_dir))
+            echo_success('complete!')
+
+        echo_waiting('Syncing this project...')
+        return_code = sync_requirements(context.with_venv(venv_dir), reqs, keep, dry_run, quiet)
+    elif context.venv_active:
+        return_code = sync_requirements(context, reqs, keep, dry_run, quiet)
+    else:
+        echo_failure('Only virtual envs can be synced, none was found.')
+        return_code = 1
+
+    sys.exit(return_code)
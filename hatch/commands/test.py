@@ -2,19 +2,250 @@ import io
 import os
 import subprocess
 import sys
+import time
+from tempfile import mkdtemp
 
 import click
 
 from hatch.commands.utils import (
-    CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting
+    CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting,
+    echo_warning
 )
-from hatch.config import get_proper_python
-from hatch.env import get_editable_package_location, install_packages
-from hatch.utils import (
-    NEED_SUBPROCESS_SHELL, chdir, get_requirements_file, is_project,
-    resolve_path, venv_active
+from hatch.context import ExecutionContext
+from hatch.env import (
+    get_editable_package_location, get_env_sync_steps, install_packages,
+    save_env_sync
 )
-from hatch.venv import create_venv, is_venv, venv
+from hatch.testing import (
+    PYTEST_PLUGIN_NAME, TEST_ORDERS, OutputRelay, combine_exit_codes,
+    get_slowest_tests, install_pytest_plugin, install_test_order,
+    load_test_history, merge_junit_files, read_coverage_contexts,
+    read_test_results, run_shards, save_test_history, select_affected_tests,
+    shard_tests, split_junit_args, update_test_history
+)
+from hatch.utils import get_requirements_file, is_project, remove_path, resolve_path
+from hatch.venv import create_venv, is_venv
+from hatch.watch import get_watcher
+
+SYNC_MESSAGES = {
+    'project': 'Installing this project in the virtual env...',
+    'packages': 'Ensuring pytest and coverage are available...',
+    'requirements': 'Installing test dependencies in the virtual env...',
+}
+
+
+def parse_jobs(ctx, param, value):
+    if value is None:
+        return
+    elif value == 'auto':
+        return os.cpu_count() or 1
+
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+
+    if jobs < 1:
+        raise click.BadParameter('must be a positive integer or `auto`.')
+
+    return jobs
+
+
+def run_command(command, context, relay=None):
+    """Runs `command` in `context` with its output relayed, if there's a
+    relay, rather than written straight to this process' stdout and stderr.
+    """
+    if relay is not None:
+        return relay.run(command, context)
+
+    return context.run(command).returncode
+
+
+def echo_output(text, relay=None):
+    if relay is not None:
+        relay.write(text + '\n')
+    else:
+        click.echo(text)
+
+
+def run_sharded_tests(python_cmd, test_args, cov, cov_args, jobs, history, temp_dir, context,
+                      relay=None):
+    """Runs the tests split across `jobs` processes in `context`, returning
+    the combined exit code and the results of every test.
+    """
+    test_args, junit_file = split_junit_args(test_args.split())
+    pytest_cmd = ['pytest', '-p', PYTEST_PLUGIN_NAME] + test_args
+
+    echo_waiting('Collecting tests...')
+    collect_file = os.path.join(temp_dir, 'collected.txt')
+    result = context.with_env({'HATCH_TEST_COLLECT': collect_file}).run(
+        python_cmd + pytest_cmd + ['--collect-only', '-q'],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+    )
+    try:
+        with open(collect_file, 'r') as f:
+            node_ids = f.read().splitlines()
+    except OSError:
+        node_ids = []
+
+    if result.returncode != 0 or not node_ids:
+        echo_output(result.stdout.decode('utf-8', 'replace'), relay)
+        return result.returncode, {}
+
+    shards = shard_tests(node_ids, history, jobs)
+
+    commands = []
+    contexts = []
+    results_files = []
+    junit_files = []
+    for i, shard in enumerate(shards, 1):
+        shard_file = os.path.join(temp_dir, 'shard-{}.txt'.format(i))
+        with open(shard_file, 'w') as f:
+            f.write(''.join(nodeid + '\n' for nodeid in shard))
+
+        command = python_cmd.copy()
+        if cov:
+            shard_cov_args = cov_args.split() if cov_args is not None else []
+            # Shards must not overwrite each other's data.
+            if '--parallel-mode' not in shard_cov_args and '-p' not in shard_cov_args:
+                shard_cov_args.append('--parallel-mode')
+            command.extend(['coverage', 'run'] + shard_cov_args + ['-m'])
+        command.extend(pytest_cmd)
+
+        if junit_file:
+            junit_files.append(os.path.join(temp_dir, 'junit-{}.xml'.format(i)))
+            command.append('--junitxml={}'.format(junit_files[-1]))
+
+        results_files.append(os.path.join(temp_dir, 'results-{}.jsonl'.format(i)))
+        commands.append(command)
+        contexts.append(context.with_env({
+            'HATCH_TEST_SELECT': shard_file, 'HATCH_TEST_RESULTS': results_files[-1]
+        }))
+
+    echo_waiting('Running {} tests in {} shards...'.format(len(node_ids), len(shards)))
+    start = time.time()
+    shard_results = run_shards(
+        commands, contexts, lambda i, line: echo_output('[{}] {}'.format(i, line), relay)
+    )
+    elapsed = time.time() - start
+
+    results = {}
+    for results_file in results_files:
+        results.update(read_test_results(results_file))
+
+    if junit_file:
+        merge_junit_files(junit_files, junit_file, elapsed)
+
+    click.echo()
+    for i, ((return_code, duration), shard) in enumerate(zip(shard_results, shards), 1):
+        echo = echo_success if return_code in (0, 5) else echo_failure
+        echo('Shard {}: {} tests in {:.2f} seconds'.format(i, len(shard), duration))
+
+    outcomes = [result['outcome'] for result in results.values()]
+    summary = ', '.join(
+        '{} {}'.format(outcomes.count(outcome), outcome)
+        for outcome in ('passed', 'failed', 'error', 'skipped') if outcome in outcomes
+    )
+    return_code = combine_exit_codes([return_code for return_code, _ in shard_results])
+    echo = echo_success if return_code == 0 else echo_failure
+    echo('{} in {:.2f} seconds'.format(summary or 'no tests ran', elapsed))
+
+    return return_code, results
+
+
+def watch_tests(path, command, history, temp_dir, context, order, slowest, polling,
+                relay=None):
+    """Runs the tests in `context`, then again whenever watched files
+    change, but only the tests that executed a changed file according to
+    their coverage. Returns the last exit code once interrupted.
+    """
+    coverage_file = os.path.join(temp_dir, 'watch.coverage')
+    results_file = os.path.join(temp_dir, 'results.jsonl')
+    select_file = os.path.join(temp_dir, 'selected.txt')
+    env = dict(
+        context.env, COVERAGE_FILE=coverage_file, HATCH_TEST_CONTEXTS='1',
+        HATCH_TEST_RESULTS=results_file
+    )
+
+    coverage_map = {}
+    selected = None
+    return_code = 5
+    watcher = get_watcher(path, polling)
+
+    try:
+        while True:
+            if order:
+                env.update(install_test_order(temp_dir, history, order))
+
+            if selected is None:
+                env.pop('HATCH_TEST_SELECT', None)
+                echo_waiting('Testing...')
+            else:
+                with open(select_file, 'w') as f:
+                    f.write(''.join(nodeid + '\n' for nodeid in selected))
+                env['HATCH_TEST_SELECT'] = select_file
+                echo_waiting('Testing what the changes affect...')
+
+            remove_path(results_file)
+            return_code = run_command(command, ExecutionContext(env, context.cwd), relay)
+
+            results = read_test_results(results_file)
+            if results:
+                update_test_history(history, results)
+                save_test_history(path, history)
+
+                if slowest:
+                    echo_slowest_tests(history, results, slowest)
+
+            contexts = read_coverage_contexts(coverage_file)
+            if contexts is None:  # no cov
+                if coverage_map is not None:
+                    echo_warning('Unable to read coverage data, every change will run all tests.')
+                coverage_map = None
+            elif coverage_map is not None:
+                coverage_map.update(contexts)
+
+            click.echo()
+            echo_info('Watching for changes...')
+            selected = None
+            while True:
+                changed = watcher.wait()
+                if coverage_map is None:
+                    break
+
+                selected = select_affected_tests(coverage_map, changed, path)
+                if selected is None or selected:
+                    break
+    except KeyboardInterrupt:
+        click.echo()
+    finally:
+        watcher.close()
+
+    return return_code
+
+
+def format_trend(duration, previous_duration):
+    if previous_duration is None:
+        return 'new'
+
+    change = duration - previous_duration
+    if not previous_duration:
+        return '{:+.2f}s'.format(change)
+
+    return '{:+.2f}s, {:+.0%}'.format(change, change / previous_duration)
+
+
+def echo_slowest_tests(history, results, count):
+    slowest = get_slowest_tests(history, results, count)
+    if not slowest:
+        return
+
+    click.echo()
+    echo_info('Slowest {} tests:'.format(len(slowest)))
+    for nodeid, duration, previous_duration in slowest:
+        click.echo('{:.2f}s {} ({})'.format(
+            duration, nodeid, format_trend(duration, previous_duration)
+        ))
 
 
 @click.command(context_settings=CONTEXT_SETTINGS, short_help='Runs tests')
@@ -54,7 +285,32 @@ from hatch.venv import create_venv, is_venv, venv
               help=(
                   "Does not run the tests inside a project's dedicated virtual env."
               ))
-def test(package, local, path, cov, merge, test_args, cov_args, global_exe, no_detect):
+@click.option('-j', '--jobs', callback=parse_jobs,
+              help=(
+                  'Splits the tests across this many `pytest` processes, or one '
+                  'per CPU with `auto`.'
+              ))
+@click.option('-o', '--order', type=click.Choice(TEST_ORDERS),
+              help=(
+                  'Runs the tests that failed last time first, or the ones that '
+                  'took the longest first.'
+              ))
+@click.option('-sl', '--slowest', type=click.IntRange(min=1),
+              help=(
+                  'Shows this many of the slowest tests and how their durations '
+                  'changed since the previous run.'
+              ))
+@click.option('-w', '--watch', is_flag=True,
+              help=(
+                  'Runs the tests again whenever files change, but only the '
+                  'ones that executed a changed file.'
+              ))
+@click.option('-po', '--poll', is_flag=True,
+              help='With --watch, polls for changes rather than relying on inotify.')
+@click.option('-lf', '--log-file',
+              help='Also writes the output of `pytest` and `coverage` to this file.')
+def test(package, local, path, cov, merge, test_args, cov_args, global_exe, no_detect,
+         jobs, order, slowest, watch, poll, log_file):
     """Runs tests using `pytest`, optionally checking coverage.
 
     The path is derived in the following order:
@@ -69,7 +325,32 @@ def test(package, local, path, cov, merge, test_args, cov_args, global_exe, no_d
     If the path points to a package, it should have a `tests` directory.
 
     If a project is detected but there is no dedicated virtual env, it
-    will be created and any dev requirements will be installed in it.
+    will be created and any dev requirements will be installed in it. The
+    env records what it was synced with, so the project and its dev
+    requirements are only installed again once `setup.py`, `setup.cfg`,
+    `pyproject.toml`, the dev requirements or the interpreter change.
+
+    With --jobs, the collected tests are split into shards expected to take
+    about as long as each other, based on how long each test took the last
+    time, and every shard runs in its own process. Their output is shown as
+    it arrives, prefixed by the shard's number. With --cov, the shards'
+    coverage data is combined once they all finish, and if `pytest` was
+    asked for a JUnit XML report with --test-args, the shards' reports are
+    merged into it. This doesn't require `pytest-xdist`.
+
+    The duration and outcome of every test, along with those of the run
+    before, are kept in `.hatch/tests.json` in the path. This is what
+    --jobs uses to balance shards, --order uses to run failing tests or
+    the longest ones first, and --slowest uses to show which tests have
+    slowed down.
+
+    With --watch, the tests run again whenever a Python file or the `pytest`
+    configuration changes, until interrupted. The first run records which
+    files every test executed using `coverage`, so later runs are limited
+    to the tests that executed a changed file, plus every test in changed
+    test files. A change that no test executed, like a new module, runs
+    everything. Changes are detected with inotify on Linux, and by polling
+    elsewhere or with --poll.
 
     \b
     $ git clone https://github.com/ofek/privy && cd privy
@@ -129,19 +410,9 @@ def test(package, local, path, cov, merge, test_args, cov_args, global_exe, no_d
     else:
         path = os.getcwd()
 
-    python_cmd = [sys.executable if global_exe else get_proper_python(), '-m']
-    command = python_cmd.copy()
-
-    if cov:
-        command.extend(['coverage', 'run'])
-        command.extend(
-            cov_args.split() if cov_args is not None
-            else (['--parallel-mode'] if merge else [])
-        )
-        command.append('-m')
-
-    command.append('pytest')
-    command.extend(test_args.split())
+    if watch and (cov or (jobs and jobs > 1)):
+        echo_failure('--watch cannot be used with --cov or --jobs.')
+        sys.exit(1)
 
     try:  # no cov
         sys.stdout.fileno()
@@ -150,90 +421,97 @@ def test(package, local, path, cov, merge, test_args, cov_args, global_exe, no_d
         testing = True
 
     # For testing we need to pipe because Click changes stdio streams.
-    stdout = sys.stdout if not testing else subprocess.PIPE
-    stderr = sys.stderr if not testing else subprocess.PIPE
-
-    venv_dir = None
-    if not (package or local) and not venv_active() and not no_detect and is_project():
-        venv_dir = os.path.join(path, 'venv')
-        if not is_venv(venv_dir):
-            echo_info('A project has been detected!')
-            echo_waiting('Creating a dedicated virtual env... ', nl=False)
-            create_venv(venv_dir)
-            echo_success('complete!')
-
-            with venv(venv_dir):
-                echo_waiting('Installing this project in the virtual env...')
-                install_packages(['-e', '.'])
-                click.echo()
+    relay = OutputRelay(log_file) if testing or log_file else None
 
-                echo_waiting('Ensuring pytest and coverage are available...')
-                install_packages(['pytest', 'coverage'])
+    try:
+        context = ExecutionContext(cwd=path)
+        if not (package or local) and not context.venv_active and not no_detect and is_project():
+            venv_dir = os.path.join(path, 'venv')
+            if not is_venv(venv_dir):
+                echo_info('A project has been detected!')
+                echo_waiting('Creating a dedicated virtual env... ', nl=False)
+                create_venv(venv_dir)
+                echo_success('complete!')
+
+            context = context.with_venv(venv_dir)
+
+            # Only what changed since the env was last synced is installed.
+            steps, marker = get_env_sync_steps(
+                venv_dir, path, ['pytest', 'coverage'], get_requirements_file(path, dev=True),
+                context=context
+            )
+            failed = False
+            for step, args in steps:
+                echo_waiting(SYNC_MESSAGES[step])
+                failed = install_packages(args, context) != 0 or failed
                 click.echo()
 
-                dev_requirements = get_requirements_file(path, dev=True)
-                if dev_requirements:
-                    echo_waiting('Installing test dependencies in the virtual env...')
-                    install_packages(['-r', dev_requirements])
-                    click.echo()
-
-    with chdir(path):
-        echo_waiting('Testing...')
-        output = b''
-
-        if venv_dir:
-            with venv(venv_dir):
-                test_result = subprocess.run(
-                    command,
-                    stdout=stdout, stderr=stderr,
-                    shell=NEED_SUBPROCESS_SHELL
-                )
-        else:
-            test_result = subprocess.run(
-                command,
-                stdout=stdout, stderr=stderr,
-                shell=NEED_SUBPROCESS_SHELL
+            if steps and not failed:
+                save_env_sync(venv_dir, marker)
+
+        python_cmd = [sys.executable if global_exe else context.python, '-m']
+        command = python_cmd.copy()
+
+        if cov or watch:
+            command.extend(['coverage', 'run'])
+            command.extend(
+                cov_args.split() if cov_args is not None
+                else (['--parallel-mode'] if cov and merge else [])
             )
-        output += test_result.stdout or b''
-        output += test_result.stderr or b''
+            command.append('-m')
+
+        command.extend(['pytest', '-p', PYTEST_PLUGIN_NAME])
+        command.extend(test_args.split())
+
+        history = load_test_history(path)
+        temp_dir = mkdtemp()
+        plugin_env = install_pytest_plugin(temp_dir)
+        if order:
+            plugin_env.update(install_test_order(temp_dir, history, order))
+
+        try:
+            if watch:
+                return_code = watch_tests(
+                    path, command, history, temp_dir, context.with_env(plugin_env), order,
+                    slowest, poll, relay
+                )
+                results = None
+            elif jobs and jobs > 1:
+                return_code, results = run_sharded_tests(
+                    python_cmd, test_args, cov, cov_args, jobs,
+                    history, temp_dir, context.with_env(plugin_env), relay
+                )
+            else:
+                echo_waiting('Testing...')
+
+                results_file = os.path.join(temp_dir, 'results.jsonl')
+                plugin_env['HATCH_TEST_RESULTS'] = results_file
+                return_code = run_command(command, context.with_env(plugin_env), relay)
+
+                results = read_test_results(results_file)
+        finally:
+            remove_path(temp_dir)
+
+        if results:
+            update_test_history(history, results)
+            save_test_history(path, history)
+
+            if slowest:
+                echo_slowest_tests(history, results, slowest)
 
         if cov:
             echo_waiting('\nTests completed, checking coverage...\n')
 
-            if merge:
-                if venv_dir:
-                    with venv(venv_dir):
-                        result = subprocess.run(
-                            python_cmd + ['coverage', 'combine', '--append'],
-                            stdout=stdout, stderr=stderr,
-                            shell=NEED_SUBPROCESS_SHELL
-                        )
-                else:
-                    result = subprocess.run(
-                        python_cmd + ['coverage', 'combine', '--append'],
-                        stdout=stdout, stderr=stderr,
-                        shell=NEED_SUBPROCESS_SHELL
-                    )
-                output += result.stdout or b''
-                output += result.stderr or b''
-
-            if venv_dir:
-                with venv(venv_dir):
-                    result = subprocess.run(
-                        python_cmd + ['coverage', 'report', '--show-missing'],
-                        stdout=stdout, stderr=stderr,
-                        shell=NEED_SUBPROCESS_SHELL
-                    )
-            else:
-                result = subprocess.run(
-                    python_cmd + ['coverage', 'report', '--show-missing'],
-                    stdout=stdout, stderr=stderr,
-                    shell=NEED_SUBPROCESS_SHELL
-                )
-            output += result.stdout or b''
-            output += result.stderr or b''
+            # Shards always write their data separately.
+            if merge or (jobs and jobs > 1):
+                combine_command = python_cmd + ['coverage', 'combine']
+                if merge:
+                    combine_command.append('--append')
+                run_command(combine_command, context, relay)
 
-    if testing:  # no cov
-        click.echo(output.decode())
+            run_command(python_cmd + ['coverage', 'report', '--show-missing'], context, relay)
+    finally:
+        if relay is not None:
+            relay.close()
 
-    sys.exit(test_result.returncode)
+    sys.exit(return_code)
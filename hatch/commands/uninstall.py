@@ -1,5 +1,4 @@
 import os
-import subprocess
 import sys
 
 import click
@@ -8,13 +7,13 @@ from hatch.commands.utils import (
     CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting,
     echo_warning
 )
-from hatch.config import get_proper_pip, get_venv_dir
-from hatch.env import install_packages
+from hatch.config import get_venv_dir
+from hatch.context import ExecutionContext
+from hatch.env import install_project
 from hatch.utils import (
-    NEED_SUBPROCESS_SHELL, ON_WINDOWS, get_admin_command, get_requirements_file,
-    is_project, venv_active
+    ON_WINDOWS, get_admin_command, get_requirements_file, is_project
 )
-from hatch.venv import create_venv, is_venv, venv
+from hatch.venv import create_venv, is_venv
 
 
 @click.command(context_settings=CONTEXT_SETTINGS, short_help='Uninstalls packages')
@@ -55,8 +54,10 @@ def uninstall(packages, no_detect, env_name, global_uninstall, admin, dev, quiet
     virtual env before resorting to the default pip. No project detection
     will occur if a virtual env is active.
     """
+    context = ExecutionContext()
+
     if not packages:
-        reqs = get_requirements_file(os.getcwd(), dev=dev)
+        reqs = get_requirements_file(context.cwd, dev=dev)
         if not reqs:
             echo_failure('Unable to locate a requirements file.')
             sys.exit(1)
@@ -77,34 +78,33 @@ def uninstall(packages, no_detect, env_name, global_uninstall, admin, dev, quiet
             echo_failure('Virtual env named `{}` does not exist.'.format(env_name))
             sys.exit(1)
 
-        with venv(venv_dir):
-            command = [get_proper_pip(), 'uninstall', *packages] + (['-q'] if quiet else [])
-            echo_waiting('Uninstalling in virtual env `{}`...'.format(env_name))
-            result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
-    elif not venv_active() and not no_detect and is_project():
-        venv_dir = os.path.join(os.getcwd(), 'venv')
+        venv_context = context.with_venv(venv_dir)
+        command = [venv_context.pip, 'uninstall', *packages] + (['-q'] if quiet else [])
+        echo_waiting('Uninstalling in virtual env `{}`...'.format(env_name))
+        result = venv_context.run(command)
+    elif not context.venv_active and not no_detect and is_project(context.cwd):
+        venv_dir = os.path.join(context.cwd, 'venv')
         if not is_venv(venv_dir):
             echo_info('A project has been detected!')
             echo_waiting('Creating a dedicated virtual env... ', nl=False)
             create_venv(venv_dir)
             echo_success('complete!')
 
-            with venv(venv_dir):
-                echo_waiting('Installing this project in the virtual env... ', nl=False)
-                install_packages(['-q', '-e', '.'])
-                echo_success('complete!')
+            echo_waiting('Installing this project in the virtual env... ', nl=False)
+            install_project(venv_dir, context.cwd, context=context.with_venv(venv_dir))
+            echo_success('complete!')
 
             echo_warning('New virtual envs have nothing to uninstall, exiting...')
             sys.exit(2)
 
-        with venv(venv_dir):
-            command = [get_proper_pip(), 'uninstall', *packages] + (['-q'] if quiet else [])
-            echo_waiting('Uninstalling for this project...')
-            result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+        venv_context = context.with_venv(venv_dir)
+        command = [venv_context.pip, 'uninstall', *packages] + (['-q'] if quiet else [])
+        echo_waiting('Uninstalling for this project...')
+        result = venv_context.run(command)
     else:
-        command = [get_proper_pip(), 'uninstall'] + (['-q'] if quiet else [])
+        command = [context.pip, 'uninstall'] + (['-q'] if quiet else [])
 
-        if not venv_active() and global_uninstall:  # no cov
+        if not context.venv_active and global_uninstall:  # no cov
             if not admin:
                 if ON_WINDOWS:
                     windows_admin_command = get_admin_command()
@@ -117,6 +117,6 @@ def uninstall(packages, no_detect, env_name, global_uninstall, admin, dev, quiet
             command = windows_admin_command + [' '.join(command)]
 
         echo_waiting('Uninstalling...')
-        result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+        result = context.run(command)
 
     sys.exit(result.returncode)
@@ -1,6 +1,5 @@
 import os
 import re
-import subprocess
 import sys
 from tempfile import TemporaryDirectory
 
@@ -10,13 +9,13 @@ from hatch.commands.utils import (
     CONTEXT_SETTINGS, echo_failure, echo_info, echo_success, echo_waiting,
     echo_warning
 )
-from hatch.config import get_proper_pip, get_proper_python, get_venv_dir
-from hatch.env import get_installed_packages, install_packages
+from hatch.config import get_venv_dir
+from hatch.context import ExecutionContext
+from hatch.env import get_installed_packages, install_project
 from hatch.utils import (
-    NEED_SUBPROCESS_SHELL, ON_WINDOWS, basepath, get_admin_command,
-    get_requirements_file, is_project, venv_active
+    ON_WINDOWS, basepath, get_admin_command, get_requirements_file, is_project
 )
-from hatch.venv import create_venv, is_venv, venv
+from hatch.venv import create_venv, is_venv
 
 
 @click.command(context_settings=CONTEXT_SETTINGS, short_help='Updates packages')
@@ -96,6 +95,7 @@ def update(packages, no_detect, env_name, eager, all_packages, infra, global_ins
     # command so we catch this case and turn our command into
     # a string later.
     windows_admin_command = None
+    context = ExecutionContext()
 
     if self:  # no cov
         as_module = True
@@ -106,55 +106,60 @@ def update(packages, no_detect, env_name, eager, all_packages, infra, global_ins
             echo_failure('Virtual env named `{}` does not exist.'.format(env_name))
             sys.exit(1)
 
-        with venv(venv_dir):
-            executable = (
-                [get_proper_python(), '-m', 'pip']
-                if as_module or (infra and ON_WINDOWS)
-                else [get_proper_pip()]
+        context = context.with_venv(venv_dir)
+        executable = (
+            [context.python, '-m', 'pip']
+            if as_module or (infra and ON_WINDOWS)
+            else [context.pip]
+        )
+        command = executable + command
+        if all_packages:
+            installed_packages = (
+                infra_packages if infra else get_installed_packages(context=context)
             )
-            command = executable + command
-            if all_packages:
-                installed_packages = infra_packages if infra else get_installed_packages()
-            else:
-                installed_packages = None
-    elif not self and not venv_active() and not no_detect and is_project():
-        venv_dir = os.path.join(os.getcwd(), 'venv')
+        else:
+            installed_packages = None
+    elif not self and not context.venv_active and not no_detect and is_project(context.cwd):
+        venv_dir = os.path.join(context.cwd, 'venv')
         if not is_venv(venv_dir):
             echo_info('A project has been detected!')
             echo_waiting('Creating a dedicated virtual env... ', nl=False)
             create_venv(venv_dir)
             echo_success('complete!')
 
-            with venv(venv_dir):
-                echo_waiting('Installing this project in the virtual env... ', nl=False)
-                install_packages(['-q', '-e', '.'])
-                echo_success('complete!')
+            echo_waiting('Installing this project in the virtual env... ', nl=False)
+            install_project(venv_dir, context.cwd, context=context.with_venv(venv_dir))
+            echo_success('complete!')
 
-        with venv(venv_dir):
-            executable = (
-                [get_proper_python(), '-m', 'pip']
-                if as_module or (infra and ON_WINDOWS)
-                else [get_proper_pip()]
+        context = context.with_venv(venv_dir)
+        executable = (
+            [context.python, '-m', 'pip']
+            if as_module or (infra and ON_WINDOWS)
+            else [context.pip]
+        )
+        command = executable + command
+        if all_packages:
+            installed_packages = (
+                infra_packages if infra else get_installed_packages(context=context)
             )
-            command = executable + command
-            if all_packages:
-                installed_packages = infra_packages if infra else get_installed_packages()
-            else:
-                installed_packages = None
+        else:
+            installed_packages = None
     else:
         venv_dir = None
         executable = (
-            [sys.executable if self else get_proper_python(), '-m', 'pip']
+            [sys.executable if self else context.python, '-m', 'pip']
             if as_module or (infra and ON_WINDOWS)
-            else [get_proper_pip()]
+            else [context.pip]
         )
         command = executable + command
         if all_packages:
-            installed_packages = infra_packages if infra else get_installed_packages()
+            installed_packages = (
+                infra_packages if infra else get_installed_packages(context=context)
+            )
         else:
             installed_packages = None
 
-        if not venv_active():  # no cov
+        if not context.venv_active:  # no cov
             if global_install:
                 if not admin:
                     if ON_WINDOWS:
@@ -168,10 +173,10 @@ def update(packages, no_detect, env_name, eager, all_packages, infra, global_ins
         command.append('hatch')
         if ON_WINDOWS:
             echo_warning('After the update you may want to press Enter to flush stdout.')
-            subprocess.Popen(command, shell=NEED_SUBPROCESS_SHELL)
+            context.popen(command)
             sys.exit()
         else:
-            result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+            result = context.run(command)
             sys.exit(result.returncode)
     elif infra:
         command.extend(infra_packages)
@@ -193,7 +198,7 @@ def update(packages, no_detect, env_name, eager, all_packages, infra, global_ins
 
     # When https://github.com/pypa/pipfile is finalized, we'll use it.
     else:
-        reqs = get_requirements_file(os.getcwd(), dev=dev)
+        reqs = get_requirements_file(context.cwd, dev=dev)
         if not reqs:
             echo_failure('Unable to locate a requirements file.')
             sys.exit(1)
@@ -223,15 +228,13 @@ def update(packages, no_detect, env_name, eager, all_packages, infra, global_ins
         command = windows_admin_command + [' '.join(command)]
 
     if venv_dir:
-        with venv(venv_dir):
-            if env_name:
-                echo_waiting('Updating virtual env `{}`...'.format(env_name))
-            else:
-                echo_waiting('Updating for this project...')
-            result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+        if env_name:
+            echo_waiting('Updating virtual env `{}`...'.format(env_name))
+        else:
+            echo_waiting('Updating for this project...')
     else:
         echo_waiting('Updating...')
-        result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+    result = context.run(command)
 
     if temp_dir is not None:
         temp_dir.cleanup()
@@ -9,21 +9,21 @@ UNKNOWN_OPTIONS = {
 }
 
 
-def echo_success(text, nl=True):
-    click.secho(text, fg='cyan', bold=True, nl=nl)
+def echo_success(text, nl=True, err=False):
+    click.secho(text, fg='cyan', bold=True, nl=nl, err=err)
 
 
-def echo_failure(text, nl=True):
-    click.secho(text, fg='red', bold=True, nl=nl)
+def echo_failure(text, nl=True, err=False):
+    click.secho(text, fg='red', bold=True, nl=nl, err=err)
 
 
-def echo_warning(text, nl=True):
-    click.secho(text, fg='yellow', bold=True, nl=nl)
+def echo_warning(text, nl=True, err=False):
+    click.secho(text, fg='yellow', bold=True, nl=nl, err=err)
 
 
-def echo_waiting(text, nl=True):
-    click.secho(text, fg='magenta', bold=True, nl=nl)
+def echo_waiting(text, nl=True, err=False):
+    click.secho(text, fg='magenta', bold=True, nl=nl, err=err)
 
 
-def echo_info(text, nl=True):
-    click.secho(text, bold=True, nl=nl)
+def echo_info(text, nl=True, err=False):
+    click.secho(text, bold=True, nl=nl, err=err)
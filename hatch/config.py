@@ -1,7 +1,7 @@
 import os
 from functools import wraps
 
-from appdirs import user_data_dir
+from appdirs import user_cache_dir, user_data_dir
 
 from hatch.settings import load_settings
 from hatch.utils import ON_WINDOWS, venv_active
@@ -10,11 +10,20 @@ PYTHON_DIR_ISOLATED = os.path.join(user_data_dir('hatch', ''), 'pythons')
 PYTHON_DIR_SHARED = os.path.expanduser(os.path.join('~', '.pythons'))
 VENV_DIR_ISOLATED = os.path.join(user_data_dir('hatch', ''), 'venvs')
 VENV_DIR_SHARED = os.path.expanduser(os.path.join('~', '.virtualenvs'))
+CACHE_DIR = user_cache_dir('hatch', '')
+VENV_TEMPLATES_DIR = os.path.join(user_data_dir('hatch', ''), 'templates')
+TRASH_DIR = os.path.join(user_data_dir('hatch', ''), 'trash')
+BUILD_ENVS_DIR = os.path.join(user_data_dir('hatch', ''), 'build-envs')
+UPLOAD_LEDGER_FILE = os.path.join(user_data_dir('hatch', ''), 'uploads.json')
 
+# Project-local state, e.g. build fingerprints, lives here.
+PROJECT_STATE_DIR = '.hatch'
 
-def get_proper_python():  # no cov
-    if not venv_active():
-        default_python = os.environ.get('_DEFAULT_PYTHON_', None)
+
+def get_proper_python(env=None):  # no cov
+    env = os.environ if env is None else env
+    if not venv_active(env):
+        default_python = env.get('_DEFAULT_PYTHON_', None)
         if default_python:
             return default_python
         elif not ON_WINDOWS:
@@ -22,9 +31,10 @@ def get_proper_python():  # no cov
     return 'python'
 
 
-def get_proper_pip():  # no cov
-    if not venv_active():
-        default_pip = os.environ.get('_DEFAULT_PIP_', None)
+def get_proper_pip(env=None):  # no cov
+    env = os.environ if env is None else env
+    if not venv_active(env):
+        default_pip = env.get('_DEFAULT_PIP_', None)
         if default_pip:
             return default_pip
         elif not ON_WINDOWS:
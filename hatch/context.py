@@ -0,0 +1,92 @@
+import os
+import shutil
+
+from hatch import process
+from hatch.config import get_proper_pip, get_proper_python
+from hatch.exceptions import InvalidVirtualEnv
+from hatch.utils import NEED_SUBPROCESS_SHELL, ON_WINDOWS, venv_active
+
+# Set by macOS framework builds and inherited by every interpreter they
+# start, which would then ignore the virtual env.
+IGNORED_VENV_VARS = ('__PYVENV_LAUNCHER__', )
+
+
+def locate_exe_dir(d, check=True):
+    exe_dir = os.path.join(d, 'Scripts') if ON_WINDOWS else os.path.join(d, 'bin')
+    if not os.path.isdir(exe_dir):
+        if ON_WINDOWS:
+            bin_dir = os.path.join(d, 'bin')
+            if os.path.isdir(bin_dir):
+                return bin_dir
+        if check:
+            raise InvalidVirtualEnv('Unable to locate executables directory.')
+    return exe_dir
+
+
+def get_venv_env_vars(d, path, evars=None):
+    """Returns the environment variables that activate the virtual env
+    at `d`, given the current value of `PATH`.
+    """
+    evars = dict(evars or {})
+    evars['_HATCHING_'] = '1'
+    evars['VIRTUAL_ENV'] = d
+    evars['PATH'] = '{}{}{}'.format(locate_exe_dir(d), os.pathsep, path)
+    return evars
+
+
+class ExecutionContext:
+    """The environment variables and working directory that subprocesses
+    run with. Activating a virtual env or entering a directory returns a
+    new context rather than changing `os.environ` or the working directory
+    of the whole process, so contexts can be used from several threads at
+    once. The default context is a snapshot of the current process.
+    """
+    def __init__(self, env=None, cwd=None):
+        self.env = dict(os.environ if env is None else env)
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+
+    def with_env(self, evars=None, ignore=()):
+        env = dict(self.env)
+        env.update(evars or {})
+        for ev in ignore:
+            env.pop(ev, None)
+        return ExecutionContext(env, self.cwd)
+
+    def with_cwd(self, d):
+        return ExecutionContext(self.env, os.path.join(self.cwd, d))
+
+    def with_venv(self, d, evars=None):
+        d = os.path.join(self.cwd, d)
+        return self.with_env(
+            get_venv_env_vars(d, self.env.get('PATH', ''), evars), ignore=IGNORED_VENV_VARS
+        )
+
+    @property
+    def venv_active(self):
+        return venv_active(self.env)
+
+    @property
+    def python(self):
+        return self.which(get_proper_python(self.env))
+
+    @property
+    def pip(self):
+        return self.which(get_proper_pip(self.env))
+
+    def which(self, name):
+        """Locates an executable using this context's `PATH`, returning
+        `name` unchanged if it can't be found.
+        """
+        return shutil.which(name, path=self.env.get('PATH', os.defpath)) or name
+
+    def run(self, command, phase=None, **kwargs):
+        kwargs.setdefault('shell', NEED_SUBPROCESS_SHELL)
+        return process.run(command, phase, env=self.env, cwd=self.cwd, **kwargs)
+
+    def check_output(self, command, phase=None, **kwargs):
+        kwargs.setdefault('shell', NEED_SUBPROCESS_SHELL)
+        return process.check_output(command, phase, env=self.env, cwd=self.cwd, **kwargs)
+
+    def popen(self, command, phase=None, **kwargs):
+        kwargs.setdefault('shell', NEED_SUBPROCESS_SHELL)
+        return process.popen(command, phase, env=self.env, cwd=self.cwd, **kwargs)
@@ -10,7 +10,9 @@ from hatch.files.pyproject import ProjectFile
 from hatch.files.readme import MarkdownReadme, ReStructuredTextReadme
 from hatch.files.setup import SetupFile
 from hatch.files.vc import setup_git
-from hatch.settings import DEFAULT_SETTINGS
+from hatch.settings import (
+    DEFAULT_SETTINGS, get_default_email, get_default_name
+)
 from hatch.structures import Badge, File
 from hatch.utils import copy_path, create_file, normalize_package_name
 
@@ -41,9 +43,9 @@ def create_package(d, package_name, settings):
     basic = settings.get('basic', DEFAULT_SETTINGS['basic'])
     extra_files = []
 
-    author = settings.get('name') or DEFAULT_SETTINGS['name']
+    author = settings.get('name') or get_default_name()
     version = settings.get('version') or '0.0.1'
-    email = settings.get('email') or DEFAULT_SETTINGS['email']
+    email = settings.get('email') or get_default_email()
     description = settings.get('description') or ''
     pyversions = sorted(
         settings.get('pyversions') or DEFAULT_SETTINGS['pyversions']
@@ -0,0 +1,282 @@
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+import traceback
+from importlib import import_module
+
+from appdirs import user_data_dir
+
+from hatch import __version__
+from hatch.client import STDIO_FDS, get_socket_path, recv_message, request, send_message
+from hatch.env import (
+    DISTRIBUTIONS_CACHE, DISTRIBUTIONS_VERSION, PYTHON_INFO_CACHE,
+    PYTHON_INFO_VERSION, clear_caches, get_mtime, get_python_info, load_cache
+)
+from hatch.exceptions import DaemonError
+from hatch.utils import ensure_dir_exists
+
+LOG_FILE = os.path.join(user_data_dir('hatch', ''), 'daemon.log')
+
+# Paths hatch resolves when it's imported depend on these, so commands
+# from an environment where they differ run in their own process.
+ENV_DEPENDENCIES = (
+    'APPDATA', 'HOME', 'LOCALAPPDATA', 'USERPROFILE',
+    'XDG_CACHE_HOME', 'XDG_CONFIG_HOME', 'XDG_DATA_HOME',
+)
+
+# Kept in memory and reloaded only when a command has changed them.
+CACHES = (
+    (PYTHON_INFO_CACHE, PYTHON_INFO_VERSION),
+    (DISTRIBUTIONS_CACHE, DISTRIBUTIONS_VERSION),
+)
+
+# Clients send their request as soon as they connect.
+REQUEST_TIMEOUT = 5
+
+
+def get_incompatibility(message):
+    """Returns why a command can't run in this daemon, if it can't."""
+    if message.get('version') != __version__:
+        return 'hatch {} is running in the daemon'.format(__version__)
+
+    # Another interpreter, e.g. that of a virtual env, has other packages.
+    if message.get('executable') != sys.executable:
+        return 'the daemon runs in `{}`'.format(sys.executable)
+
+    env = message.get('env', {})
+    for ev in ENV_DEPENDENCIES:
+        if env.get(ev) != os.environ.get(ev):
+            return '`{}` differs from the daemon'.format(ev)
+
+
+def get_peer_uid(conn):
+    """Returns the user of the process at the other end of a connection,
+    or None if that can't be known on this platform.
+    """
+    if not hasattr(socket, 'SO_PEERCRED'):  # no cov
+        return
+
+    credentials = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', credentials)
+    return uid
+
+
+def reset_signals():
+    for name in ('SIGCHLD', 'SIGTERM'):
+        signal.signal(getattr(signal, name), signal.SIG_DFL)
+
+
+def run_command(conn, message, fds):
+    """Runs a forwarded command in the current process, which is a fork
+    of the daemon, as if the client had run it itself.
+    """
+    for fd, target in zip(fds, STDIO_FDS):
+        if fd != target:
+            os.dup2(fd, target)
+            os.close(fd)
+
+    # The daemon's streams may be buffered differently, e.g. for a log.
+    sys.stdin = open(0, 'r', closefd=False)
+    sys.stdout = open(1, 'w', buffering=1 if os.isatty(1) else -1, closefd=False)
+    sys.stderr = open(2, 'w', buffering=1, errors='backslashreplace', closefd=False)
+
+    os.environ.clear()
+    os.environ.update(message['env'])
+    sys.argv = ['hatch'] + message['argv']
+
+    # Signals sent to the client are forwarded to this process group.
+    os.setpgid(0, 0)
+    send_message(conn, {'pid': os.getpid()})
+
+    from hatch.cli import hatch
+    try:
+        os.chdir(message['cwd'])
+        hatch.main(args=message['argv'], prog_name='hatch')
+        code = 0
+    except SystemExit as e:
+        code = e.code
+    except Exception:
+        traceback.print_exc()
+        code = 1
+
+    if code is None:
+        code = 0
+    elif not isinstance(code, int):
+        sys.stderr.write('{}\n'.format(code))
+        code = 1
+
+    for stream in (sys.stdout, sys.stderr):
+        stream.flush()
+
+    send_message(conn, {'exit': code})
+
+
+class Daemon:
+    """Serves commands forwarded by `hatch.client` over a Unix domain
+    socket. Commands and their dependencies are imported once, as are the
+    caches of interpreter metadata and installed distributions, and every
+    command then runs in a fork of this process.
+    """
+    def __init__(self, path=None):
+        self.path = path or get_socket_path()
+        self.started = time.time()
+        self.requests = 0
+        self.running = False
+        self.cache_signature = None
+
+    def warm(self):
+        from hatch.cli import COMMANDS
+        for module in COMMANDS.values():
+            import_module(module)
+
+        try:
+            get_python_info()
+        except Exception:  # no cov
+            pass
+
+        self.refresh_caches()
+
+    def refresh_caches(self):
+        signature = [get_mtime(path) for path, _ in CACHES]
+        if signature != self.cache_signature:
+            clear_caches()
+            for path, version in CACHES:
+                load_cache(path, version)
+            self.cache_signature = signature
+
+    def get_status(self):
+        return {
+            'pid': os.getpid(),
+            'version': __version__,
+            'socket': self.path,
+            'uptime': time.time() - self.started,
+            'requests': self.requests,
+        }
+
+    def bind(self):
+        if request({'command': 'status'}, self.path) is not None:
+            raise DaemonError('A daemon is already listening on `{}`.'.format(self.path))
+
+        # What's left of a daemon that didn't exit cleanly.
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        ensure_dir_exists(os.path.dirname(self.path))
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only this user may ever connect, so the socket is never created
+        # with looser permissions, even for a moment.
+        umask = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+            sock.listen(socket.SOMAXCONN)
+        except OSError as e:
+            sock.close()
+            raise DaemonError('Unable to listen on `{}`: {}'.format(self.path, e))
+        finally:
+            os.umask(umask)
+
+        return sock
+
+    def serve(self, ready=None):
+        """Handles requests until asked to stop or terminated, calling
+        `ready` once requests are accepted.
+        """
+        sock = self.bind()
+        identity = os.stat(self.path).st_ino
+
+        def terminate(signum, frame):
+            sys.exit(0)
+
+        # Commands report their exit code themselves, so they are
+        # never waited for.
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, terminate)
+
+        self.running = True
+        try:
+            with sock:
+                if ready is not None:
+                    ready()
+
+                while self.running:
+                    conn, _ = sock.accept()
+                    with conn:
+                        self.handle(sock, conn)
+        finally:
+            self.running = False
+            reset_signals()
+            # Another daemon may have replaced the socket.
+            if get_inode(self.path) == identity:
+                os.remove(self.path)
+
+    def handle(self, sock, conn):
+        # Commands run as this user, so nobody else may send them.
+        try:
+            uid = get_peer_uid(conn)
+        except OSError:  # no cov
+            return
+        if uid is not None and uid != os.getuid():  # no cov
+            return
+
+        conn.settimeout(REQUEST_TIMEOUT)
+        try:
+            message, fds = recv_message(conn, len(STDIO_FDS))
+        except (OSError, ValueError):
+            return
+
+        try:
+            if message is None:
+                return
+
+            command = message.get('command')
+            if command == 'run':
+                self.run(sock, conn, message, fds)
+            elif command == 'status':
+                send_message(conn, self.get_status())
+            elif command == 'stop':
+                self.running = False
+                send_message(conn, self.get_status())
+            else:
+                send_message(conn, {'error': 'Unknown command `{}`.'.format(command)})
+        except OSError:
+            pass
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def run(self, sock, conn, message, fds):
+        reason = get_incompatibility(message)
+        if reason is None and len(fds) != len(STDIO_FDS):
+            reason = 'standard streams were not received'
+        if reason is not None:
+            send_message(conn, {'fallback': reason})
+            return
+
+        self.refresh_caches()
+        self.requests += 1
+
+        pid = os.fork()
+        if pid:
+            return
+
+        code = 1
+        try:
+            sock.close()
+            reset_signals()
+            conn.settimeout(None)
+            run_command(conn, message, fds)
+            code = 0
+        except BaseException:  # no cov
+            traceback.print_exc()
+        finally:
+            os._exit(code)
+
+
+def get_inode(path):
+    try:
+        return os.stat(path).st_ino
+    except OSError:
+        return
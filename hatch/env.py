@@ -1,72 +1,495 @@
+import hashlib
 import json
+import os
 import subprocess
+import time
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
-from hatch.config import get_proper_pip, get_proper_python
-from hatch.utils import NEED_SUBPROCESS_SHELL, resolve_path
+from atomicwrites import atomic_write
+
+from hatch.config import CACHE_DIR
+from hatch.context import ExecutionContext
+from hatch.sync import get_requirements_files
+from hatch.trace import span
+from hatch.utils import ensure_dir_exists, normalize_package_name, resolve_path
+
+PYTHON_INFO_CACHE = os.path.join(CACHE_DIR, 'pythons.json')
+DISTRIBUTIONS_CACHE = os.path.join(CACHE_DIR, 'distributions.json')
+
+# Bump these whenever the format of the cached data changes.
+PYTHON_INFO_VERSION = 3
+DISTRIBUTIONS_VERSION = 2
+ENV_SYNC_VERSION = 1
+
+# Stored in a project's virtual env, recording what it was last synced with.
+ENV_SYNC_FILE = 'hatch-sync.json'
+PROJECT_METADATA_FILES = ('setup.py', 'setup.cfg', 'pyproject.toml')
+
+# Directories modified this recently might change again without their
+# modification time changing, depending on the file system's precision.
+RACY_MODIFICATION_WINDOW = 2
+
+# This must remain compatible with every Python we can create envs for.
+PYTHON_INFO_SCRIPT = """\
+import json, os, platform, site, sys, sysconfig
+site_packages = []
+for path in (
+    getattr(site, 'getsitepackages', list)() +
+    [sysconfig.get_path('purelib'), sysconfig.get_path('platlib')]
+):
+    if path not in site_packages:
+        site_packages.append(path)
+user_site = ''
+if getattr(site, 'ENABLE_USER_SITE', False) and hasattr(site, 'getusersitepackages'):
+    user_site = site.getusersitepackages()
+implementation = getattr(sys, 'implementation', None)
+implementation_version = '0'
+if implementation is not None:
+    implementation_version = '.'.join(str(i) for i in implementation.version[:3])
+    if implementation.version.releaselevel != 'final':
+        implementation_version += (
+            implementation.version.releaselevel[0] + str(implementation.version.serial)
+        )
+print(json.dumps({
+    'executable': sys.executable,
+    'version': '.'.join(str(i) for i in sys.version_info[:3]),
+    'implementation': platform.python_implementation(),
+    'abiflags': getattr(sys, 'abiflags', ''),
+    'soabi': sysconfig.get_config_var('SOABI') or '',
+    'cache_tag': getattr(getattr(sys, 'implementation', None), 'cache_tag', ''),
+    'platform': sysconfig.get_platform(),
+    'sys_platform': sys.platform,
+    'prefix': sys.prefix,
+    'base_prefix': getattr(sys, 'base_prefix', getattr(sys, 'real_prefix', sys.prefix)),
+    'site_packages': site_packages,
+    'user_site': user_site,
+    # https://www.python.org/dev/peps/pep-0508/#environment-markers
+    'markers': {
+        'implementation_name': getattr(implementation, 'name', 'cpython'),
+        'implementation_version': implementation_version,
+        'os_name': os.name,
+        'platform_machine': platform.machine(),
+        'platform_python_implementation': platform.python_implementation(),
+        'platform_release': platform.release(),
+        'platform_system': platform.system(),
+        'platform_version': platform.version(),
+        'python_full_version': platform.python_version(),
+        'python_version': '.'.join(platform.python_version_tuple()[:2]),
+        'sys_platform': sys.platform,
+    },
+}))
+"""
+
+__caches = {}
+
+
+def load_cache(path, version):
+    if path not in __caches:
+        try:
+            with open(path, 'r') as f:
+                cache = json.loads(f.read())
+        except (OSError, ValueError):
+            cache = {}
+
+        if cache.get('version') != version:
+            cache = {'version': version, 'entries': {}}
+
+        __caches[path] = cache
+
+    return __caches[path]
+
+
+def clear_caches():
+    """Forgets the caches loaded so far, so they are read again."""
+    __caches.clear()
+
+
+def save_cache(path, cache):
+    # Forget about things that no longer exist.
+    for entry_path in list(cache['entries']):
+        if not os.path.exists(entry_path):
+            cache['entries'].pop(entry_path)
+
+    try:
+        ensure_dir_exists(os.path.dirname(path))
+        with atomic_write(path, overwrite=True) as f:
+            f.write(json.dumps(cache, indent=4))
+    except OSError:  # no cov
+        pass
+
+
+def get_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return
+
+
+def get_python_info(python=None, context=None):
+    """Returns facts about an interpreter, which defaults to the one that
+    would be used in `context`, starting it only if they are not yet cached.
+    """
+    context = context or ExecutionContext()
+    python = python or context.python
+    path = context.which(python)
+    try:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        path = signature = None
+
+    cache = load_cache(PYTHON_INFO_CACHE, PYTHON_INFO_VERSION)
+    entry = cache['entries'].get(path)
+    if entry and entry['signature'] == signature:
+        return entry['info']
+
+    info = json.loads(context.check_output(
+        [path or python, '-c', PYTHON_INFO_SCRIPT]
+    ).decode())
+
+    # Launchers like pyenv shims may start different interpreters
+    # depending on context so only actual executables are cached.
+    if path and os.path.realpath(path) == os.path.realpath(info['executable']):
+        cache['entries'][path] = {'signature': signature, 'info': info}
+        save_cache(PYTHON_INFO_CACHE, cache)
+
+    return info
 
 
 def get_python_path():
-    return subprocess.check_output(
-        [get_proper_python(), '-c', 'import sys;print(sys.executable)'], shell=NEED_SUBPROCESS_SHELL
-    ).decode().strip()
+    return get_python_info()['executable']
 
 
 def get_python_version():
-    return subprocess.check_output(
-        [get_proper_python(), '-c', 'import sys;print(".".join(str(i) for i in sys.version_info[:3]))'],
-        shell=NEED_SUBPROCESS_SHELL
-    ).decode().strip()
+    return get_python_info()['version']
 
 
 def get_python_implementation():
-    return subprocess.check_output(
-        [get_proper_python(), '-c', 'import platform;print(platform.python_implementation())'],
-        shell=NEED_SUBPROCESS_SHELL
-    ).decode().strip()
+    return get_python_info()['implementation']
+
+
+def get_site_packages(python=None, context=None):
+    info = get_python_info(python, context)
+
+    # This is the order in which they appear in `sys.path`.
+    site_packages = []
+    for d in [info['user_site']] + info['site_packages']:
+        if d and d not in site_packages and os.path.isdir(d):
+            site_packages.append(d)
+
+    return site_packages
+
+
+def read_metadata(path):
+    metadata = {'requires': []}
+
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                # Headers end at the first blank line.
+                if not line.strip():
+                    break
+                key, sep, value = line.partition(':')
+                if sep and key in ('Name', 'Version'):
+                    metadata[key.lower()] = value.strip()
+                elif sep and key == 'Requires-Dist':
+                    metadata['requires'].append(value.strip())
+    except OSError:
+        pass
+
+    return metadata
+
+
+def read_egg_requires(path):
+    """Returns the requirements listed in an egg's `requires.txt` in the
+    format of `Requires-Dist`.
+    """
+    requires = []
+    marker = ''
+
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return requires
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        elif line.startswith('['):
+            extra, _, condition = line[1:-1].partition(':')
+            conditions = ['({})'.format(condition)] if condition else []
+            if extra:
+                conditions.append('extra == "{}"'.format(extra))
+            marker = ' and '.join(conditions)
+        else:
+            requires.append('{}; {}'.format(line, marker) if marker else line)
+
+    return requires
+
+
+def read_direct_url(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            direct_url = json.loads(f.read())
+    except (OSError, ValueError):
+        return
+
+    if not direct_url.get('dir_info', {}).get('editable'):
+        return
 
+    url = urlparse(direct_url.get('url', ''))
+    if url.scheme == 'file':
+        return url2pathname(url.path)
 
-def install_packages(packages):
-    subprocess.run([get_proper_pip(), 'install'] + packages, shell=NEED_SUBPROCESS_SHELL)
+
+def find_egg_info(d, name):
+    name = normalize_package_name(name)
+
+    try:
+        for entry in os.scandir(d):
+            if entry.name.endswith('.egg-info'):
+                if normalize_package_name(entry.name[:-9]) == name:
+                    return entry.path
+    except OSError:
+        pass
+
+
+@span('scan_site_packages', 'filesystem')
+def scan_site_packages(d):
+    """Returns the distributions installed in a site-packages directory,
+    along with any files outside of it that the results depend on.
+    """
+    distributions = []
+    dependencies = []
+
+    for entry in os.scandir(d):
+        if entry.name.endswith('.dist-info'):
+            metadata = read_metadata(os.path.join(entry.path, 'METADATA'))
+            location = read_direct_url(os.path.join(entry.path, 'direct_url.json'))
+            editable = location is not None
+            default_name, _, default_version = entry.name[:-10].partition('-')
+        elif entry.name.endswith('.egg-info'):
+            metadata = read_metadata(
+                os.path.join(entry.path, 'PKG-INFO') if entry.is_dir() else entry.path
+            )
+            metadata['requires'] = read_egg_requires(os.path.join(entry.path, 'requires.txt'))
+            location = None
+            editable = False
+            default_name, _, default_version = entry.name[:-9].partition('-')
+            default_version = default_version.split('-')[0]
+        elif entry.name.endswith('.egg-link'):
+            try:
+                with open(entry.path, 'r') as f:
+                    location = os.path.join(d, f.readline().strip())
+            except OSError:
+                continue
+
+            default_name, default_version = entry.name[:-9], ''
+            editable = True
+
+            egg_info = find_egg_info(location, default_name)
+            if egg_info:
+                pkg_info = os.path.join(egg_info, 'PKG-INFO')
+                metadata = read_metadata(pkg_info)
+                metadata['requires'] = read_egg_requires(os.path.join(egg_info, 'requires.txt'))
+                dependencies.append(pkg_info)
+            else:
+                metadata = {'requires': []}
+            dependencies.append(location)
+        else:
+            continue
+
+        distributions.append({
+            'name': metadata.get('name') or default_name,
+            'version': metadata.get('version') or default_version,
+            'editable': editable,
+            'location': os.path.normpath(location) if location else d,
+            'requires': metadata['requires'],
+        })
+
+    return distributions, dependencies
+
+
+def get_installed_distributions(python=None, context=None):
+    """Returns the distributions visible to an interpreter, which defaults
+    to the one that would be used in `context`, without running pip.
+    """
+    cache = load_cache(DISTRIBUTIONS_CACHE, DISTRIBUTIONS_VERSION)
+    distributions = {}
+    modified = False
+
+    for d in get_site_packages(python, context):
+        entry = cache['entries'].get(d)
+        if not entry or any(get_mtime(path) != mtime for path, mtime in entry['signature']):
+            scanned, dependencies = scan_site_packages(d)
+            signature = [[path, get_mtime(path)] for path in [d] + dependencies]
+            entry = {'signature': signature, 'distributions': scanned}
+
+            now = time.time() * 10**9
+            if all(
+                mtime is None or now - mtime > RACY_MODIFICATION_WINDOW * 10**9
+                for _, mtime in signature
+            ):
+                cache['entries'][d] = entry
+                modified = True
+
+        for distribution in entry['distributions']:
+            distributions.setdefault(normalize_package_name(distribution['name']), distribution)
+
+    if modified:
+        save_cache(DISTRIBUTIONS_CACHE, cache)
+
+    return sorted(distributions.values(), key=lambda dist: dist['name'].lower())
+
+
+def install_packages(packages, context=None):
+    context = context or ExecutionContext()
+    return context.run([context.pip, 'install'] + packages).returncode
+
+
+def hash_files(paths):
+    hasher = hashlib.sha256()
+
+    for path in paths:
+        hasher.update(os.path.basename(path).encode('utf-8') + b'\0')
+        try:
+            with open(path, 'rb') as f:
+                hasher.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            hasher.update(b'\0')
+
+    return hasher.hexdigest()
+
+
+def get_interpreter_identity(python=None, context=None):
+    info = get_python_info(python, context)
+    return {
+        'executable': os.path.realpath(info['executable']),
+        'version': info['version'],
+        'implementation': info['implementation'],
+    }
+
+
+def load_env_sync(venv_dir):
+    try:
+        with open(os.path.join(venv_dir, ENV_SYNC_FILE), 'r') as f:
+            marker = json.loads(f.read())
+    except (OSError, ValueError):
+        marker = {}
+
+    if marker.get('version') != ENV_SYNC_VERSION:
+        marker = {'version': ENV_SYNC_VERSION}
+
+    return marker
+
+
+def save_env_sync(venv_dir, marker):
+    try:
+        with atomic_write(os.path.join(venv_dir, ENV_SYNC_FILE), overwrite=True) as f:
+            f.write(json.dumps(marker, indent=4, sort_keys=True))
+    except OSError:  # no cov
+        pass
+
+
+def get_env_sync_steps(venv_dir, d, packages=(), requirements=None, context=None):
+    """Compares what a project's virtual env was last synced with to the
+    current state of the project without running pip. Returns the arguments
+    to `pip install`, to be run in the project's directory, for each thing
+    that is out of sync, keyed by what it syncs, along with the marker to
+    save once they all succeed. The env must be active in `context`.
+    """
+    identity = get_interpreter_identity(context=context)
+    marker = load_env_sync(venv_dir)
+    if marker.get('python') != identity:
+        marker = {'version': ENV_SYNC_VERSION, 'python': identity}
+
+    marker.setdefault('packages', [])
+    marker.setdefault('requirements', {})
+    steps = []
+
+    project = hash_files([os.path.join(d, name) for name in PROJECT_METADATA_FILES])
+    if marker.get('project') != project:
+        steps.append(('project', ['-e', '.']))
+        marker['project'] = project
+
+    # Packages may have been uninstalled since, e.g. by `hatch sync`.
+    installed = set(marker['packages'])
+    if installed:
+        installed.intersection_update(
+            normalize_package_name(distribution['name'])
+            for distribution in get_installed_distributions(context=context)
+        )
+
+    missing = [package for package in packages if normalize_package_name(package) not in installed]
+    if missing:
+        steps.append(('packages', missing))
+        marker['packages'] = sorted(installed.union(map(normalize_package_name, missing)))
+
+    if requirements:
+        requirements_hash = hash_files(get_requirements_files(requirements))
+        name = os.path.basename(requirements)
+        if marker['requirements'].get(name) != requirements_hash:
+            steps.append(('requirements', ['-r', requirements]))
+            marker['requirements'][name] = requirements_hash
+
+    return steps, marker
+
+
+def install_project(venv_dir, d, quiet=True, context=None):
+    """Installs the project at `d` in development mode in its virtual env,
+    which must be active in `context`, recording that in the env's sync
+    marker.
+    """
+    context = (context or ExecutionContext()).with_cwd(d)
+    _, marker = get_env_sync_steps(venv_dir, d, context=context)
+
+    return_code = install_packages((['-q'] if quiet else []) + ['-e', '.'], context)
+    if return_code == 0:
+        save_env_sync(venv_dir, marker)
+
+    return return_code
 
 
 def get_package_version(package_name):
-    output = subprocess.check_output(
-        [get_proper_pip(), 'list', '--format', 'json'], shell=NEED_SUBPROCESS_SHELL
-    ).decode()
-    packages = json.loads(output)
-    for package in packages:
-        if package['name'] == package_name:
-            return package['version']
+    package_name = normalize_package_name(package_name)
+    for distribution in get_installed_distributions():
+        if normalize_package_name(distribution['name']) == package_name:
+            return distribution['version']
     return ''
 
 
-def get_editable_packages():
-    output = subprocess.check_output(
-        [get_proper_pip(), 'list', '-e', '--format', 'json'], shell=NEED_SUBPROCESS_SHELL
-    ).decode()
-    return set(package['name'] for package in json.loads(output))
+def get_editable_packages(context=None):
+    return set(
+        distribution['name'] for distribution in get_installed_distributions(context=context)
+        if distribution['editable']
+    )
 
 
 def get_editable_package_location(package_name=None):
     location = ''
 
     try:
-        output = subprocess.check_output(
-            [get_proper_pip(), 'list', '-e', '--format', 'columns'], shell=NEED_SUBPROCESS_SHELL
-        ).decode().strip().splitlines()[2:]
-    except subprocess.CalledProcessError:  # no cov
+        editable_distributions = [
+            distribution for distribution in get_installed_distributions()
+            if distribution['editable']
+        ]
+    except (OSError, subprocess.CalledProcessError):  # no cov
         return location
 
     if package_name:
-        for line in output:
-            name, _, path = line.split()
-            if name == package_name:
-                return resolve_path(path)
+        package_name = normalize_package_name(package_name)
+        for distribution in editable_distributions:
+            if normalize_package_name(distribution['name']) == package_name:
+                return resolve_path(distribution['location'])
     else:
-        if len(output) == 1:
-            name, _, path = output[0].split()
-            return name, resolve_path(path)
-        elif len(output) > 1:
+        if len(editable_distributions) == 1:
+            distribution = editable_distributions[0]
+            return distribution['name'], resolve_path(distribution['location'])
+        elif len(editable_distributions) > 1:
             return None, False
         else:
             return None, None
@@ -74,15 +497,8 @@ def get_editable_package_location(package_name=None):
     return location
 
 
-def get_installed_packages(editable=True):
-    editable_packages = get_editable_packages()
-
-    output = subprocess.check_output(
-        [get_proper_pip(), 'list', '--format', 'json'], shell=NEED_SUBPROCESS_SHELL
-    ).decode()
-    packages = [
-        package['name'] for package in json.loads(output)
-        if editable or package['name'] not in editable_packages
+def get_installed_packages(editable=True, context=None):
+    return [
+        distribution['name'] for distribution in get_installed_distributions(context=context)
+        if editable or not distribution['editable']
     ]
-
-    return packages
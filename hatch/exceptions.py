@@ -1,2 +1,14 @@
 class InvalidVirtualEnv(Exception):
     pass
+
+
+class BuildBackendError(Exception):
+    pass
+
+
+class RequirementsError(Exception):
+    pass
+
+
+class DaemonError(Exception):
+    pass
@@ -6,6 +6,7 @@ TEMPLATE = """\
 *.pyc
 .cache/
 .coverage
+.hatch/
 .idea/
 .vscode/
 {package_name_normalized}.egg-info/
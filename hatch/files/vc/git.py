@@ -1,9 +1,27 @@
 import os
+import re
 import subprocess
 
+from hatch import process
 from hatch.files.ignore import GitIgnore
 from hatch.structures import File
-from hatch.utils import NEED_SUBPROCESS_SHELL
+from hatch.utils import NEED_SUBPROCESS_SHELL, ON_WINDOWS
+
+# Git itself gives up after this many nested includes.
+MAX_INCLUDE_DEPTH = 10
+SECTION_HEADER = re.compile(r'\[\s*([-.\w]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+KEY_NAME = re.compile(r'([a-zA-Z][-a-zA-Z0-9]*)\s*')
+
+# Settings coming from these can only be resolved by `git` itself.
+CONFIG_OVERRIDE_VARS = (
+    'GIT_CONFIG',
+    'GIT_CONFIG_COUNT',
+    'GIT_CONFIG_PARAMETERS',
+)
+
+
+class UnsupportedGitConfig(Exception):
+    pass
 
 
 class GitAttributes(File):
@@ -20,7 +38,7 @@ class GitAttributes(File):
 def setup_git(d, package_name):
     if not os.path.exists(os.path.join(d, '.git')):  # no cov
         try:
-            subprocess.run(['git', 'init', '--quiet'], shell=NEED_SUBPROCESS_SHELL)
+            process.run(['git', 'init', '--quiet'], cwd=d, shell=NEED_SUBPROCESS_SHELL)
         except:
             print('Could not find `git` executable')
         GitAttributes().write(d)
@@ -28,22 +46,204 @@ def setup_git(d, package_name):
 
 
 def get_user():  # no cov
+    return get_config_value('user.name')
+
+
+def get_email():  # no cov
+    return get_config_value('user.email')
+
+
+def get_config_value(key, d=None):
+    """Returns the value of a config entry like `git config --get` would,
+    only spawning `git` when the config files can't be read natively.
+    """
+    try:
+        value = read_git_config(d).get(normalize_config_key(key))
+    except UnsupportedGitConfig:
+        return get_config_value_from_git(key, d)
+
+    # The system config lives wherever Git for Windows was installed.
+    if value is None and ON_WINDOWS:  # no cov
+        return get_config_value_from_git(key, d)
+
+    return value or None
+
+
+def get_config_value_from_git(key, d=None):  # no cov
     try:
-        user = subprocess.check_output(
-            ['git', 'config', '--get', 'user.name'],
+        value = process.check_output(
+            ['git', 'config', '--get', key],
+            cwd=d, stderr=subprocess.DEVNULL,
             shell=NEED_SUBPROCESS_SHELL
         )
-        return user.decode().strip()
+        return value.decode().strip() or None
     except:
         return
 
 
-def get_email():  # no cov
-    try:
-        email = subprocess.check_output(
-            ['git', 'config', '--get', 'user.email'],
-            shell=NEED_SUBPROCESS_SHELL
+def get_config_files(d=None):
+    if any(ev in os.environ for ev in CONFIG_OVERRIDE_VARS):
+        raise UnsupportedGitConfig('Config is overridden by the environment.')
+
+    config_files = []
+
+    if not ON_WINDOWS and not os.environ.get('GIT_CONFIG_NOSYSTEM'):
+        config_files.append(os.environ.get('GIT_CONFIG_SYSTEM') or '/etc/gitconfig')
+
+    if 'GIT_CONFIG_GLOBAL' in os.environ:
+        config_files.append(os.environ['GIT_CONFIG_GLOBAL'])
+    else:
+        xdg_config_home = (
+            os.environ.get('XDG_CONFIG_HOME') or
+            os.path.join(os.path.expanduser('~'), '.config')
         )
-        return email.decode().strip()
-    except:
+        config_files.append(os.path.join(xdg_config_home, 'git', 'config'))
+        config_files.append(os.path.join(os.path.expanduser('~'), '.gitconfig'))
+
+    git_dir = os.environ.get('GIT_DIR') or find_git_dir(d)
+    if git_dir:
+        config_files.append(os.path.join(git_dir, 'config'))
+
+    return config_files
+
+
+def find_git_dir(d=None):
+    path = os.path.abspath(d or os.getcwd())
+
+    while True:
+        git_dir = os.path.join(path, '.git')
+        if os.path.isdir(git_dir):
+            return git_dir
+        # Worktrees and submodules point elsewhere and may share config.
+        elif os.path.isfile(git_dir):
+            raise UnsupportedGitConfig('Unable to resolve `{}`.'.format(git_dir))
+
+        parent = os.path.dirname(path)
+        if parent == path:
+            return
+        path = parent
+
+
+def read_git_config(d=None):
+    values = {}
+
+    for config_file in get_config_files(d):
+        parse_config_file(config_file, values)
+
+    return values
+
+
+def normalize_config_key(key):
+    section, _, name = key.rpartition('.')
+    section, dot, subsection = section.partition('.')
+    return section.lower() + dot + subsection + '.' + name.lower()
+
+
+def parse_config_file(path, values, depth=0):
+    if depth > MAX_INCLUDE_DEPTH:
+        raise UnsupportedGitConfig('Too many nested includes in `{}`.'.format(path))
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = iter(f.read().splitlines())
+    except (FileNotFoundError, NotADirectoryError):
         return
+    except (OSError, UnicodeDecodeError):
+        raise UnsupportedGitConfig('Unable to read `{}`.'.format(path))
+
+    section = None
+
+    for line in lines:
+        line = line.lstrip()
+        if line.startswith('['):
+            match = SECTION_HEADER.match(line)
+            if not match:
+                raise UnsupportedGitConfig('Invalid section header in `{}`.'.format(path))
+
+            name, subsection = match.groups()
+            if subsection is not None:
+                section = '{}.{}'.format(name.lower(), re.sub(r'\\(.)', r'\1', subsection))
+            # This also covers the deprecated `[section.subsection]`
+            # syntax, which is case-insensitive in its entirety.
+            else:
+                section = name.lower()
+
+            # A key may follow the header on the same line.
+            line = line[match.end():].lstrip()
+
+        if not line or line[0] in '#;':
+            continue
+
+        match = KEY_NAME.match(line)
+        if not match or section is None:
+            raise UnsupportedGitConfig('Invalid entry in `{}`.'.format(path))
+
+        key = '{}.{}'.format(section, match.group(1).lower())
+        rest = line[match.end():]
+        if not rest or rest[0] in '#;':
+            value = ''
+        elif rest[0] == '=':
+            value = parse_config_value(rest[1:], lines, path)
+        else:
+            raise UnsupportedGitConfig('Invalid entry in `{}`.'.format(path))
+
+        if section.startswith('includeif.'):
+            raise UnsupportedGitConfig('Conditional includes require `git`.')
+        elif key == 'include.path':
+            include_path = os.path.expanduser(value)
+            if not os.path.isabs(include_path):
+                include_path = os.path.join(os.path.dirname(path), include_path)
+            parse_config_file(include_path, values, depth + 1)
+        else:
+            values[key] = value
+
+
+def parse_config_value(text, lines, path):
+    # This mirrors `parse_value` in Git's config.c.
+    value = ''
+    spaces = 0
+    quoted = False
+    i = 0
+
+    while True:
+        if i == len(text):
+            if quoted:
+                raise UnsupportedGitConfig('Unterminated quote in `{}`.'.format(path))
+            return value
+
+        c = text[i]
+        i += 1
+
+        if c.isspace() and not quoted:
+            if value:
+                spaces += 1
+            continue
+        elif c in '#;' and not quoted:
+            return value
+
+        value += ' ' * spaces
+        spaces = 0
+
+        if c == '\\':
+            # A trailing backslash continues the value on the next line.
+            if i == len(text):
+                text = next(lines, '')
+                i = 0
+                continue
+
+            c = text[i]
+            i += 1
+            if c == 't':
+                value += '\t'
+            elif c == 'b':
+                value += '\b'
+            elif c == 'n':
+                value += '\n'
+            elif c in '\\"':
+                value += c
+            else:
+                raise UnsupportedGitConfig('Invalid escape sequence in `{}`.'.format(path))
+        elif c == '"':
+            quoted = not quoted
+        else:
+            value += c
@@ -0,0 +1,321 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from tempfile import TemporaryFile, mkdtemp
+
+import toml
+from atomicwrites import atomic_write
+
+from hatch import process
+from hatch.config import BUILD_ENVS_DIR, get_proper_python
+from hatch.env import get_python_info
+from hatch.exceptions import BuildBackendError
+from hatch.utils import (
+    NEED_SUBPROCESS_SHELL, ON_WINDOWS, ensure_dir_exists, remove_path
+)
+from hatch.venv import create_venv, fix_venv, is_venv, locate_exe_dir
+
+# https://www.python.org/dev/peps/pep-0517/#source-trees
+DEFAULT_BUILD_BACKEND = 'setuptools.build_meta:__legacy__'
+BUILD_ENV_VERSION = 1
+
+# Runs in a build env, so it must work on every supported Python.
+HELPER_SCRIPT = """\
+import importlib, json, os, sys, traceback
+
+# Anything the backend prints goes to stderr, keeping stdout for responses.
+responses = os.fdopen(os.dup(1), 'w')
+os.dup2(2, 1)
+sys.stdout = sys.stderr
+
+if sys.path and sys.path[0] == '':
+    del sys.path[0]
+sys.path[:0] = json.loads(sys.argv[2])
+
+module_name, _, object_path = sys.argv[1].partition(':')
+try:
+    backend = importlib.import_module(module_name)
+    for attribute in filter(None, object_path.split('.')):
+        backend = getattr(backend, attribute)
+except Exception:
+    traceback.print_exc()
+    backend = None
+
+for line in iter(sys.stdin.readline, ''):
+    request = json.loads(line)
+    os.chdir(request['cwd'])
+    hook = getattr(backend, request['hook'], None)
+
+    if backend is None:
+        response = {'error': True}
+    elif hook is None:
+        response = {'unsupported': True}
+    else:
+        try:
+            response = {'result': hook(**request['kwargs'])}
+        except (Exception, SystemExit):
+            traceback.print_exc()
+            response = {'error': True}
+
+    responses.write(json.dumps(response) + '\\n')
+    responses.flush()
+"""
+
+__build_env_locks = {}
+__build_env_locks_lock = threading.Lock()
+
+
+def get_build_system(d):
+    """Returns the `[build-system]` table of a project's `pyproject.toml`,
+    with the default backend filled in, or None if it doesn't declare
+    its build requirements.
+    """
+    try:
+        with open(os.path.join(d, 'pyproject.toml'), 'r') as f:
+            build_system = toml.load(f).get('build-system')
+    except (OSError, ValueError):
+        return
+
+    if not isinstance(build_system, dict) or 'requires' not in build_system:
+        return
+
+    return {
+        'requires': list(build_system['requires']),
+        'build-backend': build_system.get('build-backend', DEFAULT_BUILD_BACKEND),
+        'backend-path': list(build_system.get('backend-path', [])),
+    }
+
+
+def get_build_env_lock(env_dir):
+    with __build_env_locks_lock:
+        return __build_env_locks.setdefault(env_dir, threading.Lock())
+
+
+def get_build_env_paths(requires, pypath=None):
+    try:
+        info = get_python_info(pypath)
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        raise BuildBackendError('Unable to use the Python at `{}`.'.format(
+            pypath or get_proper_python()
+        ))
+
+    key = hashlib.sha256(json.dumps({
+        'requires': sorted(requires),
+        'executable': os.path.realpath(info['executable']),
+        'version': info['version'],
+    }, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    env_dir = os.path.join(BUILD_ENVS_DIR, key)
+    return env_dir, env_dir + '.json'
+
+
+def load_build_env_metadata(metadata_file):
+    try:
+        with open(metadata_file, 'r') as f:
+            metadata = json.loads(f.read())
+    except (OSError, ValueError):
+        return
+
+    if metadata.get('version') == BUILD_ENV_VERSION:
+        return metadata
+
+
+def save_build_env_metadata(metadata_file, metadata):
+    with atomic_write(metadata_file, overwrite=True) as f:
+        f.write(json.dumps(metadata, indent=4, sort_keys=True))
+
+
+def get_env_python(env_dir):
+    return os.path.join(locate_exe_dir(env_dir), 'python.exe' if ON_WINDOWS else 'python')
+
+
+def run_build_command(command, verbose=False):
+    """Runs `command`, only showing its output if it fails unless verbose."""
+    if verbose:
+        return process.run(command, shell=NEED_SUBPROCESS_SHELL).returncode
+
+    result = process.run(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        shell=NEED_SUBPROCESS_SHELL
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stdout.decode('utf-8', 'replace'))
+
+    return result.returncode
+
+
+def install_build_requirements(env_dir, requirements, verbose=False):
+    command = [get_env_python(env_dir), '-m', 'pip', 'install', '--disable-pip-version-check']
+    if not verbose:  # no cov
+        command.append('--quiet')
+    command.extend(requirements)
+
+    if run_build_command(command, verbose) != 0:
+        raise BuildBackendError('Unable to install build requirements: {}'.format(
+            ', '.join(requirements)
+        ))
+
+
+def get_build_env(requires, pypath=None, verbose=False):
+    """Returns the location of an isolated virtual env for an interpreter
+    with `requires` installed, creating it only if it doesn't exist yet.
+    """
+    env_dir, metadata_file = get_build_env_paths(requires, pypath)
+
+    with get_build_env_lock(env_dir):
+        if load_build_env_metadata(metadata_file) and is_venv(env_dir):
+            return env_dir
+
+        ensure_dir_exists(BUILD_ENVS_DIR)
+        temp_dir = mkdtemp(prefix='.tmp-', dir=BUILD_ENVS_DIR)
+        location = os.path.join(temp_dir, 'env')
+
+        try:
+            if create_venv(location, pypath, verbose=verbose) != 0:
+                raise BuildBackendError('Unable to create a build environment.')
+            if requires:
+                install_build_requirements(location, requires, verbose)
+
+            remove_path(metadata_file)
+            remove_path(env_dir)
+            os.replace(location, env_dir)
+            fix_venv(env_dir)
+
+            save_build_env_metadata(metadata_file, {
+                'version': BUILD_ENV_VERSION,
+                'requires': sorted(requires),
+                'installed': [],
+            })
+        finally:
+            remove_path(temp_dir)
+
+    return env_dir
+
+
+def ensure_build_requirements(env_dir, requirements, verbose=False):
+    """Installs what a backend asked for in addition to the static build
+    requirements, once per build env.
+    """
+    metadata_file = env_dir + '.json'
+
+    with get_build_env_lock(env_dir):
+        metadata = load_build_env_metadata(metadata_file)
+        if metadata is None:  # no cov
+            raise BuildBackendError('The build environment `{}` is invalid.'.format(env_dir))
+
+        installed = set(metadata['requires']) | set(metadata['installed'])
+        missing = [requirement for requirement in requirements if requirement not in installed]
+        if not missing:
+            return
+
+        install_build_requirements(env_dir, missing, verbose)
+        metadata['installed'] = sorted(set(metadata['installed']) | set(missing))
+        save_build_env_metadata(metadata_file, metadata)
+
+
+class BuildBackend:
+    """Calls the hooks of a project's build backend in a helper process
+    running in its build env, which stays alive between calls.
+    """
+    def __init__(self, d, env_dir, backend, backend_path=(), verbose=False):
+        self.d = os.path.abspath(d)
+        self.env_dir = env_dir
+        self.verbose = verbose
+
+        # Without verbosity, the backend's output is only shown on failure.
+        self.log = None if verbose else TemporaryFile()
+        self.process = process.popen(
+            [
+                get_env_python(env_dir), '-c', HELPER_SCRIPT, backend,
+                json.dumps([os.path.join(self.d, path) for path in backend_path])
+            ],
+            'build backend', cwd=self.d, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=self.log, universal_newlines=True
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def report(self):
+        if self.log is not None:
+            self.log.seek(0)
+            sys.stderr.write(self.log.read().decode('utf-8', 'replace'))
+            self.log.seek(0)
+            self.log.truncate()
+
+    def call(self, hook, kwargs, cwd=None):
+        """Calls a hook, returning a tuple of whether the backend defines
+        it and its result.
+        """
+        try:
+            self.process.stdin.write(json.dumps({
+                'hook': hook, 'kwargs': kwargs, 'cwd': cwd or self.d
+            }) + '\n')
+            self.process.stdin.flush()
+            response = self.process.stdout.readline()
+        except OSError:  # no cov
+            response = ''
+
+        if not response:
+            self.report()
+            raise BuildBackendError('The build backend exited unexpectedly.')
+
+        response = json.loads(response)
+        if 'error' in response:
+            self.report()
+            raise BuildBackendError('The build backend failed to run `{}`.'.format(hook))
+
+        return 'unsupported' not in response, response.get('result')
+
+    def get_requires(self, distribution, config_settings=None, cwd=None):
+        supported, requires = self.call(
+            'get_requires_for_build_{}'.format(distribution),
+            {'config_settings': config_settings},
+            cwd
+        )
+        return requires if supported else []
+
+    def build(self, distribution, directory, config_settings=None, cwd=None):
+        """Builds an sdist or a wheel in `directory`, first installing any
+        requirements the backend needs for it, and returns its file name.
+        """
+        ensure_build_requirements(
+            self.env_dir, self.get_requires(distribution, config_settings, cwd), self.verbose
+        )
+
+        directory = os.path.join(cwd or self.d, directory)
+        ensure_dir_exists(directory)
+
+        supported, name = self.call(
+            'build_{}'.format(distribution),
+            {'{}_directory'.format(distribution): directory, 'config_settings': config_settings},
+            cwd
+        )
+        if not supported:
+            raise BuildBackendError('The build backend does not support building {}s.'.format(
+                distribution
+            ))
+
+        return name
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:  # no cov
+            pass
+        self.process.wait()
+
+        if self.log is not None:
+            self.log.close()
+
+
+def start_build_backend(d, build_system, pypath=None, verbose=False):
+    env_dir = get_build_env(build_system['requires'], pypath, verbose)
+    return BuildBackend(
+        d, env_dir, build_system['build-backend'], build_system['backend-path'], verbose
+    )
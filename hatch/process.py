@@ -0,0 +1,206 @@
+import inspect
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from hatch.trace import add_span, get_timestamp
+
+# `ru_maxrss` is in kilobytes everywhere but macOS.
+MAX_RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+# What runs as `python -m <module>` is named after the module.
+PYTHON_NAMES = ('python', 'pythonw', 'py')
+VERSION_SUFFIX = re.compile(r'\d+(\.\d+)*m?$')
+
+ProcessRecord = namedtuple(
+    'ProcessRecord',
+    ('phase', 'argv', 'wall_time', 'user_time', 'system_time', 'max_rss', 'returncode')
+)
+
+
+def supports_rusage():
+    """Whether the usage of children can be collected, which relies on
+    `subprocess.Popen` waiting for them with `_try_wait(wait_flags)`.
+    """
+    if not hasattr(os, 'wait4'):  # no cov
+        return False
+
+    try:
+        parameters = list(inspect.signature(subprocess.Popen._try_wait).parameters)
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+    return parameters == ['self', 'wait_flags']
+
+
+COLLECT_RUSAGE = supports_rusage()
+
+_records = []
+_records_lock = threading.Lock()
+
+
+def get_records():
+    with _records_lock:
+        return list(_records)
+
+
+def clear_records():
+    with _records_lock:
+        del _records[:]
+
+
+def add_record(record):
+    with _records_lock:
+        _records.append(record)
+
+
+def normalize_executable_name(path):
+    name = os.path.basename(path).lower()
+    if name.endswith('.exe'):
+        name = name[:-4]
+    # pip3, pip3.7, python3.6m...
+    return VERSION_SUFFIX.sub('', name) or name
+
+
+def get_phase(command):
+    """Names what a command does, e.g. `pip` for `pip3 install` or
+    `pytest` for `python -m coverage run -m pytest`.
+    """
+    args = command.split() if isinstance(command, str) else [str(arg) for arg in command]
+    if not args:
+        return 'unknown'
+
+    name = normalize_executable_name(args[0])
+    if name in PYTHON_NAMES:
+        modules = [args[i + 1] for i, arg in enumerate(args[:-1]) if arg == '-m']
+        if modules:
+            return modules[-1]
+        elif len(args) > 1 and os.path.basename(args[1]) == 'setup.py':
+            return 'setup.py'
+
+    return name
+
+
+class Process(subprocess.Popen):
+    """A `subprocess.Popen` that records its argv, duration and exit code
+    once it has exited and been waited for or polled. Where supported, the
+    CPU time and peak memory of the child are recorded too, except when
+    `poll` found it exited.
+    """
+    def __init__(self, args, phase=None, **kwargs):
+        self.phase = phase or get_phase(args)
+        self.rusage = None
+        self.recorded = False
+        self.start_time = time.perf_counter()
+        self.start_timestamp = get_timestamp()
+        super().__init__(args, **kwargs)
+
+    if COLLECT_RUSAGE:
+        def _try_wait(self, wait_flags):
+            # Mirrors `subprocess.Popen._try_wait` to also get the usage.
+            try:
+                pid, sts, rusage = os.wait4(self.pid, wait_flags)
+            except ChildProcessError:  # no cov
+                return self.pid, 0
+
+            if pid == self.pid:
+                self.rusage = rusage
+            return pid, sts
+
+    def wait(self, timeout=None):
+        returncode = super().wait(timeout=timeout)
+        self.record()
+        return returncode
+
+    def poll(self):
+        returncode = super().poll()
+        self.record()
+        return returncode
+
+    def record(self):
+        if self.recorded or self.returncode is None:
+            return
+        self.recorded = True
+
+        rusage = self.rusage
+        record = ProcessRecord(
+            self.phase,
+            self.args if isinstance(self.args, str) else [str(arg) for arg in self.args],
+            time.perf_counter() - self.start_time,
+            rusage.ru_utime if rusage else None,
+            rusage.ru_stime if rusage else None,
+            rusage.ru_maxrss * MAX_RSS_UNIT if rusage else None,
+            self.returncode
+        )
+        add_record(record)
+        add_span(self.phase, 'process', self.start_timestamp, get_timestamp(), {
+            'argv': record.argv,
+            'returncode': record.returncode,
+            'user_time': record.user_time,
+            'system_time': record.system_time,
+            'max_rss': record.max_rss,
+        })
+
+
+def popen(command, phase=None, **kwargs):
+    return Process(command, phase, **kwargs)
+
+
+def run(command, phase=None, input=None, check=False, **kwargs):
+    """Like `subprocess.run`, except the process is recorded."""
+    if input is not None:
+        kwargs['stdin'] = subprocess.PIPE
+
+    with Process(command, phase, **kwargs) as process:
+        try:
+            stdout, stderr = process.communicate(input)
+        except:  # no cov
+            process.kill()
+            raise
+        returncode = process.poll()
+
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, process.args, stdout, stderr)
+
+    return subprocess.CompletedProcess(process.args, returncode, stdout, stderr)
+
+
+def check_output(command, phase=None, **kwargs):
+    return run(command, phase, stdout=subprocess.PIPE, check=True, **kwargs).stdout
+
+
+@contextmanager
+def timed(phase):
+    """Records the duration of work done by this process itself."""
+    start = time.perf_counter()
+    start_timestamp = get_timestamp()
+    try:
+        yield
+    finally:
+        add_record(ProcessRecord(phase, None, time.perf_counter() - start, None, None, None, None))
+        add_span(phase, 'phase', start_timestamp, get_timestamp())
+
+
+def summarize_records(records):
+    """Groups records by phase in the order phases first started,
+    returning the number of processes, total wall, user and system time,
+    and largest peak memory of each. Unknown values are None.
+    """
+    phases = OrderedDict()
+
+    for record in records:
+        summary = phases.setdefault(record.phase, [0, 0.0, None, None, None])
+        summary[0] += 1
+        summary[1] += record.wall_time
+        if record.user_time is not None:
+            summary[2] = (summary[2] or 0.0) + record.user_time
+            summary[3] = (summary[3] or 0.0) + record.system_time
+        if record.max_rss is not None:
+            summary[4] = max(summary[4] or 0, record.max_rss)
+
+    return [(phase, ) + tuple(summary) for phase, summary in phases.items()]
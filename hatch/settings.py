@@ -7,6 +7,7 @@ from appdirs import user_data_dir
 from atomicwrites import atomic_write
 
 from hatch.files.vc.git import get_email, get_user
+from hatch.trace import span
 from hatch.utils import create_file, ensure_dir_exists
 
 SETTINGS_FILE = os.path.join(user_data_dir('hatch', ''), 'settings.json')
@@ -21,8 +22,9 @@ DEFAULT_SETTINGS = OrderedDict([
         ('build', ''),
     ])),
     ('pypi_username', ''),
-    ('name', get_user() or 'U.N. Owen'),
-    ('email', get_email() or 'me@un.known'),
+    # These are resolved lazily, see `copy_default_settings`.
+    ('name', ''),
+    ('email', ''),
     ('basic', True),
     ('pyversions', ['2.7', '3.5', '3.6', 'pypy', 'pypy3']),
     ('licenses', ['mit', 'apache2']),
@@ -64,10 +66,22 @@ DEFAULT_SETTINGS = OrderedDict([
 ])
 
 
+def get_default_name():
+    return get_user() or 'U.N. Owen'
+
+
+def get_default_email():
+    return get_email() or 'me@un.known'
+
+
 def copy_default_settings():
-    return deepcopy(DEFAULT_SETTINGS)
+    settings = deepcopy(DEFAULT_SETTINGS)
+    settings['name'] = get_default_name()
+    settings['email'] = get_default_email()
+    return settings
 
 
+@span('load_settings', 'settings')
 def load_settings(lazy=False):
     if lazy and not os.path.exists(SETTINGS_FILE):
         return {}
@@ -83,4 +97,4 @@ def save_settings(settings):
 
 def restore_settings():
     create_file(SETTINGS_FILE)
-    save_settings(DEFAULT_SETTINGS)
+    save_settings(copy_default_settings())
@@ -2,8 +2,8 @@ import os
 import pexpect
 import shutil
 import signal
-import subprocess
 
+from hatch import process
 from hatch.settings import load_settings
 from hatch.utils import NEED_SUBPROCESS_SHELL, ON_WINDOWS, basepath
 
@@ -15,28 +15,29 @@ def get_terminal_dimensions():
     return lines, columns
 
 
-def cmd_shell(exe_dir, shell_path):
-    result = subprocess.run(
+def cmd_shell(exe_dir, shell_path, env=None):
+    result = process.run(
         [shell_path or 'cmd', '/k', os.path.join(exe_dir, 'activate.bat')],
-        shell=NEED_SUBPROCESS_SHELL
+        env=env, shell=NEED_SUBPROCESS_SHELL
     )
     return result.returncode
 
 
-def ps_shell(exe_dir, shell_path):
-    result = subprocess.run(
+def ps_shell(exe_dir, shell_path, env=None):
+    result = process.run(
         [shell_path or 'powershell', '-executionpolicy', 'bypass', '-NoExit',
          '-NoLogo', '-File', os.path.join(exe_dir, 'activate.ps1')],
-        shell=NEED_SUBPROCESS_SHELL
+        env=env, shell=NEED_SUBPROCESS_SHELL
     )
     return result.returncode
 
 
-def bash_shell(exe_dir, shell_path):
+def bash_shell(exe_dir, shell_path, env=None):
     terminal = pexpect.spawn(
         shell_path or 'bash',
         args=['-i'],
-        dimensions=get_terminal_dimensions()
+        dimensions=get_terminal_dimensions(),
+        env=env
     )
 
     def sigwinch_passthrough(sig, data):
@@ -49,11 +50,12 @@ def bash_shell(exe_dir, shell_path):
     return terminal.exitstatus
 
 
-def fish_shell(exe_dir, shell_path):
+def fish_shell(exe_dir, shell_path, env=None):
     terminal = pexpect.spawn(
         shell_path or 'fish',
         args=['-i'],
-        dimensions=get_terminal_dimensions()
+        dimensions=get_terminal_dimensions(),
+        env=env
     )
 
     def sigwinch_passthrough(sig, data):
@@ -66,11 +68,12 @@ def fish_shell(exe_dir, shell_path):
     return terminal.exitstatus
 
 
-def zsh_shell(exe_dir, shell_path):
+def zsh_shell(exe_dir, shell_path, env=None):
     terminal = pexpect.spawn(
         shell_path or 'zsh',
         args=['-i'],
-        dimensions=get_terminal_dimensions()
+        dimensions=get_terminal_dimensions(),
+        env=env
     )
 
     def sigwinch_passthrough(sig, data):
@@ -83,19 +86,20 @@ def zsh_shell(exe_dir, shell_path):
     return terminal.exitstatus
 
 
-def xonsh_shell(exe_dir, shell_path):
+def xonsh_shell(exe_dir, shell_path, env=None):
     if ON_WINDOWS:
-        result = subprocess.run(
+        result = process.run(
             [shell_path or 'xonsh', '-i', '-D',
              'VIRTUAL_ENV={}'.format(os.path.dirname(exe_dir))],
-            shell=NEED_SUBPROCESS_SHELL
+            env=env, shell=NEED_SUBPROCESS_SHELL
         )
         return result.returncode
     else:
         terminal = pexpect.spawn(
             shell_path or 'xonsh',
             args=['-i', '-D', 'VIRTUAL_ENV={}'.format(os.path.dirname(exe_dir))],
-            dimensions=get_terminal_dimensions()
+            dimensions=get_terminal_dimensions(),
+            env=env
         )
 
         def sigwinch_passthrough(sig, data):
@@ -110,11 +114,12 @@ def xonsh_shell(exe_dir, shell_path):
         return terminal.exitstatus
 
 
-def tcsh_shell(exe_dir, shell_path):
+def tcsh_shell(exe_dir, shell_path, env=None):
     terminal = pexpect.spawn(
         shell_path or 'tcsh',
         args=['-i'],
-        dimensions=get_terminal_dimensions()
+        dimensions=get_terminal_dimensions(),
+        env=env
     )
 
     def sigwinch_passthrough(sig, data):
@@ -127,11 +132,12 @@ def tcsh_shell(exe_dir, shell_path):
     return terminal.exitstatus
 
 
-def csh_shell(exe_dir, shell_path):
+def csh_shell(exe_dir, shell_path, env=None):
     terminal = pexpect.spawn(
         shell_path or 'csh',
         args=['-i'],
-        dimensions=get_terminal_dimensions()
+        dimensions=get_terminal_dimensions(),
+        env=env
     )
 
     def sigwinch_passthrough(sig, data):
@@ -144,8 +150,8 @@ def csh_shell(exe_dir, shell_path):
     return terminal.exitstatus
 
 
-def unknown_shell(shell_name):
-    result = subprocess.run(shell_name.split(), shell=NEED_SUBPROCESS_SHELL)
+def unknown_shell(shell_name, env=None):
+    result = process.run(shell_name.split(), env=env, shell=NEED_SUBPROCESS_SHELL)
     return result.returncode
 
 
@@ -181,7 +187,7 @@ def get_default_shell_info(shell_name=None, settings=None):
     return shell_name, None
 
 
-def run_shell(exe_dir, shell_name=None):
+def run_shell(exe_dir, shell_name=None, env=None):
     shell_name, shell_path = get_default_shell_info(shell_name)
     shell = SHELL_COMMANDS.get(shell_name)
-    return shell(exe_dir, shell_path) if shell else unknown_shell(shell_name)
+    return shell(exe_dir, shell_path, env) if shell else unknown_shell(shell_name, env)
@@ -0,0 +1,257 @@
+import os
+import re
+
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.version import InvalidVersion, Version
+
+from hatch.exceptions import RequirementsError
+from hatch.utils import normalize_package_name
+
+# Options that apply to the whole `pip install`, and whether they take a value.
+PIP_OPTIONS = {
+    '-i': True,
+    '--index-url': True,
+    '--extra-index-url': True,
+    '--no-index': False,
+    '-f': True,
+    '--find-links': True,
+    '--trusted-host': True,
+    '--pre': False,
+    '--prefer-binary': False,
+    '--only-binary': True,
+    '--no-binary': True,
+    '--require-hashes': False,
+}
+
+# Never removed, as these are how envs are managed in the first place.
+PROTECTED_PACKAGES = {
+    normalize_package_name(name) for name in ('hatch', 'pip', 'setuptools', 'wheel')
+}
+ARCHIVE_EXTENSIONS = ('.whl', '.zip', '.tar.gz', '.tar.bz2', '.tgz')
+
+EGG_FRAGMENT = re.compile(r'[#&]egg=([^&]+)')
+
+
+def iter_lines(path):
+    """Yields the lines of a requirements file without comments, joining
+    those continued with a backslash.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        contents = f.read()
+
+    for line in re.sub(r'\\\r?\n', '', contents).splitlines():
+        line = re.sub(r'(^|\s+)#.*$', '', line).strip()
+        if line:
+            yield line
+
+
+def split_option(line):
+    """Splits a line starting with an option into the option and its value,
+    which may be attached as in `-rfile` or `--requirement=file`.
+    """
+    if line.startswith('--'):
+        option, sep, value = line.partition('=')
+        if not sep:
+            option, _, value = line.partition(' ')
+    else:
+        option, value = line[:2], line[2:]
+
+    return option.strip(), value.strip()
+
+
+def is_url(value):
+    return '://' in value or value.startswith(('git+', 'hg+', 'svn+', 'bzr+'))
+
+
+def resolve_location(value, d):
+    return value if is_url(value) else os.path.normpath(os.path.join(d, value))
+
+
+def new_requirements():
+    return {
+        'requirements': [],
+        'constraints': [],
+        'constraint_files': [],
+        'editables': [],
+        'unnamed': [],
+        'options': [],
+    }
+
+
+def parse_requirements(path, parsed=None, constraint=False, seen=None):
+    """Parses a requirements file like pip does, following `-r` and `-c`
+    includes, raising `RequirementsError` for anything it doesn't know.
+    """
+    parsed = parsed if parsed is not None else new_requirements()
+    seen = seen if seen is not None else set()
+    path = os.path.abspath(path)
+    d = os.path.dirname(path)
+
+    if path in seen:
+        return parsed
+    seen.add(path)
+
+    try:
+        lines = list(iter_lines(path))
+    except OSError:
+        raise RequirementsError('Unable to read `{}`.'.format(path))
+
+    for line in lines:
+        if line.startswith('-'):
+            option, value = split_option(line)
+
+            if option in ('-r', '--requirement'):
+                parse_requirements(os.path.join(d, value), parsed, constraint, seen)
+            elif option in ('-c', '--constraint'):
+                parsed['constraint_files'].append(os.path.join(d, value))
+                parse_requirements(os.path.join(d, value), parsed, True, seen)
+            elif option in ('-e', '--editable'):
+                parsed['editables'].append(resolve_location(value, d))
+            elif option in PIP_OPTIONS:
+                if not constraint:
+                    parsed['options'].extend([option, value] if PIP_OPTIONS[option] else [option])
+            else:
+                raise RequirementsError('Unknown option `{}` in `{}`.'.format(option, path))
+            continue
+
+        # Options of single requirements, like `--hash`, don't matter here.
+        line = re.split(r'\s+--?[a-z]', line, maxsplit=1)[0]
+
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            if (
+                os.sep in line or '/' in line or line.startswith('.') or
+                is_url(line) or line.endswith(ARCHIVE_EXTENSIONS)
+            ):
+                parsed['unnamed'].append(resolve_location(line, d))
+                continue
+            raise RequirementsError('Invalid requirement `{}` in `{}`.'.format(line, path))
+
+        parsed['constraints' if constraint else 'requirements'].append(requirement)
+
+    return parsed
+
+
+def get_requirements_files(path):
+    """Returns a requirements file and every file it includes with `-r` or
+    `-c`, as far as they can be parsed.
+    """
+    seen = set()
+    try:
+        parse_requirements(path, seen=seen)
+    except RequirementsError:
+        pass
+
+    return sorted(seen)
+
+
+def satisfies(version, specifier):
+    try:
+        return specifier.contains(Version(version), prereleases=True)
+    except InvalidVersion:
+        return False
+
+
+def applies(requirement, markers, extras=('', )):
+    return requirement.marker is None or any(
+        requirement.marker.evaluate(dict(markers, extra=extra)) for extra in extras
+    )
+
+
+def get_editable_name(location):
+    match = EGG_FRAGMENT.search(location)
+    if match:
+        return normalize_package_name(match.group(1))
+
+
+def is_editable_installed(location, distributions):
+    if is_url(location):
+        name = get_editable_name(location)
+        return name is not None and any(
+            dist['editable'] and normalize_package_name(dist['name']) == name
+            for dist in distributions
+        )
+
+    location = os.path.normcase(os.path.realpath(location))
+    return any(
+        dist['editable'] and os.path.normcase(os.path.realpath(dist['location'])) == location
+        for dist in distributions
+    )
+
+
+def get_missing_requirements(parsed, distributions, markers):
+    """Returns the arguments to `pip install` for everything that is not
+    installed or whose installed version doesn't satisfy the requirements,
+    without running pip. Unnamed requirements are always included.
+    """
+    installed = {normalize_package_name(dist['name']): dist for dist in distributions}
+    constraints = {}
+    for constraint in parsed['constraints']:
+        if applies(constraint, markers):
+            name = normalize_package_name(constraint.name)
+            constraints[name] = constraints.get(name, constraint.specifier) & constraint.specifier
+
+    missing = []
+    for requirement in parsed['requirements']:
+        if not applies(requirement, markers):
+            continue
+
+        name = normalize_package_name(requirement.name)
+        specifier = requirement.specifier
+        if name in constraints:
+            specifier &= constraints[name]
+
+        dist = installed.get(name)
+        if dist is None or not satisfies(dist['version'], specifier):
+            missing.append(str(requirement))
+
+    for location in parsed['editables']:
+        if not is_editable_installed(location, distributions):
+            missing.extend(['-e', location])
+
+    missing.extend(parsed['unnamed'])
+    return missing
+
+
+def get_unrequired_distributions(parsed, distributions, markers, prefix, protected=()):
+    """Returns the names of the distributions installed under `prefix` that
+    neither the requirements, editable installs nor the `protected` ones
+    need, directly or not.
+    """
+    protected = PROTECTED_PACKAGES.union(map(normalize_package_name, protected))
+    installed = {normalize_package_name(dist['name']): dist for dist in distributions}
+    required = {}
+    pending = [
+        (normalize_package_name(requirement.name), set(requirement.extras))
+        for requirement in parsed['requirements'] if applies(requirement, markers)
+    ]
+    pending.extend(
+        (name, set()) for name, dist in installed.items()
+        if dist['editable'] or name in protected
+    )
+
+    while pending:
+        name, extras = pending.pop()
+        if name in required and extras <= required[name]:
+            continue
+        required[name] = required.get(name, set()) | extras
+
+        dist = installed.get(name)
+        if dist is None:
+            continue
+
+        for requires in dist['requires']:
+            try:
+                requirement = Requirement(requires)
+            except InvalidRequirement:  # no cov
+                continue
+            if applies(requirement, markers, [''] + sorted(required[name])):
+                pending.append((normalize_package_name(requirement.name), set(requirement.extras)))
+
+    prefix = os.path.join(os.path.normcase(os.path.realpath(prefix)), '')
+    return sorted(
+        dist['name'] for name, dist in installed.items()
+        if name not in required and
+        os.path.normcase(os.path.realpath(dist['location'])).startswith(prefix)
+    )
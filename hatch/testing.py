@@ -0,0 +1,461 @@
+import codecs
+import heapq
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+
+from atomicwrites import atomic_write
+from coverage import CoverageData, CoverageException
+
+from hatch.config import PROJECT_STATE_DIR
+from hatch.context import ExecutionContext
+from hatch.utils import ensure_dir_exists
+
+TEST_HISTORY_VERSION = 1
+
+# Longer lines of output are relayed in pieces, keeping memory use flat.
+RELAY_CHUNK_SIZE = 64 * 1024
+
+# Tests without history are assumed to take this long.
+DEFAULT_TEST_DURATION = 0.1
+
+PYTEST_PLUGIN_NAME = 'hatch_pytest_plugin'
+
+TEST_ORDERS = ('failed-first', 'longest-first')
+FAILED_OUTCOMES = ('failed', 'error')
+
+# Loaded by pytest in the environment being tested, so it must work on
+# every supported Python and can't depend on Hatch being installed there.
+PYTEST_PLUGIN = """\
+import json
+import os
+
+import pytest
+
+results = None
+
+
+def is_selected(item, selected):
+    # A file's path selects all of its tests.
+    return item.nodeid in selected or item.nodeid.split('::')[0] in selected
+
+
+# Only what's left after other plugins, e.g. `-k`, have deselected tests.
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(session, config, items):
+    select_file = os.environ.get('HATCH_TEST_SELECT')
+    if select_file:
+        with open(select_file, 'r') as f:
+            selected = set(f.read().splitlines())
+        deselected = [item for item in items if not is_selected(item, selected)]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item in items if is_selected(item, selected)]
+
+    order_file = os.environ.get('HATCH_TEST_ORDER')
+    if order_file:
+        with open(order_file, 'r') as f:
+            order = json.load(f)
+        priorities = order['priorities']
+        items.sort(key=lambda item: priorities.get(item.nodeid, order['default']))
+
+    collect_file = os.environ.get('HATCH_TEST_COLLECT')
+    if collect_file:
+        with open(collect_file, 'w') as f:
+            f.write(''.join(item.nodeid + '\\n' for item in items))
+
+
+# Coverage of each test is recorded in a context named after it.
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    coverage = None
+    if os.environ.get('HATCH_TEST_CONTEXTS'):
+        try:
+            from coverage import Coverage
+        except ImportError:
+            pass
+        else:
+            coverage = getattr(Coverage, 'current', lambda: None)()
+
+    # Versions of coverage before 5 can't do this.
+    if not hasattr(coverage, 'switch_context'):
+        coverage = None
+
+    if coverage is not None:
+        coverage.switch_context(item.nodeid)
+    yield
+    if coverage is not None:
+        coverage.switch_context('')
+
+
+def pytest_runtest_logreport(report):
+    global results
+
+    results_file = os.environ.get('HATCH_TEST_RESULTS')
+    if not results_file:
+        return
+
+    if results is None:
+        results = open(results_file, 'a')
+
+    results.write(json.dumps({
+        'nodeid': report.nodeid,
+        'when': report.when,
+        'outcome': report.outcome,
+        'duration': getattr(report, 'duration', 0.0),
+    }) + '\\n')
+    results.flush()
+"""
+
+
+def install_pytest_plugin(d):
+    """Writes the plugin to `d`, returning the environment variables that
+    make it importable with `-p hatch_pytest_plugin`.
+    """
+    with open(os.path.join(d, PYTEST_PLUGIN_NAME + '.py'), 'w') as f:
+        f.write(PYTEST_PLUGIN)
+
+    python_path = os.environ.get('PYTHONPATH')
+    return {'PYTHONPATH': os.pathsep.join([d] + ([python_path] if python_path else []))}
+
+
+def get_test_priorities(history, order):
+    """Returns the sort key of each test in the history for an ordering,
+    along with the key of tests that have never run.
+    """
+    tests = history['tests']
+
+    if order == 'failed-first':
+        return {
+            nodeid: 0 if test['outcome'] in FAILED_OUTCOMES else 1
+            for nodeid, test in tests.items()
+        }, 1
+
+    return {nodeid: -test['duration'] for nodeid, test in tests.items()}, -DEFAULT_TEST_DURATION
+
+
+def install_test_order(d, history, order):
+    """Writes the priorities of tests to `d`, returning the environment
+    variables that make the plugin run tests in that order.
+    """
+    priorities, default = get_test_priorities(history, order)
+    order_file = os.path.join(d, 'order.json')
+
+    with open(order_file, 'w') as f:
+        f.write(json.dumps({'priorities': priorities, 'default': default}))
+
+    return {'HATCH_TEST_ORDER': order_file}
+
+
+def split_junit_args(args):
+    """Removes the options asking pytest for a JUnit XML report from `args`,
+    returning the rest and the report's path, if any.
+    """
+    remaining = []
+    junit_file = None
+
+    args = iter(args)
+    for arg in args:
+        option, _, value = arg.partition('=')
+        if option in ('--junitxml', '--junit-xml'):
+            junit_file = value or next(args, None)
+        else:
+            remaining.append(arg)
+
+    return remaining, junit_file
+
+
+def get_test_history_file(d):
+    return os.path.join(d, PROJECT_STATE_DIR, 'tests.json')
+
+
+def load_test_history(d):
+    try:
+        with open(get_test_history_file(d), 'r') as f:
+            history = json.loads(f.read())
+    except (OSError, ValueError):
+        history = {}
+
+    if history.get('version') != TEST_HISTORY_VERSION:
+        history = {'version': TEST_HISTORY_VERSION, 'tests': {}}
+
+    return history
+
+
+def save_test_history(d, history):
+    history_file = get_test_history_file(d)
+
+    try:
+        ensure_dir_exists(os.path.dirname(history_file))
+        with atomic_write(history_file, overwrite=True) as f:
+            f.write(json.dumps(history, indent=4, sort_keys=True))
+    except OSError:  # no cov
+        pass
+
+
+def read_test_results(path):
+    """Aggregates the phase reports written by the plugin into the total
+    duration and outcome of each test.
+    """
+    results = {}
+
+    try:
+        with open(path, 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return results
+
+    for line in lines:
+        try:
+            report = json.loads(line)
+        except ValueError:  # no cov
+            continue
+
+        result = results.setdefault(report['nodeid'], {'outcome': 'passed', 'duration': 0.0})
+        result['duration'] += report['duration']
+
+        if report['outcome'] == 'failed':
+            result['outcome'] = 'failed' if report['when'] == 'call' else 'error'
+        elif report['outcome'] == 'skipped' and result['outcome'] == 'passed':
+            result['outcome'] = 'skipped'
+
+    return results
+
+
+def update_test_history(history, results):
+    """Records the latest results, keeping those of the run before so
+    that changes in duration can be reported.
+    """
+    for nodeid, result in results.items():
+        previous = history['tests'].get(nodeid, {})
+        history['tests'][nodeid] = {
+            'duration': round(result['duration'], 6),
+            'outcome': result['outcome'],
+            'previous_duration': previous.get('duration'),
+            'previous_outcome': previous.get('outcome'),
+        }
+
+
+def get_slowest_tests(history, results, count):
+    """Returns the node ID, duration and previous duration of the `count`
+    slowest tests that ran, after the history was updated with them.
+    """
+    slowest = sorted(results, key=lambda nodeid: -results[nodeid]['duration'])[:count]
+    return [
+        (
+            nodeid,
+            history['tests'][nodeid]['duration'],
+            history['tests'][nodeid].get('previous_duration'),
+        )
+        for nodeid in slowest
+    ]
+
+
+def shard_tests(node_ids, history, count):
+    """Splits tests into at most `count` shards of about equal expected
+    duration, by always giving the next longest test to the shard with
+    the least work. Each shard keeps the tests' collection order.
+    """
+    order = {nodeid: i for i, nodeid in enumerate(node_ids)}
+    durations = {
+        nodeid: history['tests'].get(nodeid, {}).get('duration', DEFAULT_TEST_DURATION)
+        for nodeid in node_ids
+    }
+
+    shards = [(0.0, i, []) for i in range(min(count, len(node_ids)))]
+    for nodeid in sorted(node_ids, key=lambda nodeid: (-durations[nodeid], order[nodeid])):
+        total, i, shard = heapq.heappop(shards)
+        shard.append(nodeid)
+        heapq.heappush(shards, (total + durations[nodeid], i, shard))
+
+    return [sorted(shard, key=order.get) for _, _, shard in sorted(shards, key=lambda s: s[1])]
+
+
+def normalize_path(path):
+    return os.path.normcase(os.path.realpath(path))
+
+
+def read_coverage_contexts(data_file):
+    """Returns the files each test executed, based on the coverage contexts
+    recorded by the plugin, or None if the data can't be read.
+    """
+    contexts = {}
+
+    try:
+        data = CoverageData(data_file)
+        data.read()
+        for filename in data.measured_files():
+            path = normalize_path(filename)
+            for names in data.contexts_by_lineno(filename).values():
+                for name in names:
+                    if name:
+                        contexts.setdefault(name, set()).add(path)
+    # The data may have been written by an incompatible version.
+    except (AttributeError, OSError, CoverageException):
+        return
+
+    return contexts
+
+
+def select_affected_tests(coverage_map, changed, d):
+    """Returns the node IDs of the tests that executed any of the changed
+    files, along with the paths of changed test files relative to `d` so
+    their new tests run too. Returns None if a change can't be tied to any
+    test, e.g. a new module or a configuration file, as everything should
+    run then.
+    """
+    changed = {normalize_path(path) for path in changed}
+    covered = set()
+    test_files = {}
+
+    for nodeid, files in coverage_map.items():
+        covered |= files
+        test_file = nodeid.split('::')[0]
+        test_files[normalize_path(os.path.join(d, test_file))] = test_file
+
+    selected = set()
+    for path in changed:
+        if path in test_files:
+            selected.add(test_files[path])
+        elif path not in covered:
+            return
+
+    selected.update(
+        nodeid for nodeid, files in coverage_map.items() if not files.isdisjoint(changed)
+    )
+    return sorted(selected)
+
+
+def merge_junit_files(paths, target, elapsed):
+    """Combines the JUnit XML reports of shards into a single test suite."""
+    merged = ElementTree.Element('testsuite', name='pytest')
+    counts = dict.fromkeys(('errors', 'failures', 'skipped', 'tests'), 0)
+
+    for path in paths:
+        try:
+            root = ElementTree.parse(path).getroot()
+        except (OSError, ElementTree.ParseError):
+            continue
+
+        for suite in ([root] if root.tag == 'testsuite' else root.findall('testsuite')):
+            for key in counts:
+                counts[key] += int(suite.get(key, 0))
+            merged.extend(suite)
+
+    for key, value in counts.items():
+        merged.set(key, str(value))
+    merged.set('time', '{:.3f}'.format(elapsed))
+
+    root = ElementTree.Element('testsuites')
+    root.append(merged)
+    ensure_dir_exists(os.path.dirname(os.path.abspath(target)))
+    ElementTree.ElementTree(root).write(target, encoding='utf-8', xml_declaration=True)
+
+
+def relay_stream(stream, callback):
+    """Passes the text of a binary stream to `callback` a line at a time
+    as it arrives.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+
+    for chunk in iter(lambda: stream.readline(RELAY_CHUNK_SIZE), b''):
+        callback(decoder.decode(chunk))
+
+    remaining = decoder.decode(b'', final=True)
+    if remaining:  # no cov
+        callback(remaining)
+
+
+def start_thread(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+class OutputRelay:
+    """Forwards the output of processes to this process' stdout and stderr
+    as it arrives, rather than only once they exit, and optionally copies
+    it to a file.
+    """
+    def __init__(self, tee_file=None):
+        self.lock = threading.Lock()
+        self.tee = open(tee_file, 'w', encoding='utf-8') if tee_file else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, text, err=False):
+        with self.lock:
+            # Looked up every time as Click may have replaced them.
+            stream = sys.stderr if err else sys.stdout
+            stream.write(text)
+            stream.flush()
+
+            if self.tee is not None:
+                self.tee.write(text)
+                self.tee.flush()
+
+    def run(self, command, context=None):
+        """Runs `command` in `context`, relaying its stdout and stderr
+        separately, and returns its exit code.
+        """
+        process = (context or ExecutionContext()).popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        threads = [
+            start_thread(relay_stream, process.stdout, self.write),
+            start_thread(relay_stream, process.stderr, lambda text: self.write(text, err=True)),
+        ]
+        for thread in threads:
+            thread.join()
+
+        return process.wait()
+
+    def close(self):
+        if self.tee is not None:
+            self.tee.close()
+            self.tee = None
+
+
+def run_shards(commands, contexts, callback):
+    """Runs each shard's command at once in its context, passing every line
+    of output to `callback` with the shard's number as it arrives. Returns
+    each shard's exit code and duration.
+    """
+    lock = threading.Lock()
+    results = [None] * len(commands)
+
+    def relay(i, text):
+        with lock:
+            callback(i + 1, text.rstrip('\r\n'))
+
+    def watch(i, process, start):
+        relay_stream(process.stdout, lambda text: relay(i, text))
+        results[i] = (process.wait(), time.time() - start)
+
+    threads = []
+    for i, (command, context) in enumerate(zip(commands, contexts)):
+        start = time.time()
+        process = context.popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        threads.append(start_thread(watch, i, process, start))
+
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+def combine_exit_codes(exit_codes):
+    # pytest exits with 5 when a shard had nothing to run.
+    failures = [code for code in exit_codes if code not in (0, 5)]
+    if failures:
+        return failures[0]
+    return 5 if all(code == 5 for code in exit_codes) else 0
@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Setting this to a path writes a Trace Event Format file there, which
+# chrome://tracing and https://ui.perfetto.dev can open.
+TRACE_ENV_VAR = 'HATCH_TRACE'
+
+_events = []
+_events_lock = threading.Lock()
+
+
+def get_trace_file():
+    return os.environ.get(TRACE_ENV_VAR) or None
+
+
+def tracing():
+    return get_trace_file() is not None
+
+
+def get_timestamp():
+    # Trace events are timed in microseconds.
+    return time.perf_counter() * 10**6
+
+
+def add_span(name, category, start, end, args=None):
+    """Records a complete event between timestamps from `get_timestamp`."""
+    if not tracing():
+        return
+
+    event = {
+        'name': name,
+        'cat': category,
+        'ph': 'X',
+        'ts': start,
+        'dur': end - start,
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+    }
+    if args:
+        event['args'] = args
+
+    with _events_lock:
+        _events.append(event)
+
+
+@contextmanager
+def span(name, category, args=None):
+    """Records the time spent in a block or, as a decorator, a function.
+    Nothing is recorded unless tracing is enabled.
+    """
+    if not tracing():
+        yield
+        return
+
+    start = get_timestamp()
+    try:
+        yield
+    finally:
+        add_span(name, category, start, get_timestamp(), args)
+
+
+def get_events():
+    with _events_lock:
+        return list(_events)
+
+
+def clear_events():
+    with _events_lock:
+        del _events[:]
+
+
+def write_trace(path):
+    """Writes every recorded event to `path`, naming the process and the
+    threads that recorded them.
+    """
+    events = get_events()
+    pid = os.getpid()
+    metadata = [{
+        'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+        'args': {'name': 'hatch'},
+    }]
+    main_thread = threading.main_thread().ident
+    for tid in sorted({event['tid'] for event in events}):
+        metadata.append({
+            'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+            'args': {'name': 'main' if tid == main_thread else 'thread-{}'.format(tid)},
+        })
+
+    with open(path, 'w') as f:
+        f.write(json.dumps({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}))
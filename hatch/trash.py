@@ -0,0 +1,228 @@
+import os
+import stat
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from atomicwrites import atomic_write
+
+import hatch
+from hatch import process
+from hatch.config import TRASH_DIR
+from hatch.utils import ON_WINDOWS, ensure_dir_exists, remove_path
+
+# Directories on another file system than `TRASH_DIR` are moved into a
+# trash by this name next to them, which is removed once emptied. Such
+# trashes are listed in a file next to `TRASH_DIR` until then, so those
+# left behind by workers that died are emptied by the next removal.
+LOCAL_TRASH_NAME = '.hatch-trash'
+LOCAL_TRASHES_FILE_NAME = 'local-trashes.txt'
+
+# Run with the directory containing this copy of Hatch as an argument, so
+# the worker imports it without changing `PYTHONPATH` for anything else.
+WORKER_SCRIPT = (
+    'import sys; sys.path.insert(0, sys.argv[1]); '
+    'from hatch.trash import empty_trash; empty_trash(sys.argv[2:])'
+)
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    # Windows refuses to remove read-only files.
+    except PermissionError:  # no cov
+        os.chmod(path, stat.S_IWRITE)
+        os.remove(path)
+
+
+def remove_files(paths):
+    for path in paths:
+        remove_file(path)
+
+
+def delete_tree(path, executor):
+    """Removes the directory `path`, unlinking each directory's files
+    on the executor's threads.
+    """
+    directories = []
+    futures = []
+
+    pending = [path]
+    while pending:
+        d = pending.pop()
+        directories.append(d)
+        files = []
+
+        try:
+            entries = list(os.scandir(d))
+        except FileNotFoundError:  # no cov
+            continue
+
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(entry.path)
+            else:
+                files.append(entry.path)
+
+        if files:
+            futures.append(executor.submit(remove_files, files))
+
+    for future in futures:
+        future.result()
+
+    # Children always come after their parents.
+    for d in reversed(directories):
+        try:
+            os.rmdir(d)
+        except FileNotFoundError:  # no cov
+            pass
+
+
+def get_trash_dir(path):
+    """Returns a trash on the same file system as `path`, so that it can
+    be moved there.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    ensure_dir_exists(TRASH_DIR)
+    if os.stat(parent).st_dev == os.stat(TRASH_DIR).st_dev:
+        return TRASH_DIR
+    return os.path.join(parent, LOCAL_TRASH_NAME)
+
+
+def get_local_trashes_file():
+    # Looked up every time so it always accompanies `TRASH_DIR`.
+    return os.path.join(os.path.dirname(TRASH_DIR), LOCAL_TRASHES_FILE_NAME)
+
+
+def load_local_trashes():
+    try:
+        with open(get_local_trashes_file(), 'r', encoding='utf-8') as f:
+            return [line for line in f.read().splitlines() if line]
+    except OSError:
+        return []
+
+
+def save_local_trashes(trash_dirs):
+    try:
+        ensure_dir_exists(os.path.dirname(TRASH_DIR))
+        with atomic_write(get_local_trashes_file(), overwrite=True, encoding='utf-8') as f:
+            f.write(''.join('{}\n'.format(trash_dir) for trash_dir in trash_dirs))
+    except OSError:  # no cov
+        pass
+
+
+def get_trash_dirs():
+    """Returns `TRASH_DIR` and every trash on another file system that
+    has yet to be removed.
+    """
+    return [TRASH_DIR] + [
+        trash_dir for trash_dir in load_local_trashes() if trash_dir != TRASH_DIR
+    ]
+
+
+def empty_trash(trash_dirs=None, workers=None):
+    """Deletes everything in the trashes, by default all of those from
+    `get_trash_dirs`, including anything left over by interrupted
+    removals. Trashes other than `TRASH_DIR` are removed as well.
+    """
+    trash_dirs = trash_dirs or get_trash_dirs()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for trash_dir in trash_dirs:
+            try:
+                entries = list(os.scandir(trash_dir))
+            except FileNotFoundError:  # no cov
+                continue
+
+            for entry in entries:
+                # Another process may be emptying it too.
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        delete_tree(entry.path, executor)
+                    else:  # no cov
+                        remove_file(entry.path)
+                except OSError:  # no cov
+                    pass
+
+            if trash_dir != TRASH_DIR:
+                try:
+                    os.rmdir(trash_dir)
+                except OSError:  # no cov
+                    pass
+
+    removed = [
+        trash_dir for trash_dir in trash_dirs
+        if trash_dir != TRASH_DIR and not os.path.exists(trash_dir)
+    ]
+    if removed:
+        save_local_trashes([
+            trash_dir for trash_dir in load_local_trashes() if trash_dir not in removed
+        ])
+
+
+def spawn_trash_worker(trash_dirs):
+    kwargs = {}
+    if ON_WINDOWS:  # no cov
+        kwargs['creationflags'] = (
+            subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        )
+    else:
+        kwargs['start_new_session'] = True
+
+    hatch_root = os.path.dirname(os.path.dirname(os.path.abspath(hatch.__file__)))
+    process.popen(
+        [sys.executable, '-c', WORKER_SCRIPT, hatch_root] + list(trash_dirs), 'trash',
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        close_fds=True, **kwargs
+    )
+
+
+def remove_paths(paths, wait=False, workers=None):
+    """Removes paths, returning them once none exist at their original
+    location. Directories are first moved into a trash on the same file
+    system, which is then emptied by a pool of threads in a separate
+    process unless waiting.
+
+    Directories that can't be moved, e.g. because their parent isn't
+    writable, are removed directly.
+    """
+    removed = []
+    trash_dirs = []
+
+    for path in paths:
+        if os.path.isdir(path) and not os.path.islink(path):
+            try:
+                trash_dir = get_trash_dir(path)
+                if trash_dir != TRASH_DIR and trash_dir not in load_local_trashes():
+                    save_local_trashes(load_local_trashes() + [trash_dir])
+                ensure_dir_exists(trash_dir)
+                os.rename(path, os.path.join(
+                    trash_dir, '{}-{}'.format(uuid4().hex, os.path.basename(path))
+                ))
+                if trash_dir not in trash_dirs:
+                    trash_dirs.append(trash_dir)
+            except OSError:
+                remove_path(path)
+        else:
+            remove_path(path)
+
+        removed.append(path)
+
+    # Trashes left behind by earlier removals are emptied too.
+    if trash_dirs:
+        trash_dirs.extend(
+            trash_dir for trash_dir in get_trash_dirs() if trash_dir not in trash_dirs
+        )
+        if wait:
+            empty_trash(trash_dirs, workers)
+        else:
+            spawn_trash_worker(trash_dirs)
+
+    return removed
+
+
+if __name__ == '__main__':
+    empty_trash(sys.argv[1:])
@@ -0,0 +1,451 @@
+import hashlib
+import io
+import json
+import os
+import re
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.parser import HeaderParser
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from uuid import uuid4
+
+import requests
+from atomicwrites import atomic_write
+from requests.adapters import HTTPAdapter
+
+import hatch
+from hatch.config import UPLOAD_LEDGER_FILE
+from hatch.utils import ensure_dir_exists
+
+DISTRIBUTION_EXTENSIONS = ('.whl', '.tar.gz', '.zip')
+
+HASH_BUFFER_SIZE = 1024 * 1024
+
+DEFAULT_UPLOAD_JOBS = 4
+UPLOAD_ATTEMPTS = 4
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+UPLOAD_LEDGER_VERSION = 1
+
+# Upload APIs whose simple index is served by a different host.
+SIMPLE_INDEX_HOSTS = {
+    'upload.pypi.org': 'pypi.org',
+}
+SIMPLE_INDEX_ACCEPT = 'application/vnd.pypi.simple.v1+json, text/html;q=0.1'
+SIMPLE_INDEX_ANCHOR = re.compile(r'<a\s([^>]*)>\s*([^<]+?)\s*</a>', re.IGNORECASE)
+SIMPLE_INDEX_SHA256 = re.compile(r'#sha256=([0-9a-fA-F]{64})\b')
+
+# Metadata fields that may appear multiple times, and what the
+# upload API calls them.
+MULTIPLE_USE_FIELDS = {
+    'classifier': 'classifiers',
+    'dynamic': 'dynamic',
+    'license-file': 'license_file',
+    'obsoletes-dist': 'obsoletes_dist',
+    'platform': 'platform',
+    'project-url': 'project_urls',
+    'provides-dist': 'provides_dist',
+    'provides-extra': 'provides_extras',
+    'requires-dist': 'requires_dist',
+    'requires-external': 'requires_external',
+    'supported-platform': 'supported_platform',
+}
+RENAMED_FIELDS = {
+    'home-page': 'home_page',
+    'metadata-version': 'metadata_version',
+}
+
+
+class UploadResult:
+    def __init__(self, path, status, size=0, elapsed=0.0, attempts=0, message='', sha256=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.status = status
+        self.size = size
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.message = message
+        self.sha256 = sha256
+
+    @property
+    def throughput(self):
+        return self.size / self.elapsed if self.elapsed else 0.0
+
+
+def get_distributions(d):
+    return sorted(
+        os.path.join(d, name) for name in os.listdir(d)
+        if name.endswith(DISTRIBUTION_EXTENSIONS) and os.path.isfile(os.path.join(d, name))
+    )
+
+
+def hash_distribution(path):
+    """Computes every digest the upload API accepts in a single pass
+    over the file, without ever reading it whole.
+    """
+    hashers = {
+        'md5_digest': hashlib.md5(),
+        'sha256_digest': hashlib.sha256(),
+        'blake2_256_digest': hashlib.blake2b(digest_size=32),
+    }
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            for hasher in hashers.values():
+                hasher.update(chunk)
+
+    return {field: hasher.hexdigest() for field, hasher in hashers.items()}
+
+
+def read_raw_metadata(path):
+    name = os.path.basename(path)
+
+    if name.endswith('.whl'):
+        with zipfile.ZipFile(path) as f:
+            for member in f.namelist():
+                parts = member.split('/')
+                if len(parts) == 2 and parts[0].endswith('.dist-info') and parts[1] == 'METADATA':
+                    return f.read(member)
+    elif name.endswith('.tar.gz'):
+        with tarfile.open(path) as f:
+            for member in f.getmembers():
+                if member.isfile() and member.name.count('/') == 1 and member.name.endswith('/PKG-INFO'):
+                    return f.extractfile(member).read()
+    elif name.endswith('.zip'):
+        with zipfile.ZipFile(path) as f:
+            for member in f.namelist():
+                if member.count('/') == 1 and member.endswith('/PKG-INFO'):
+                    return f.read(member)
+
+    raise ValueError('Unable to find metadata in `{}`.'.format(name))
+
+
+def get_upload_metadata(path):
+    """Returns the form fields describing a distribution, read from its
+    core metadata, as a list of pairs.
+    """
+    message = HeaderParser().parsestr(read_raw_metadata(path).decode('utf-8'))
+    name = os.path.basename(path)
+
+    if name.endswith('.whl'):
+        filetype = 'bdist_wheel'
+        pyversion = name[:-4].split('-')[-3]
+    else:
+        filetype = 'sdist'
+        pyversion = 'source'
+
+    fields = [
+        (':action', 'file_upload'),
+        ('protocol_version', '1'),
+        ('filetype', filetype),
+        ('pyversion', pyversion),
+    ]
+
+    for key, value in message.items():
+        key = key.lower()
+        fields.append((
+            MULTIPLE_USE_FIELDS.get(key) or RENAMED_FIELDS.get(key) or key.replace('-', '_'),
+            value
+        ))
+
+    # Newer metadata versions put the description in the body.
+    description = message.get_payload()
+    if description and 'description' not in message:
+        fields.append(('description', description))
+
+    return fields
+
+
+class MultipartBody:
+    """A `multipart/form-data` request body that streams the file from
+    disk, with a known length so it isn't sent chunked.
+    """
+    def __init__(self, fields, path):
+        self.boundary = uuid4().hex
+        self.content_type = 'multipart/form-data; boundary={}'.format(self.boundary)
+
+        preamble = io.BytesIO()
+        for name, value in fields:
+            preamble.write(
+                '--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n{}\r\n'.format(
+                    self.boundary, name, value
+                ).encode('utf-8')
+            )
+        preamble.write(
+            '--{}\r\nContent-Disposition: form-data; name="content"; filename="{}"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n'.format(
+                self.boundary, os.path.basename(path)
+            ).encode('utf-8')
+        )
+
+        self.parts = [
+            io.BytesIO(preamble.getvalue()),
+            open(path, 'rb'),
+            io.BytesIO('\r\n--{}--\r\n'.format(self.boundary).encode('utf-8')),
+        ]
+        self.length = (
+            len(self.parts[0].getvalue()) + os.path.getsize(path) + len(self.parts[2].getvalue())
+        )
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length
+
+        data = b''
+        while self.parts and len(data) < size:
+            chunk = self.parts[0].read(size - len(data))
+            if chunk:
+                data += chunk
+            else:
+                self.parts.pop(0).close()
+
+        return data
+
+    def close(self):
+        for part in self.parts:
+            part.close()
+
+
+def already_exists(response):
+    """Whether a rejected upload was caused by the file already existing,
+    which repositories signal in different ways.
+    """
+    return response.status_code == 409 or (
+        response.status_code == 400 and
+        'already exist' in '{} {}'.format(response.reason, response.text).lower()
+    )
+
+
+def create_session(username=None, password=None, jobs=1):
+    session = requests.Session()
+    if username:
+        session.auth = (username, password or '')
+    session.headers['User-Agent'] = 'hatch/{}'.format(hatch.__version__)
+
+    # Every worker keeps its own connection alive between files.
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=jobs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+
+def upload_file(session, url, path, skip_existing=True, attempts=UPLOAD_ATTEMPTS,
+                backoff=RETRY_BACKOFF, existing=None):
+    """Uploads a distribution, retrying transient failures with an
+    exponential backoff, and returns an `UploadResult`.
+
+    Files in `existing`, which maps the names of files known to be in the
+    repository to their sha256 digest or None if it's unknown, are not
+    sent when the digest matches or is unknown. Only those that match
+    are reported as already uploaded, with their digest to record.
+    """
+    try:
+        fields = get_upload_metadata(path)
+        digests = hash_distribution(path)
+        fields.extend(sorted(digests.items()))
+    except (OSError, ValueError, tarfile.TarError, zipfile.BadZipFile) as e:
+        return UploadResult(path, 'failed', message=str(e))
+
+    name = os.path.basename(path)
+    sha256 = digests['sha256_digest']
+    size = os.path.getsize(path)
+    message = ''
+
+    if existing and name in existing:
+        status = 'skipped' if skip_existing else 'failed'
+        if existing[name] == sha256:
+            return UploadResult(path, status, size, message='already uploaded', sha256=sha256)
+        # A file of unknown contents, which isn't this one as far as
+        # anyone can tell, so it's never recorded as uploaded.
+        elif existing[name] is None:
+            return UploadResult(path, status, size, message='already exists')
+
+    for attempt in range(1, attempts + 1):
+        if attempt > 1:
+            time.sleep(backoff * 2 ** (attempt - 2))
+
+        body = MultipartBody(fields, path)
+        start = time.time()
+        try:
+            response = session.post(
+                url, data=body, headers={'Content-Type': body.content_type}, allow_redirects=False
+            )
+        except requests.RequestException as e:
+            message = str(e)
+            continue
+        finally:
+            body.close()
+        elapsed = time.time() - start
+
+        if response.status_code < 300:
+            return UploadResult(path, 'uploaded', size, elapsed, attempt, sha256=sha256)
+        elif skip_existing and already_exists(response):
+            return UploadResult(path, 'skipped', size, elapsed, attempt, 'already exists')
+
+        message = '{} {}'.format(response.status_code, response.reason)
+        if 300 <= response.status_code < 400:
+            message += ', redirected to {}'.format(response.headers.get('Location'))
+        if response.status_code not in RETRY_STATUSES:
+            return UploadResult(path, 'failed', size, elapsed, attempt, message)
+
+    return UploadResult(path, 'failed', size, attempts=attempts, message=message)
+
+
+def upload_files(paths, url, username, password, skip_existing=True, jobs=None,
+                 attempts=UPLOAD_ATTEMPTS, callback=None, existing=None):
+    """Uploads distributions to the repository at `url`, up to `jobs` at
+    a time over a shared pool of keep-alive connections. The `callback`
+    is called with each `UploadResult` as soon as it's available.
+    """
+    jobs = jobs or DEFAULT_UPLOAD_JOBS
+
+    with create_session(username, password, jobs) as session:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(
+                    upload_file, session, url, path, skip_existing, attempts, existing=existing
+                )
+                for path in paths
+            ]
+            if callback:
+                for future in as_completed(futures):
+                    callback(future.result())
+
+            return [future.result() for future in futures]
+
+
+def get_keyring_password(url, username):
+    """Returns the password twine would find in the system keyring for
+    the repository at `url`, if keyring is installed.
+    """
+    try:
+        import keyring
+    except ImportError:  # no cov
+        return
+
+    # Any backend may fail, e.g. a locked or missing one.
+    try:
+        return keyring.get_password(url, username)
+    except Exception:
+        return
+
+
+def normalize_project_name(name):
+    # https://www.python.org/dev/peps/pep-0503/#normalized-names
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def get_project_names(paths):
+    names = set()
+
+    for path in paths:
+        try:
+            fields = get_upload_metadata(path)
+        except (OSError, ValueError, tarfile.TarError, zipfile.BadZipFile):
+            continue
+        names.update(normalize_project_name(value) for name, value in fields if name == 'name')
+
+    return sorted(names)
+
+
+def get_simple_index_url(url):
+    """Guesses where the simple index of the repository with the upload
+    API at `url` lives, which is right for PyPI and most mirrors of it.
+    """
+    parts = urlsplit(url)
+    path = parts.path.rstrip('/')
+    if path.endswith('/legacy'):
+        path = path[:-len('legacy')]
+    else:
+        path += '/'
+
+    return urlunsplit((
+        parts.scheme, SIMPLE_INDEX_HOSTS.get(parts.netloc, parts.netloc), path + 'simple/', '', ''
+    ))
+
+
+def get_indexed_files(index_url, projects, username=None, password=None):
+    """Returns the sha256 digest, or None if the index doesn't provide
+    one, of all files the simple index at `index_url` has for `projects`
+    keyed by their names, requesting each project's page once. Returns
+    None if the index can't be queried.
+    """
+    files = {}
+
+    with create_session(username, password) as session:
+        for project in projects:
+            try:
+                response = session.get(
+                    urljoin(index_url.rstrip('/') + '/', project + '/'),
+                    headers={'Accept': SIMPLE_INDEX_ACCEPT}
+                )
+            except requests.RequestException:
+                return
+
+            # The project doesn't exist yet.
+            if response.status_code == 404:
+                continue
+            elif response.status_code != 200:
+                return
+
+            if response.headers.get('Content-Type', '').startswith('application/vnd.pypi.simple'):
+                try:
+                    files.update(
+                        (file['filename'], (file.get('hashes') or {}).get('sha256'))
+                        for file in response.json()['files']
+                    )
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    return
+            else:
+                for attributes, name in SIMPLE_INDEX_ANCHOR.findall(response.text):
+                    sha256 = SIMPLE_INDEX_SHA256.search(attributes)
+                    files[name] = sha256.group(1).lower() if sha256 else None
+
+    return files
+
+
+def load_upload_ledger():
+    try:
+        with open(UPLOAD_LEDGER_FILE, 'r') as f:
+            ledger = json.loads(f.read())
+    except (OSError, ValueError):
+        ledger = {}
+
+    if ledger.get('version') != UPLOAD_LEDGER_VERSION:
+        ledger = {'version': UPLOAD_LEDGER_VERSION, 'repositories': {}}
+
+    return ledger
+
+
+def get_recorded_uploads(url):
+    """Returns the sha256 digest of every file successfully uploaded to
+    the repository at `url` from here, keyed by file name.
+    """
+    return dict(load_upload_ledger()['repositories'].get(url.rstrip('/') + '/', {}))
+
+
+def record_uploads(url, results):
+    uploads = {
+        result.name: result.sha256 for result in results
+        if result.status in ('uploaded', 'skipped') and result.sha256
+    }
+    if not uploads:
+        return
+
+    # Reloading first keeps what other processes recorded meanwhile.
+    ledger = load_upload_ledger()
+    ledger['repositories'].setdefault(url.rstrip('/') + '/', {}).update(uploads)
+
+    try:
+        ensure_dir_exists(os.path.dirname(UPLOAD_LEDGER_FILE))
+        with atomic_write(UPLOAD_LEDGER_FILE, overwrite=True) as f:
+            f.write(json.dumps(ledger, indent=4, sort_keys=True))
+    except OSError:  # no cov
+        pass
@@ -10,9 +10,12 @@ from pathlib import Path
 from tempfile import TemporaryDirectory
 from urllib.request import urlopen
 
+from hatch.trace import span
+
 __platform = platform.system()
 ON_MACOS = os.name == 'mac' or __platform == 'Darwin'
 ON_WINDOWS = NEED_SUBPROCESS_SHELL = os.name == 'nt' or __platform == 'Windows'
+ON_LINUX = __platform == 'Linux'
 
 VENV_FLAGS = {
     '_HATCHING_',
@@ -21,17 +24,22 @@ VENV_FLAGS = {
 }
 
 
-def venv_active():
-    return bool(VENV_FLAGS & set(os.environ)) and not venv_ignored()
+def venv_active(env=None):
+    env = os.environ if env is None else env
+    return bool(VENV_FLAGS & set(env)) and not venv_ignored(env)
 
 
-def venv_ignored():
-    return os.environ.get('_IGNORE_VENV_') == '1'
+def venv_ignored(env=None):
+    env = os.environ if env is None else env
+    return env.get('_IGNORE_VENV_') == '1'
 
 
 def get_random_venv_name():
     # Will be length 4, so 16777216 possibilities.
-    return urlsafe_b64encode(os.urandom(3)).decode()
+    name = urlsafe_b64encode(os.urandom(3)).decode()
+
+    # Names must not look like command line options.
+    return '_' + name[1:] if name.startswith('-') else name
 
 
 def get_admin_command():  # no cov
@@ -48,6 +56,7 @@ def get_admin_command():  # no cov
         return ['sudo', '-H'] + (['--user={}'.format(admin)] if admin else [])
 
 
+@span('find_project_root', 'project')
 def find_project_root(d=None, max_depth=3):
     path = Path(d or os.getcwd())
     root = path.drive + path.root
@@ -155,6 +164,14 @@ def basepath(path):
     return os.path.basename(os.path.normpath(path))
 
 
+def format_size(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024 or unit == 'GiB':
+            break
+        size /= 1024
+    return '{} {}'.format(size, unit) if unit == 'B' else '{:.2f} {}'.format(size, unit)
+
+
 def get_current_year():
     return str(datetime.now().year)
 
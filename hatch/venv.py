@@ -1,17 +1,38 @@
+import hashlib
+import json
 import os
 import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from os.path import isfile
+from tempfile import mkdtemp, mkstemp
 
+from atomicwrites import atomic_write
+
+from hatch import process
 from hatch.clean import remove_compiled_scripts
-from hatch.config import get_proper_python, get_venv_dir
+from hatch.clone import clone_tree
+from hatch.config import VENV_TEMPLATES_DIR, get_proper_python, get_venv_dir
+from hatch.context import IGNORED_VENV_VARS, get_venv_env_vars, locate_exe_dir
+from hatch.env import get_installed_distributions, get_python_info
 from hatch.exceptions import InvalidVirtualEnv
 from hatch.utils import (
-    NEED_SUBPROCESS_SHELL, ON_WINDOWS, env_vars, get_random_venv_name, resolve_path
+    NEED_SUBPROCESS_SHELL, ON_WINDOWS, ensure_dir_exists, env_vars,
+    get_random_venv_name, remove_path, resolve_path
 )
 
+# Entry point launchers on Windows embed the interpreter's path in
+# binaries that can't be fixed after copying a template.
+USE_VENV_TEMPLATES = not ON_WINDOWS
+
+# Longer first lines are not considered shebangs.
+MAX_SHEBANG_LENGTH = 64 * 1024
+
+# Bumped whenever templates built before must no longer be used.
+VENV_TEMPLATE_VERSION = 2
+
 
 def is_venv(d):
     try:
@@ -55,59 +76,222 @@ def get_available_venvs():
     return venvs
 
 
+@process.timed('venv')
 def create_venv(d, pypath=None, use_global=False, verbose=False):
-    command = [sys.executable, '-m', 'virtualenv', d,
-               '-p', pypath or resolve_path(shutil.which(get_proper_python()))]
+    pypath = pypath or resolve_path(shutil.which(get_proper_python()))
+    if not USE_VENV_TEMPLATES:  # no cov
+        return run_virtualenv(d, pypath, use_global, verbose)
+
+    try:
+        template = get_venv_template(pypath, use_global)
+    # Let virtualenv report unusable interpreters.
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return run_virtualenv(d, pypath, use_global, verbose)
+
+    if not template:
+        result = build_venv_template(pypath, use_global, verbose)
+        if result != 0:
+            return result
+
+        template = get_venv_template(pypath, use_global)
+        if not template:  # no cov
+            return run_virtualenv(d, pypath, use_global, verbose)
+
+    template_dir, origin = template
+    existed = os.path.exists(d)
+    try:
+        materialize_venv(template_dir, origin, d)
+    except OSError:  # no cov
+        if not existed:
+            remove_path(d)
+        return run_virtualenv(d, pypath, use_global, verbose)
+
+    return 0
+
+
+def run_virtualenv(d, pypath, use_global=False, verbose=False):
+    command = [sys.executable, '-m', 'virtualenv', d, '-p', pypath]
     if use_global:  # no cov
         command.append('--system-site-packages')
     if not verbose:  # no cov
         command.append('-qqq')
-    result = subprocess.run(command, shell=NEED_SUBPROCESS_SHELL)
+    result = process.run(command, shell=NEED_SUBPROCESS_SHELL)
     return result.returncode
 
 
-def clone_venv(origin, location):
-    shutil.copytree(origin, location, copy_function=shutil.copy)
-    fix_venv(location)
+def get_venv_template_signature(pypath, use_global):
+    info = get_python_info(pypath)
+    executable = os.path.realpath(info['executable'])
+    executable_stat = os.stat(executable)
+
+    virtualenv_version = ''
+    for distribution in get_installed_distributions(sys.executable):
+        if distribution['name'].lower() == 'virtualenv':
+            virtualenv_version = distribution['version']
+            break
+
+    return {
+        'template_version': VENV_TEMPLATE_VERSION,
+        'executable': executable,
+        'executable_stat': [
+            executable_stat.st_ino, executable_stat.st_mtime_ns, executable_stat.st_size
+        ],
+        'version': info['version'],
+        'implementation': info['implementation'],
+        'virtualenv': virtualenv_version,
+        'global': use_global,
+    }
+
+
+def get_venv_template_paths(signature):
+    key = hashlib.sha256(
+        '{}|{}'.format(signature['executable'], signature['global']).encode('utf-8')
+    ).hexdigest()[:16]
+    template_dir = os.path.join(VENV_TEMPLATES_DIR, key)
+    return template_dir, template_dir + '.json'
+
+
+def get_venv_template(pypath, use_global=False):
+    """Returns the location of a pristine virtual env for an interpreter
+    and the path it was originally created at, if it is up to date.
+    """
+    signature = get_venv_template_signature(pypath, use_global)
+    template_dir, metadata_file = get_venv_template_paths(signature)
 
+    try:
+        with open(metadata_file, 'r') as f:
+            metadata = json.loads(f.read())
+    except (OSError, ValueError):
+        return
 
-def fix_venv(d):
-    venv_exe_dir = locate_exe_dir(d)
+    if metadata.get('signature') != signature or not is_venv(template_dir):
+        return
 
-    for path in os.listdir(venv_exe_dir):
-        fix_executable(path, venv_exe_dir)
+    return template_dir, metadata['origin']
 
-    remove_compiled_scripts(d)
 
+def build_venv_template(pypath, use_global=False, verbose=False):
+    signature = get_venv_template_signature(pypath, use_global)
+    template_dir, metadata_file = get_venv_template_paths(signature)
 
-def fix_available_venvs():
-    if not os.path.exists(get_venv_dir()):  # no cov
-        return
+    ensure_dir_exists(VENV_TEMPLATES_DIR)
+    temp_dir = mkdtemp(prefix='.tmp-', dir=VENV_TEMPLATES_DIR)
+    origin = os.path.join(temp_dir, 'venv')
 
-    for name in sorted(os.listdir(get_venv_dir())):
+    try:
+        result = run_virtualenv(origin, pypath, use_global, verbose)
+        if result != 0:
+            return result
+
+        # Another process may have built it in the meantime and
+        # could be cloning it right now.
+        if get_venv_template(pypath, use_global):  # no cov
+            return 0
+
+        remove_path(metadata_file)
+        remove_path(template_dir)
         try:
-            fix_venv(os.path.join(get_venv_dir(), name))
-        except InvalidVirtualEnv:
-            pass
+            os.replace(origin, template_dir)
+        # Another process won the race to build it.
+        except OSError:  # no cov
+            return 0
 
+        with atomic_write(metadata_file, overwrite=True) as f:
+            f.write(json.dumps({'signature': signature, 'origin': origin}, indent=4))
+    finally:
+        remove_path(temp_dir)
 
-def fix_executable(path, exe_dir):
-    if not isfile(path):
-        return
+    return 0
+
+
+def materialize_venv(template_dir, origin, d):
+    # Never hard link, as envs would share files with the template.
+    clone_venv(template_dir, d, link_mode='auto', relocate_from=origin)
+
+
+def clone_venv(origin, location, link_mode='auto', relocate_from=None):
+    """Creates a virtual env at `location` from the one at `origin`, fixing
+    any references to its own location. The origin may have been moved
+    from its initial location `relocate_from`, which is fixed too.
+    """
+    origin = os.path.abspath(origin)
+    location = os.path.abspath(location)
+    previous_locations = [origin] + ([relocate_from] if relocate_from else [])
+
+    # Files that will be modified must never share data with the origin.
+    origin_exe_dir = locate_exe_dir(origin)
+    origin_config = os.path.join(origin, 'pyvenv.cfg')
+
+    def copy_only(path):
+        return path == origin_config or os.path.dirname(path) == origin_exe_dir
+
+    stats = clone_tree(
+        origin, location, link_mode, copy_only=copy_only, link_prefixes=previous_locations
+    )
 
+    exe_dir = locate_exe_dir(location)
+    for path in [os.path.join(location, 'pyvenv.cfg')] + [
+        os.path.join(exe_dir, name) for name in os.listdir(exe_dir)
+    ]:
+        if isfile(path) and not os.path.islink(path):
+            relocate_file(path, previous_locations, location)
+
+    fix_venv(location)
+
+    return stats
+
+
+def relocate_file(path, previous_locations, location):
     with open(path, 'rb') as f:
-        if f.read(2) != b'#!':
-            return
+        contents = f.read()
+
+    # Shebangs are left to `fix_executable` and binaries are untouched.
+    if contents.startswith(b'#!') or b'\0' in contents:
+        return
+
+    new_contents = contents
+    for previous_location in previous_locations:
+        new_contents = new_contents.replace(
+            previous_location.encode('utf-8'), location.encode('utf-8')
+        )
+
+    if new_contents != contents:
+        with open(path, 'wb') as f:
+            f.write(new_contents)
+
+
+def fix_venv(d):
+    """Updates a virtual env's scripts to use its current location,
+    returning the scripts that had to change and the removed
+    compiled files.
+    """
+    venv_exe_dir = locate_exe_dir(d)
+
+    fixed = []
+    for name in os.listdir(venv_exe_dir):
+        path = os.path.join(venv_exe_dir, name)
+        if fix_executable(path, venv_exe_dir):
+            fixed.append(path)
+
+    return fixed, remove_compiled_scripts(d)
+
 
-    with open(path) as f:
-        lines = f.readlines()
+def fix_available_venvs(workers=None):
+    """Fixes all available virtual envs concurrently, returning the name
+    of each along with what `fix_venv` reported for it.
+    """
+    venvs = get_available_venvs()
 
-    first_line = lines[0]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(fix_venv, [venv_dir for _, venv_dir in venvs])
+        return [(name, fixed, removed) for (name, _), (fixed, removed) in zip(venvs, results)]
 
+
+def fix_shebang(line, exe_dir):
     # Remove the #! and trailing whitespace.
-    executable_path = first_line[2:].strip()
+    executable_path = line[2:].strip()
     if not executable_path:
-        return
+        return line
 
     # If the executable path contains spaces it will be wrapped in quotes.
     if executable_path.startswith('"'):
@@ -116,7 +300,7 @@ def fix_executable(path, exe_dir):
         executable_path = executable_path[path_start:path_end]
 
         # Remove the first pair of quotes.
-        first_line = first_line.replace('"', '', 2)
+        line = line.replace('"', '', 2)
 
     # Otherwise, the executable path is whatever precedes the first space.
     else:
@@ -130,40 +314,62 @@ def fix_executable(path, exe_dir):
     old_path = executable_path.rstrip(filename)
     new_path = os.path.normpath(exe_dir) + os.path.sep
 
-    first_line = first_line.replace(old_path, new_path, 1)
+    line = line.replace(old_path, new_path, 1)
 
     if ' ' in exe_dir:
         full_path = new_path + filename
-        lines[0] = first_line.replace(full_path, '"{}"'.format(full_path))
-    else:
-        lines[0] = first_line
+        line = line.replace(full_path, '"{}"'.format(full_path))
+
+    return line
+
+
+def fix_executable(path, exe_dir):
+    """Points a script's shebang to `exe_dir`, returning whether it had
+    to change. Only the first line is read before deciding, and the
+    rest of the file is streamed to a replacement.
+    """
+    if not isfile(path):
+        return False
+
+    with open(path, 'rb') as f:
+        first_line = f.readline(MAX_SHEBANG_LENGTH)
+        if not first_line.startswith(b'#!'):
+            return False
+
+        # Binaries that happen to start with #! are left alone.
+        if len(first_line) == MAX_SHEBANG_LENGTH and not first_line.endswith(b'\n'):  # no cov
+            return False
 
-    with open(path, 'w') as f:
-        f.writelines(lines)
+        line = first_line.decode('utf-8', 'surrogateescape')
+        new_first_line = fix_shebang(line, exe_dir).encode('utf-8', 'surrogateescape')
+        if new_first_line == first_line:
+            return False
 
+        fd, temp_path = mkstemp(prefix='.tmp-', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(new_first_line)
+                shutil.copyfileobj(f, temp_file)
+            shutil.copymode(path, temp_path)
+        except:  # no cov
+            remove_path(temp_path)
+            raise
+
+    # Replacing rather than writing in place also means hard links to
+    # other envs' copies are never modified.
+    os.replace(temp_path, path)
 
-def locate_exe_dir(d, check=True):
-    exe_dir = os.path.join(d, 'Scripts') if ON_WINDOWS else os.path.join(d, 'bin')
-    if not os.path.isdir(exe_dir):
-        if ON_WINDOWS:
-            bin_dir = os.path.join(d, 'bin')
-            if os.path.isdir(bin_dir):
-                return bin_dir
-        if check:
-            raise InvalidVirtualEnv('Unable to locate executables directory.')
-    return exe_dir
+    return True
 
 
 @contextmanager
 def venv(d, evars=None):
+    """Activates a virtual env for the whole process. Commands should use
+    `ExecutionContext.with_venv` instead, which is safe to use from
+    multiple threads.
+    """
     venv_exe_dir = locate_exe_dir(d)
+    evars = get_venv_env_vars(d, os.environ.get('PATH', ''), evars)
 
-    evars = evars or {}
-    evars['_HATCHING_'] = '1'
-    evars['VIRTUAL_ENV'] = d
-    evars['PATH'] = '{}{}{}'.format(
-        venv_exe_dir, os.pathsep, os.environ.get('PATH', '')
-    )
-
-    with env_vars(evars, ignore={'__PYVENV_LAUNCHER__'}):
+    with env_vars(evars, ignore=set(IGNORED_VENV_VARS)):
         yield venv_exe_dir
@@ -0,0 +1,233 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from hatch.clean import EVERYWHERE_MATCHER, ROOT_MATCHER
+from hatch.utils import ON_LINUX
+
+# Changes are gathered until none happen for this long, so that saving
+# several files or an editor's multiple writes trigger a single run.
+SETTLE_TIME = 0.2
+POLL_INTERVAL = 0.5
+
+WATCHED_EXTENSIONS = ('.py', )
+WATCHED_FILES = {'pyproject.toml', 'pytest.ini', 'setup.cfg', 'tox.ini'}
+
+# https://github.com/torvalds/linux/blob/master/include/uapi/linux/inotify.h
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT = struct.Struct('iIII')
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+
+def is_watched(name):
+    return name.endswith(WATCHED_EXTENSIONS) or name in WATCHED_FILES
+
+
+def is_skipped_directory(name, is_root=False):
+    return (
+        name.startswith('.') or
+        bool((ROOT_MATCHER if is_root else EVERYWHERE_MATCHER).match(name)) or
+        (is_root and name == 'venv')
+    )
+
+
+def walk_project(d):
+    """Yields every directory of a project worth watching along with the
+    names of its watched files, skipping hidden directories, the virtual
+    env and anything `hatch clean` would remove.
+    """
+    directories = [(d, True)]
+
+    while directories:
+        root, is_root = directories.pop()
+
+        try:
+            entries = list(os.scandir(root))
+        except OSError:
+            continue
+
+        files = []
+        for entry in entries:
+            name = os.path.normcase(entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                if not is_skipped_directory(name, is_root):
+                    directories.append((entry.path, False))
+            elif is_watched(name):
+                files.append(entry.name)
+
+        yield root, files
+
+
+class PollingWatcher:
+    """Finds changes by comparing the size and modification time of every
+    watched file at regular intervals.
+    """
+    def __init__(self, d, interval=POLL_INTERVAL):
+        self.d = d
+        self.interval = interval
+        self.files = self.scan()
+
+    def scan(self):
+        files = {}
+
+        for root, names in walk_project(self.d):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # no cov
+                    continue
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+
+        return files
+
+    def poll(self):
+        files = self.scan()
+        changed = {
+            path for path in set(files) | set(self.files)
+            if files.get(path) != self.files.get(path)
+        }
+        self.files = files
+        return changed
+
+    def wait(self):
+        """Blocks until files change, returning their paths."""
+        changed = set()
+
+        while True:
+            time.sleep(self.interval if not changed else SETTLE_TIME)
+            new = self.poll()
+            if new:
+                changed |= new
+            elif changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Finds changes as the kernel reports them, watching every directory
+    of the project, including the ones that get created.
+    """
+    def __init__(self, d):
+        self.d = d
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'Unable to initialize inotify.')
+
+        self.directories = {}
+        try:
+            for root, _ in walk_project(d):
+                self.add_watch(root)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), INOTIFY_MASK)
+        if wd < 0:
+            # Running out of watches should fall back to polling.
+            raise OSError(ctypes.get_errno(), 'Unable to watch `{}`.'.format(path))
+        self.directories[wd] = path
+
+    def add_directory(self, path):
+        """Watches a new directory, returning the files that were created
+        in it before it could be watched.
+        """
+        changed = set()
+
+        for root, names in walk_project(path):
+            try:
+                self.add_watch(root)
+            except OSError:  # no cov
+                continue
+            changed.update(os.path.join(root, name) for name in names)
+
+        return changed
+
+    def read_events(self):
+        """Returns the paths changed by all pending events, or None if the
+        kernel dropped some.
+        """
+        try:
+            data = os.read(self.fd, INOTIFY_BUFFER_SIZE)
+        except BlockingIOError:  # no cov
+            return set()
+
+        changed = set()
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:  # no cov
+                overflow = True
+            elif mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+            elif wd in self.directories:
+                root = self.directories[wd]
+                path = os.path.join(root, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and not is_skipped_directory(
+                        os.path.normcase(name), root == self.d
+                    ):
+                        changed |= self.add_directory(path)
+                elif is_watched(os.path.normcase(name)):
+                    changed.add(path)
+
+        return None if overflow else changed
+
+    def wait(self):
+        """Blocks until files change, returning their paths."""
+        changed = set()
+
+        while True:
+            readable, _, _ = select.select([self.fd], [], [], SETTLE_TIME if changed else None)
+            if not readable:
+                return changed
+
+            new = self.read_events()
+            if new is None:  # no cov
+                # Everything has to be assumed to have changed.
+                return {
+                    os.path.join(root, name)
+                    for root, names in walk_project(self.d) for name in names
+                }
+            changed |= new
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def get_watcher(d, polling=False):
+    """Returns an inotify watcher on Linux when available, otherwise one
+    that polls.
+    """
+    if ON_LINUX and not polling:
+        try:
+            return InotifyWatcher(d)
+        except (AttributeError, OSError):  # no cov
+            pass
+
+    return PollingWatcher(d)
@@ -59,9 +59,11 @@ setup(
         'click',
         'colorama',
         'coverage',
+        'packaging',
         'pexpect',
         'pip>=9.0.1',
         'pytest',
+        'requests',
         'semver>=2.7.8',
         'setuptools>=36.0.0',
         'sortedcontainers>=1.5.7',
@@ -75,7 +77,7 @@ setup(
     packages=find_packages(include=['hatch', 'hatch.*']),
     entry_points={
         'console_scripts': (
-            'hatch = hatch.cli:hatch',
+            'hatch = hatch.client:main',
         ),
     },
 )
@@ -1,11 +1,16 @@
 import glob
+import io
 import os
 import sys
+import tarfile
 
+import pytest
 from click.testing import CliRunner
 
+from hatch.build import get_artifacts, unpack_sdist
 from hatch.cli import hatch
 from hatch.env import install_packages
+from hatch.exceptions import BuildBackendError
 from hatch.settings import (
     SETTINGS_FILE, copy_default_settings, save_settings
 )
@@ -22,6 +27,7 @@ def format_files(d):
     )
 
 
+@requires_internet
 def test_cwd():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -140,6 +146,7 @@ def test_package_not_exist():
         assert '`{}` is not an editable package.'.format('ok') in result.output
 
 
+@requires_internet
 def test_path_relative():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -157,6 +164,7 @@ def test_path_relative():
         ) in result.output
 
 
+@requires_internet
 def test_path_full():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -189,6 +197,7 @@ def test_path_full_not_exist():
         assert 'Directory `{}` does not exist.'.format(full_path) in result.output
 
 
+@requires_internet
 def test_default_non_universal():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -202,6 +211,7 @@ def test_default_non_universal():
         assert not ('py2' in file_name and 'py3' in file_name)
 
 
+@requires_internet
 def test_universal():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -214,6 +224,7 @@ def test_universal():
         assert 'py2' in file_name and 'py3' in file_name
 
 
+@requires_internet
 def test_platform_name():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -227,6 +238,7 @@ def test_platform_name():
         assert len(files) == 2
 
 
+@requires_internet
 def test_build_dir_relative():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -245,6 +257,7 @@ def test_build_dir_relative():
         ) in result.output
 
 
+@requires_internet
 def test_build_dir_full():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -275,6 +288,7 @@ def test_build_dir_file():
         assert 'Files found in' not in result.output
 
 
+@requires_internet
 def test_clean():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -301,6 +315,7 @@ def test_fail():
         assert result.exit_code != 0
 
 
+@requires_internet
 def test_pypath():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -314,6 +329,7 @@ def test_pypath():
         assert len(files) == 2
 
 
+@requires_internet
 def test_python():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -356,3 +372,205 @@ def test_python_invalid():
 
         assert result.exit_code == 1
         assert 'Python path named `python` does not exist or is invalid.' in result.output
+
+
+@requires_internet
+def test_up_to_date():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        build_dir = os.path.join(d, 'dist')
+
+        runner.invoke(hatch, ['build'])
+        artifacts = get_artifacts(build_dir)
+        result = runner.invoke(hatch, ['build'])
+
+        assert result.exit_code == 0
+        assert 'Build is up to date.' in result.output
+        assert (
+            'Files found in `{}`:\n\n'.format(build_dir) + format_files(build_dir)
+        ) in result.output
+        assert get_artifacts(build_dir) == artifacts
+
+
+@requires_internet
+def test_up_to_date_source_changed():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        runner.invoke(hatch, ['build'])
+        with open(os.path.join(d, 'ok', '__init__.py'), 'a') as f:
+            f.write('\n# changed\n')
+        result = runner.invoke(hatch, ['build'])
+
+        assert result.exit_code == 0
+        assert 'Build is up to date.' not in result.output
+
+
+@requires_internet
+def test_up_to_date_options_changed():
+    with temp_chdir():
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        runner.invoke(hatch, ['build'])
+        result = runner.invoke(hatch, ['build', '-u'])
+
+        assert result.exit_code == 0
+        assert 'Build is up to date.' not in result.output
+
+
+@requires_internet
+def test_up_to_date_artifact_removed():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        runner.invoke(hatch, ['build'])
+        os.remove(glob.glob(os.path.join(d, 'dist', '*.whl'))[0])
+        result = runner.invoke(hatch, ['build'])
+
+        assert result.exit_code == 0
+        assert 'Build is up to date.' not in result.output
+        assert glob.glob(os.path.join(d, 'dist', '*.whl'))
+
+
+@requires_internet
+def test_force():
+    with temp_chdir():
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        runner.invoke(hatch, ['build'])
+        result = runner.invoke(hatch, ['build', '-f'])
+
+        assert result.exit_code == 0
+        assert 'Build is up to date.' not in result.output
+
+
+@requires_internet
+def test_matrix():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        with temp_move_path(SETTINGS_FILE, d):
+            settings = copy_default_settings()
+            settings['pypaths']['first'] = sys.executable
+            settings['pypaths']['second'] = sys.executable
+            save_settings(settings)
+            result = runner.invoke(hatch, ['build', '-m', '-j', '2'])
+            files = os.listdir(os.path.join(d, 'dist'))
+
+        assert result.exit_code == 0
+        assert 'Building with 2 Python paths...' in result.output
+        assert 'sdist -> built in ' in result.output
+        assert 'first -> built in ' in result.output
+        assert 'second -> built in ' in result.output
+        assert matching_file(r'.*\.whl$', files)
+        assert matching_file(r'.*\.tar\.gz$', files)
+        assert len(files) == 2
+        assert not glob.glob(os.path.join(d, 'build'))
+
+
+@requires_internet
+def test_matrix_names():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        with temp_move_path(SETTINGS_FILE, d):
+            settings = copy_default_settings()
+            settings['pypaths']['first'] = sys.executable
+            settings['pypaths']['second'] = sys.executable
+            settings['pypaths']['third'] = sys.executable
+            save_settings(settings)
+            result = runner.invoke(hatch, ['build', '-py', 'first/third'])
+
+        assert result.exit_code == 0
+        assert 'first -> built in ' in result.output
+        assert 'second ->' not in result.output
+        assert 'third -> built in ' in result.output
+
+
+@requires_internet
+def test_matrix_failure():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        with temp_move_path(SETTINGS_FILE, d):
+            settings = copy_default_settings()
+            settings['pypaths']['first'] = sys.executable
+            settings['pypaths']['second'] = os.path.join(d, 'setup.py')
+            save_settings(settings)
+            result = runner.invoke(hatch, ['build', '-m'])
+
+        assert result.exit_code == 1
+        assert 'first -> built in ' in result.output
+        assert 'second -> failed after ' in result.output
+
+
+def test_matrix_no_pypaths():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        with temp_move_path(SETTINGS_FILE, d):
+            save_settings(copy_default_settings())
+            result = runner.invoke(hatch, ['build', '-m'])
+
+        assert result.exit_code == 1
+        assert 'There are no saved Python paths.' in result.output
+
+
+def test_build_backend_failure():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        project_file = os.path.join(d, 'pyproject.toml')
+        with open(project_file, 'r') as f:
+            contents = f.read()
+        with open(project_file, 'w') as f:
+            f.write(contents.replace(
+                "requires = ['setuptools', 'wheel']",
+                "requires = []\nbuild-backend = 'missing_backend'"
+            ))
+
+        result = runner.invoke(hatch, ['build'])
+
+        assert result.exit_code == 1
+        assert 'The build backend failed to run ' in result.output
+
+
+def test_no_build_system():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        os.remove(os.path.join(d, 'pyproject.toml'))
+
+        result = runner.invoke(hatch, ['build'])
+        files = os.listdir(os.path.join(d, 'dist'))
+
+        assert result.exit_code == 0
+        assert matching_file(r'.*\.whl$', files)
+        assert len(files) == 2
+
+
+def test_unpack_sdist_outside():
+    with temp_chdir() as d:
+        sdist = os.path.join(d, 'ok-0.0.1.tar.gz')
+        with tarfile.open(sdist, 'w:gz') as f:
+            for name in ('ok-0.0.1/setup.py', 'ok-0.0.1/../../escaped.py'):
+                info = tarfile.TarInfo(name)
+                info.size = 2
+                f.addfile(info, io.BytesIO(b'ok'))
+
+        source_dir = os.path.join(d, 'source', 'unpacked')
+        os.makedirs(source_dir)
+        with pytest.raises(BuildBackendError):
+            unpack_sdist(sdist, source_dir)
+
+        assert not os.path.exists(os.path.join(d, 'source', 'escaped.py'))
+        assert not os.path.exists(os.path.join(d, 'escaped.py'))
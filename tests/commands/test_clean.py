@@ -349,11 +349,7 @@ def test_cache():
         assert 'Cleaned!' in result.output
         assert (
             'Removed paths:\n'
-            '{}\n'
-            '{}\n'.format(
-                os.path.join(d, '.cache'),
-                test_file
-            )
+            '{}\n'.format(os.path.join(d, '.cache'))
         ) in result.output
         assert not os.path.exists(test_file)
         assert_files_exist(files)
@@ -399,11 +395,7 @@ def test_eggs():
         assert 'Cleaned!' in result.output
         assert (
             'Removed paths:\n'
-            '{}\n'
-            '{}\n'.format(
-                os.path.join(d, '.eggs'),
-                test_file
-            )
+            '{}\n'.format(os.path.join(d, '.eggs'))
         ) in result.output
         assert not os.path.exists(test_file)
         assert_files_exist(files)
@@ -426,11 +418,7 @@ def test_tox():
         assert 'Cleaned!' in result.output
         assert (
             'Removed paths:\n'
-            '{}\n'
-            '{}\n'.format(
-                os.path.join(d, '.tox'),
-                test_file
-            )
+            '{}\n'.format(os.path.join(d, '.tox'))
         ) in result.output
         assert not os.path.exists(test_file)
         assert_files_exist(files)
@@ -453,11 +441,7 @@ def test_build():
         assert 'Cleaned!' in result.output
         assert (
             'Removed paths:\n'
-            '{}\n'
-            '{}\n'.format(
-                os.path.join(d, 'build'),
-                test_file
-            )
+            '{}\n'.format(os.path.join(d, 'build'))
         ) in result.output
         assert not os.path.exists(test_file)
         assert_files_exist(files)
@@ -480,11 +464,7 @@ def test_dist():
         assert 'Cleaned!' in result.output
         assert (
             'Removed paths:\n'
-            '{}\n'
-            '{}\n'.format(
-                os.path.join(d, 'dist'),
-                test_file
-            )
+            '{}\n'.format(os.path.join(d, 'dist'))
         ) in result.output
         assert not os.path.exists(test_file)
         assert_files_exist(files)
@@ -507,11 +487,7 @@ def test_egg_info():
         assert 'Cleaned!' in result.output
         assert (
             'Removed paths:\n'
-            '{}\n'
-            '{}\n'.format(
-                os.path.join(d, 'ok.egg-info'),
-                test_file
-            )
+            '{}\n'.format(os.path.join(d, 'ok.egg-info'))
         ) in result.output
         assert not os.path.exists(test_file)
         assert_files_exist(files)
@@ -538,13 +514,9 @@ def test_pycache():
         assert (
             'Removed paths:\n'
             '{}\n'
-            '{}\n'
-            '{}\n'
             '{}\n'.format(
                 os.path.join(d, '__pycache__'),
-                root_file,
-                os.path.join(d, 'ok', '__pycache__'),
-                non_root_file
+                os.path.join(d, 'ok', '__pycache__')
             )
         ) in result.output
         assert not os.path.exists(root_file)
@@ -656,3 +628,38 @@ def test_verbose_already_clean():
         assert result.exit_code == 0
         assert 'Already clean!' in result.output
         assert_files_exist(files)
+
+
+def test_skip_directories():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        git_file = os.path.join(d, '.git', 'ok.pyc')
+        tox_file = os.path.join(d, 'ok', '.tox', 'ok.pyc')
+        create_file(git_file)
+        create_file(tox_file)
+
+        result = runner.invoke(hatch, ['clean', '-v'])
+
+        assert result.exit_code == 0
+        assert 'Already clean!' in result.output
+        assert os.path.exists(git_file)
+        assert os.path.exists(tox_file)
+
+
+def test_wait():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        files = find_all_files(d)
+
+        test_file = os.path.join(d, 'build', 'lib', 'ok', 'ok.py')
+        create_file(test_file)
+
+        result = runner.invoke(hatch, ['clean', '-w'])
+
+        assert result.exit_code == 0
+        assert 'Cleaned!' in result.output
+        assert not os.path.exists(os.path.join(d, 'build'))
+        assert_files_exist(files)
@@ -6,8 +6,8 @@ from click.testing import CliRunner
 from hatch.cli import hatch
 from hatch.config import get_venv_dir
 from hatch.env import (
-    get_installed_packages, get_python_implementation, get_python_version,
-    install_packages
+    get_installed_packages, get_python_implementation, get_python_path,
+    get_python_version, install_packages
 )
 from hatch.settings import (
     SETTINGS_FILE, copy_default_settings, restore_settings, save_settings
@@ -214,6 +214,33 @@ def test_clone_venv_not_exist():
         assert 'Virtual env `{name}` does not exist.'.format(name=env_name) in result.output
 
 
+def test_clone_link_mode():
+    with temp_chdir():
+        runner = CliRunner()
+
+        origin, clone = get_new_venv_name(count=2)
+        origin_dir = os.path.join(get_venv_dir(), origin)
+        clone_dir = os.path.join(get_venv_dir(), clone)
+
+        try:
+            runner.invoke(hatch, ['env', origin])
+            wait_until(is_venv, origin_dir)
+
+            result = runner.invoke(hatch, ['env', '-c', origin, '-lm', 'copy', clone])
+            wait_until(is_venv, clone_dir)
+            with venv(clone_dir):
+                python_path = get_python_path()
+        finally:
+            remove_path(origin_dir)
+            remove_path(clone_dir)
+
+        assert result.exit_code == 0
+        assert 'Successfully cloned virtual env `{}` from `{}` to `{}`.'.format(
+            clone, origin, clone_dir) in result.output
+        assert 'Shared 0 B of ' in result.output
+        assert python_path.startswith(clone_dir)
+
+
 @requires_internet
 def test_clone_success():
     with temp_chdir():
@@ -245,6 +272,26 @@ def test_clone_success():
         assert 'six' in installed_packages
 
 
+def test_restore_summary():
+    with temp_chdir():
+        runner = CliRunner()
+
+        env_name = get_new_venv_name()
+        venv_dir = os.path.join(get_venv_dir(), env_name)
+
+        try:
+            runner.invoke(hatch, ['env', env_name])
+            wait_until(is_venv, venv_dir)
+
+            result = runner.invoke(hatch, ['env', '-r'])
+        finally:
+            remove_path(venv_dir)
+
+        assert result.exit_code == 0
+        assert 'Successfully restored all available virtual envs.' in result.output
+        assert 'compiled files in ' in result.output
+
+
 @requires_internet
 def test_restore_success():
     with temp_chdir() as d:
@@ -1,14 +1,16 @@
 import os
 
+import pytest
 from click.testing import CliRunner
 from twine.utils import TEST_REPOSITORY
 
 from hatch.cli import hatch
 from hatch.env import install_packages
 from hatch.settings import SETTINGS_FILE, copy_default_settings, save_settings
+from hatch.upload import get_recorded_uploads, hash_distribution
 from hatch.utils import env_vars, temp_chdir, temp_move_path
 from hatch.venv import create_venv, venv
-from ..utils import requires_internet
+from ..utils import LocalRepository, requires_internet
 
 PACKAGE_NAME = 'e00f69943529ccc38058'
 USERNAME = '__token__'
@@ -371,3 +373,152 @@ def test_repository_and_test():
         assert result.exit_code == 1
         assert "Cannot specify both --test and --repo." in result.output
         assert "Cannot specify both --test and --repo-url." in result.output
+
+
+def test_local_repository():
+    with temp_chdir(), LocalRepository(USERNAME, PASSWORD) as repository:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', PACKAGE_NAME, '--basic', '-ne'])
+        runner.invoke(hatch, ['build'])
+
+        with env_vars(ENV_VARS):
+            result = runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url, '-j', '2'])
+
+        assert result.exit_code == 0
+        assert 'Uploading 2 files to {}...'.format(repository.url) in result.output
+        assert '{}-0.0.1.tar.gz -> '.format(PACKAGE_NAME) in result.output
+        assert '{}-0.0.1-py3-none-any.whl -> '.format(PACKAGE_NAME) in result.output
+        assert ' seconds (' in result.output
+        assert sorted(repository.uploads) == [
+            '{}-0.0.1-py3-none-any.whl'.format(PACKAGE_NAME), '{}-0.0.1.tar.gz'.format(PACKAGE_NAME)
+        ]
+        assert repository.uploads['{}-0.0.1.tar.gz'.format(PACKAGE_NAME)]['filetype'] == [b'sdist']
+
+
+def test_local_repository_keyring(monkeypatch):
+    keyring = pytest.importorskip('keyring')
+    with temp_chdir(), LocalRepository(USERNAME, PASSWORD) as repository:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', PACKAGE_NAME, '--basic', '-ne'])
+        runner.invoke(hatch, ['build'])
+        monkeypatch.delenv('TWINE_PASSWORD', raising=False)
+        monkeypatch.setattr(
+            keyring, 'get_password',
+            lambda url, username: PASSWORD if (url, username) == (repository.url, USERNAME) else None
+        )
+
+        result = runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url])
+
+        assert result.exit_code == 0
+        assert 'Password' not in result.output
+        assert len(repository.uploads) == 2
+
+
+def test_local_repository_existing():
+    with temp_chdir(), LocalRepository(USERNAME, PASSWORD) as repository:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', PACKAGE_NAME, '--basic', '-ne'])
+        runner.invoke(hatch, ['build'])
+
+        with env_vars(ENV_VARS):
+            runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url])
+            result = runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url])
+            strict_result = runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url, '-s'])
+
+        assert result.exit_code == 0
+        assert '{}-0.0.1.tar.gz -> already uploaded, skipped'.format(PACKAGE_NAME) in result.output
+        assert strict_result.exit_code == 1
+        assert '{}-0.0.1.tar.gz -> failed: already uploaded'.format(PACKAGE_NAME) in strict_result.output
+        # Nothing was sent again.
+        assert repository.requests == 2
+
+
+def test_local_repository_rebuilt():
+    with temp_chdir() as d, LocalRepository(USERNAME, PASSWORD) as repository:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', PACKAGE_NAME, '--basic', '-ne'])
+        runner.invoke(hatch, ['build'])
+
+        with env_vars(ENV_VARS):
+            runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url])
+            with open(os.path.join(d, 'README.rst'), 'a') as f:
+                f.write('More.')
+            runner.invoke(hatch, ['build', '-c'])
+            result = runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url])
+
+        assert result.exit_code == 0
+        assert '{}-0.0.1.tar.gz -> already exists, skipped'.format(PACKAGE_NAME) in result.output
+        assert repository.requests == 4
+
+
+def test_local_repository_partial():
+    with temp_chdir() as d, LocalRepository(USERNAME, PASSWORD) as repository:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', PACKAGE_NAME, '--basic', '-ne'])
+        runner.invoke(hatch, ['build'])
+        os.rename(os.path.join(d, 'dist', '{}-0.0.1.tar.gz'.format(PACKAGE_NAME)), os.path.join(d, 'sdist'))
+
+        with env_vars(ENV_VARS):
+            runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url])
+            os.rename(os.path.join(d, 'sdist'), os.path.join(d, 'dist', '{}-0.0.1.tar.gz'.format(PACKAGE_NAME)))
+            result = runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url])
+
+        assert result.exit_code == 0
+        assert '{}-0.0.1-py3-none-any.whl -> already uploaded, skipped'.format(PACKAGE_NAME) in result.output
+        assert '{}-0.0.1.tar.gz -> '.format(PACKAGE_NAME) in result.output
+        assert repository.requests == 2
+
+
+def test_check_index():
+    with temp_chdir() as d, LocalRepository(USERNAME, PASSWORD) as repository:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', PACKAGE_NAME, '--basic', '-ne'])
+        runner.invoke(hatch, ['build'])
+        sdist = '{}-0.0.1.tar.gz'.format(PACKAGE_NAME)
+        wheel = '{}-0.0.1-py3-none-any.whl'.format(PACKAGE_NAME)
+        # Uploaded from elsewhere, the wheel being the same.
+        repository.uploads[sdist] = {}
+        repository.uploads[wheel] = {
+            'sha256_digest': [
+                hash_distribution(os.path.join(d, 'dist', wheel))['sha256_digest'].encode('ascii')
+            ]
+        }
+
+        with env_vars(ENV_VARS):
+            result = runner.invoke(hatch, ['release', '-u', USERNAME, '-ru', repository.url, '-ci'])
+
+        assert result.exit_code == 0
+        assert 'Checking {} for existing files...'.format(repository.index_url) in result.output
+        assert '{} -> already exists, skipped'.format(sdist) in result.output
+        assert '{} -> already uploaded, skipped'.format(wheel) in result.output
+        assert repository.index_requests == 1
+        assert repository.requests == 0
+        # Only files known to be the same count as uploaded.
+        assert list(get_recorded_uploads(repository.url)) == [wheel]
+
+
+def test_check_index_unavailable():
+    with temp_chdir() as d, LocalRepository(USERNAME, PASSWORD) as repository:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', PACKAGE_NAME, '--basic', '-ne'])
+        runner.invoke(hatch, ['build'])
+
+        with env_vars(ENV_VARS):
+            result = runner.invoke(hatch, [
+                'release', '-u', USERNAME, '-ru', repository.url, '-iu', 'http://127.0.0.1:1/simple/'
+            ])
+
+        assert result.exit_code == 0
+        assert 'Unable to query the index, uploading all files.' in result.output
+        assert repository.requests == 2
+
+
+def test_no_distributions():
+    with temp_chdir() as d:
+        runner = CliRunner()
+
+        with env_vars(ENV_VARS):
+            result = runner.invoke(hatch, ['release', '-u', USERNAME, '-t'])
+
+        assert result.exit_code == 1
+        assert 'No distributions found in `{}`.'.format(d) in result.output
@@ -96,6 +96,25 @@ def test_env():
         assert 'Successfully removed virtual env named `{}`.'.format(env_name) in result.output
 
 
+def test_env_wait():
+    with temp_chdir():
+        runner = CliRunner()
+
+        env_name = get_new_venv_name()
+        venv_dir = os.path.join(get_venv_dir(), env_name)
+
+        try:
+            runner.invoke(hatch, ['env', env_name])
+            wait_until(is_venv, venv_dir)
+            result = runner.invoke(hatch, ['shed', '-e', env_name, '-w'])
+            assert not os.path.exists(venv_dir)
+        finally:
+            remove_path(venv_dir)
+
+        assert result.exit_code == 0
+        assert 'Successfully removed virtual env named `{}`.'.format(env_name) in result.output
+
+
 def test_env_multiple():
     with temp_chdir():
         runner = CliRunner()
@@ -0,0 +1,158 @@
+import os
+
+from click.testing import CliRunner
+
+from hatch.cli import hatch
+from hatch.env import (
+    ENV_SYNC_VERSION, get_installed_packages, get_site_packages, save_env_sync
+)
+from hatch.structures import File
+from hatch.utils import env_vars, temp_chdir
+from hatch.venv import create_venv, venv
+
+
+def fake_install(name, requires=()):
+    site_packages = get_site_packages()[0]
+    dist_info = os.path.join(site_packages, '{}-1.0.dist-info'.format(name))
+    File('{}.py'.format(name), '').write(site_packages)
+    File('METADATA', 'Metadata-Version: 2.1\nName: {}\nVersion: 1.0\n{}'.format(
+        name, ''.join('Requires-Dist: {}\n'.format(requirement) for requirement in requires)
+    )).write(dist_info)
+    File('RECORD', '{0}.py,,\n{0}-1.0.dist-info/METADATA,,\n{0}-1.0.dist-info/RECORD,,\n'.format(
+        name
+    )).write(dist_info)
+
+
+def test_no_requirements():
+    with temp_chdir():
+        runner = CliRunner()
+        result = runner.invoke(hatch, ['sync', '-nd'])
+
+        assert result.exit_code == 1
+        assert 'Unable to locate a requirements file.' in result.output
+
+
+def test_no_venv():
+    with temp_chdir() as d:
+        File('requirements.txt', 'six\n').write(d)
+
+        runner = CliRunner()
+        with env_vars({'_IGNORE_VENV_': '1'}):
+            result = runner.invoke(hatch, ['sync', '-nd'])
+
+        assert result.exit_code == 1
+        assert 'Only virtual envs can be synced, none was found.' in result.output
+
+
+def test_invalid_requirements():
+    with temp_chdir() as d:
+        File('requirements.txt', '--unknown-option\n').write(d)
+        venv_dir = os.path.join(d, 'venv')
+        create_venv(venv_dir)
+
+        runner = CliRunner()
+        with venv(venv_dir):
+            result = runner.invoke(hatch, ['sync', '-nd'])
+
+        assert result.exit_code == 1
+        assert 'Unknown option `--unknown-option`' in result.output
+
+
+def test_sync():
+    with temp_chdir() as d:
+        File('requirements.txt', 'kept\n').write(d)
+        venv_dir = os.path.join(d, 'venv')
+        create_venv(venv_dir)
+
+        runner = CliRunner()
+        with venv(venv_dir):
+            fake_install('kept', ['needed'])
+            fake_install('needed')
+            fake_install('extra')
+
+            result = runner.invoke(hatch, ['sync', '-nd'])
+            installed_packages = get_installed_packages()
+
+        assert result.exit_code == 0
+        assert 'Uninstalling 1 unrequired packages...' in result.output
+        assert 'Installing' not in result.output
+        assert 'kept' in installed_packages
+        assert 'needed' in installed_packages
+        assert 'extra' not in installed_packages
+
+
+def test_sync_in_sync():
+    with temp_chdir() as d:
+        File('requirements.txt', 'kept\n').write(d)
+        venv_dir = os.path.join(d, 'venv')
+        create_venv(venv_dir)
+
+        runner = CliRunner()
+        with venv(venv_dir):
+            fake_install('kept')
+            result = runner.invoke(hatch, ['sync', '-nd'])
+
+        assert result.exit_code == 0
+        assert 'Already in sync with `requirements.txt`.' in result.output
+
+
+def test_sync_dry_run():
+    with temp_chdir() as d:
+        File('requirements.txt', 'kept\nsix>=1.10\n').write(d)
+        venv_dir = os.path.join(d, 'venv')
+        create_venv(venv_dir)
+
+        runner = CliRunner()
+        with venv(venv_dir):
+            fake_install('kept')
+            fake_install('extra')
+
+            result = runner.invoke(hatch, ['sync', '-nd', '-n'])
+            installed_packages = get_installed_packages()
+
+        assert result.exit_code == 0
+        assert 'Installing 1 missing or outdated requirements...' in result.output
+        assert 'install six>=1.10' in result.output
+        assert 'uninstall -y extra' in result.output
+        assert 'extra' in installed_packages
+
+
+def test_sync_keep():
+    with temp_chdir() as d:
+        File('requirements.txt', 'kept\n').write(d)
+        venv_dir = os.path.join(d, 'venv')
+        create_venv(venv_dir)
+
+        runner = CliRunner()
+        with venv(venv_dir):
+            fake_install('kept')
+            fake_install('extra')
+
+            result = runner.invoke(hatch, ['sync', '-nd', '-k'])
+            installed_packages = get_installed_packages()
+
+        assert result.exit_code == 0
+        assert 'extra' in installed_packages
+
+
+def test_sync_keeps_packages_installed_by_hatch():
+    with temp_chdir() as d:
+        File('requirements.txt', 'kept\n').write(d)
+        venv_dir = os.path.join(d, 'venv')
+        create_venv(venv_dir)
+        save_env_sync(venv_dir, {'version': ENV_SYNC_VERSION, 'packages': ['pytest']})
+
+        runner = CliRunner()
+        with venv(venv_dir):
+            fake_install('kept')
+            fake_install('pytest', requires=['pluggy'])
+            fake_install('pluggy')
+            fake_install('extra')
+
+            result = runner.invoke(hatch, ['sync', '-nd'])
+            installed_packages = get_installed_packages()
+
+        assert result.exit_code == 0
+        assert 'pytest' in installed_packages
+        assert 'pluggy' in installed_packages
+        assert 'extra' not in installed_packages
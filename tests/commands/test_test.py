@@ -1,4 +1,9 @@
 import os
+import signal
+import subprocess
+import sys
+import threading
+import xml.etree.ElementTree as ElementTree
 
 from click.testing import CliRunner
 
@@ -6,10 +11,13 @@ from hatch.cli import hatch
 from hatch.env import (
     get_editable_packages, get_installed_packages, install_packages
 )
-from hatch.utils import env_vars, temp_chdir
+from hatch.testing import load_test_history, save_test_history
+from hatch.utils import ON_WINDOWS, env_vars, temp_chdir
 from hatch.venv import create_venv, is_venv, venv
 from ..utils import requires_internet, wait_until
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 def create_test_passing(d):
     with open(os.path.join(d, 'tests', 'test_add.py'), 'w') as f:
@@ -55,6 +63,15 @@ def create_test_incomplete_coverage(d, pkg):
         )
 
 
+def create_tests_many(d, count, failing=()):
+    for i in range(count):
+        with open(os.path.join(d, 'tests', 'test_{}.py'.format(i)), 'w') as f:
+            f.write(
+                'def test_{0}():\n'
+                '    assert {1}\n'.format(i, i not in failing)
+            )
+
+
 def test_passing_cwd():
     with temp_chdir() as d:
         runner = CliRunner()
@@ -152,6 +169,23 @@ def test_project_no_venv_install_dev_requirements():
         assert '1 passed' in result.output
 
 
+@requires_internet
+def test_project_venv_in_sync():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_test_passing(d)
+
+        with env_vars({'_IGNORE_VENV_': '1'}):
+            runner.invoke(hatch, ['test'])
+            result = runner.invoke(hatch, ['test'])
+
+        assert result.exit_code == 0
+        assert 'Installing this project in the virtual env...' not in result.output
+        assert 'Ensuring pytest and coverage are available...' not in result.output
+        assert '1 passed' in result.output
+
+
 @requires_internet
 def test_project_no_venv_coverage():
     with temp_chdir() as d:
@@ -371,3 +405,257 @@ def test_coverage_args():
         result = runner.invoke(hatch, ['test', '-nd', '-c', '-ca', '--help'])
 
         assert '--parallel-mode' in result.output
+
+
+def test_jobs():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 4)
+
+        result = runner.invoke(hatch, ['test', '-nd', '-j', '2'])
+
+        assert result.exit_code == 0
+        assert 'Running 4 tests in 2 shards...' in result.output
+        assert '[1] ' in result.output
+        assert '[2] ' in result.output
+        assert 'Shard 1: 2 tests in ' in result.output
+        assert 'Shard 2: 2 tests in ' in result.output
+        assert '4 passed in ' in result.output
+
+        history = load_test_history(d)
+        assert sorted(history['tests']) == ['tests/test_{0}.py::test_{0}'.format(i) for i in range(4)]
+        assert all(test['outcome'] == 'passed' for test in history['tests'].values())
+
+
+def test_jobs_failing():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 3, failing=(1, ))
+
+        result = runner.invoke(hatch, ['test', '-nd', '-j', '3'])
+
+        assert result.exit_code == 1
+        assert '2 passed, 1 failed in ' in result.output
+        assert load_test_history(d)['tests']['tests/test_1.py::test_1']['outcome'] == 'failed'
+
+
+def test_jobs_test_args():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 4)
+
+        result = runner.invoke(hatch, ['test', '-nd', '-j', '2', '-ta', '--deselect tests/test_0.py::test_0'])
+
+        assert result.exit_code == 0
+        assert 'Running 3 tests in 2 shards...' in result.output
+
+
+def test_jobs_no_tests():
+    with temp_chdir():
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        result = runner.invoke(hatch, ['test', '-nd', '-j', '2'])
+
+        assert result.exit_code == 5
+        assert 'Running' not in result.output
+
+
+def test_jobs_invalid():
+    with temp_chdir():
+        runner = CliRunner()
+        result = runner.invoke(hatch, ['test', '-nd', '-j', '0'])
+
+        assert result.exit_code == 2
+        assert 'must be a positive integer or `auto`.' in result.output
+
+
+def test_jobs_coverage():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_test_complete_coverage(d, 'ok')
+        create_tests_many(d, 2)
+
+        result = runner.invoke(hatch, ['test', '-nd', '-c', '-j', '2'])
+
+        assert result.exit_code == 0
+        assert '3 passed in ' in result.output
+        assert result.output.strip().endswith(' 100%')
+        assert not [name for name in os.listdir(d) if name.startswith('.coverage.')]
+
+
+def test_jobs_junit():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 5, failing=(3, ))
+        junit_file = os.path.join(d, 'reports', 'junit.xml')
+
+        result = runner.invoke(hatch, ['test', '-nd', '-j', '2', '-ta', '--junitxml {}'.format(junit_file)])
+        suite = ElementTree.parse(junit_file).getroot().find('testsuite')
+
+        assert result.exit_code == 1
+        assert suite.get('tests') == '5'
+        assert suite.get('failures') == '1'
+        assert len(suite.findall('testcase')) == 5
+
+
+def test_history():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 2, failing=(1, ))
+
+        runner.invoke(hatch, ['test', '-nd'])
+        result = runner.invoke(hatch, ['test', '-nd'])
+        tests = load_test_history(d)['tests']
+
+        assert result.exit_code == 1
+        assert sorted(tests) == ['tests/test_0.py::test_0', 'tests/test_1.py::test_1']
+        assert tests['tests/test_0.py::test_0']['outcome'] == 'passed'
+        assert tests['tests/test_1.py::test_1']['outcome'] == 'failed'
+        assert tests['tests/test_1.py::test_1']['previous_outcome'] == 'failed'
+        assert tests['tests/test_1.py::test_1']['previous_duration'] is not None
+
+
+def test_slowest():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 3)
+
+        result = runner.invoke(hatch, ['test', '-nd', '-sl', '2'])
+
+        assert result.exit_code == 0
+        assert 'Slowest 2 tests:' in result.output
+        assert result.output.count('(new)') == 2
+
+        result = runner.invoke(hatch, ['test', '-nd', '-sl', '5'])
+
+        assert result.exit_code == 0
+        assert 'Slowest 3 tests:' in result.output
+        assert '(new)' not in result.output
+        assert result.output.count('%)') == 3
+
+
+def test_slowest_jobs():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 3)
+
+        result = runner.invoke(hatch, ['test', '-nd', '-j', '2', '-sl', '1'])
+
+        assert result.exit_code == 0
+        assert 'Slowest 1 tests:' in result.output
+
+
+def test_order_failed_first():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 3, failing=(2, ))
+        runner.invoke(hatch, ['test', '-nd'])
+
+        result = runner.invoke(hatch, ['test', '-nd', '-o', 'failed-first', '-ta', '-v'])
+
+        assert result.exit_code == 1
+        assert result.output.index('test_2 FAILED') < result.output.index('test_0 PASSED')
+
+
+def test_order_longest_first():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_tests_many(d, 3)
+        save_test_history(d, {'version': 1, 'tests': {
+            'tests/test_0.py::test_0': {'duration': 0.01, 'outcome': 'passed'},
+            'tests/test_1.py::test_1': {'duration': 5.0, 'outcome': 'passed'},
+        }})
+
+        result = runner.invoke(hatch, ['test', '-nd', '-o', 'longest-first', '-ta', '-v'])
+
+        assert result.exit_code == 0
+        positions = [result.output.index('test_{} PASSED'.format(i)) for i in (1, 2, 0)]
+        assert positions == sorted(positions)
+
+
+def test_watch_invalid():
+    with temp_chdir():
+        runner = CliRunner()
+        result = runner.invoke(hatch, ['test', '-nd', '-w', '-j', '2'])
+
+        assert result.exit_code == 1
+        assert '--watch cannot be used with --cov or --jobs.' in result.output
+
+
+def test_watch():
+    if ON_WINDOWS:  # no cov
+        return
+
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        for name, op in (('add', '+'), ('sub', '-')):
+            with open(os.path.join(d, 'ok', '{}.py'.format(name)), 'w') as f:
+                f.write('def {}(a, b):\n    return a {} b\n'.format(name, op))
+            with open(os.path.join(d, 'tests', 'test_{}.py'.format(name)), 'w') as f:
+                f.write(
+                    'from ok.{0} import {0}\n'
+                    'def test_{0}():\n'
+                    '    assert {0}(3, 2) == 3 {1} 2\n'.format(name, op)
+                )
+
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'hatch', 'test', '-nd', '-w'],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
+            env=dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+        )
+        lines = []
+
+        def read():
+            for line in iter(process.stdout.readline, ''):
+                lines.append(line)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+
+        try:
+            wait_until(lambda: any('Watching for changes' in line for line in lines))
+            assert any('2 passed' in line for line in lines)
+
+            with open(os.path.join(d, 'ok', 'sub.py'), 'w') as f:
+                f.write('def sub(a, b):\n    return a - b + 0\n')
+
+            wait_until(lambda: sum('Watching for changes' in line for line in lines) == 2)
+        finally:
+            process.send_signal(signal.SIGINT)
+            process.wait()
+            reader.join()
+
+        output = ''.join(lines)
+        assert 'Testing what the changes affect...' in output
+        assert '1 passed, 1 deselected' in output
+
+
+def test_log_file():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        create_test_complete_coverage(d, 'ok')
+        log_file = os.path.join(d, 'test.log')
+
+        result = runner.invoke(hatch, ['test', '-nd', '-c', '-lf', log_file])
+
+        with open(log_file, 'r') as f:
+            log = f.read()
+
+        assert result.exit_code == 0
+        assert '1 passed' in result.output
+        assert '1 passed' in log
+        assert log.strip().endswith(' 100%')
+        assert 'checking coverage' not in log
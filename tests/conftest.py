@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+from hatch import env, pep517, trash, upload, venv
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_caches(tmp_path_factory):
+    # Never touch the caches and data of the developer running the tests.
+    cache_dir = str(tmp_path_factory.mktemp('cache'))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(env, 'PYTHON_INFO_CACHE', os.path.join(cache_dir, 'pythons.json'))
+        monkeypatch.setattr(env, 'DISTRIBUTIONS_CACHE', os.path.join(cache_dir, 'distributions.json'))
+        monkeypatch.setattr(pep517, 'BUILD_ENVS_DIR', os.path.join(cache_dir, 'build-envs'))
+        monkeypatch.setattr(trash, 'TRASH_DIR', os.path.join(cache_dir, 'trash'))
+        monkeypatch.setattr(venv, 'VENV_TEMPLATES_DIR', os.path.join(cache_dir, 'templates'))
+        monkeypatch.setattr(upload, 'UPLOAD_LEDGER_FILE', os.path.join(cache_dir, 'uploads.json'))
+        yield cache_dir
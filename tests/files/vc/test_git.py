@@ -1,8 +1,15 @@
 import os
 
+import pytest
+
 from hatch.create import create_package
+from hatch.files.vc.git import (
+    UnsupportedGitConfig, get_config_value, normalize_config_key,
+    read_git_config
+)
 from hatch.settings import copy_default_settings
-from hatch.utils import temp_chdir
+from hatch.structures import File
+from hatch.utils import env_vars, temp_chdir
 from ...utils import read_file
 
 
@@ -27,3 +34,66 @@ def test_gitattributes():
             '# Auto detect text files and perform LF normalization\n'
             '* text=auto\n'
         )
+
+
+class TestConfig:
+    def test_global(self):
+        with temp_chdir() as d:
+            File(
+                '.gitconfig',
+                '[user]\n'
+                '    name = Don Quixote\n'
+                '    email = no-reply@dev.null\n'
+            ).write(d)
+
+            with env_vars({'HOME': d, 'XDG_CONFIG_HOME': os.path.join(d, 'xdg')}):
+                assert get_config_value('user.name', d) == 'Don Quixote'
+                assert get_config_value('user.email', d) == 'no-reply@dev.null'
+
+    def test_precedence(self):
+        with temp_chdir() as d:
+            File('config', '[user]\nname = xdg\nemail = xdg@dev.null\n').write(os.path.join(d, 'xdg', 'git'))
+            File('.gitconfig', '[user]\nname = global\n').write(d)
+            File('config', '[user]\nname = repo\n').write(os.path.join(d, 'project', '.git'))
+
+            with env_vars({'HOME': d, 'XDG_CONFIG_HOME': os.path.join(d, 'xdg')}):
+                assert get_config_value('user.name', d) == 'global'
+                assert get_config_value('user.email', d) == 'xdg@dev.null'
+                assert get_config_value('user.name', os.path.join(d, 'project', 'src')) == 'repo'
+
+    def test_include(self):
+        with temp_chdir() as d:
+            File('.gitconfig', '[user]\nname = before\n[include]\npath = extra/user\n').write(d)
+            File('user', '[user]\nname = included\n').write(os.path.join(d, 'extra'))
+
+            with env_vars({'HOME': d, 'XDG_CONFIG_HOME': os.path.join(d, 'xdg')}):
+                assert get_config_value('user.name', d) == 'included'
+
+    def test_syntax(self):
+        with temp_chdir() as d:
+            File(
+                '.gitconfig',
+                '# comment\n'
+                '[User] ; comment\n'
+                '\tName = "  Don  Quixote " # comment\n'
+                '[remote "Origin"] url = a\\\n'
+                'b\\tc\n'
+                '[core]\n'
+                '    bare\n'
+            ).write(d)
+
+            with env_vars({'HOME': d, 'XDG_CONFIG_HOME': os.path.join(d, 'xdg')}):
+                values = read_git_config(d)
+
+            assert values['user.name'] == '  Don  Quixote '
+            assert values['remote.Origin.url'] == 'ab\tc'
+            assert values['core.bare'] == ''
+            assert normalize_config_key('Remote.Origin.URL') == 'remote.Origin.url'
+
+    def test_conditional_include_unsupported(self):
+        with temp_chdir() as d:
+            File('.gitconfig', '[includeIf "gitdir:~/work/"]\npath = work\n').write(d)
+
+            with env_vars({'HOME': d, 'XDG_CONFIG_HOME': os.path.join(d, 'xdg')}):
+                with pytest.raises(UnsupportedGitConfig):
+                    read_git_config(d)
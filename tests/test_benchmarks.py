@@ -0,0 +1,86 @@
+import os
+
+from click.testing import CliRunner
+
+from benchmarks import fixtures
+from benchmarks.__main__ import benchmarks
+from benchmarks.history import (
+    compare_results, create_entry, find_entry, load_history, save_history
+)
+from benchmarks.suite import BENCHMARKS, run_benchmarks, select_benchmarks
+from hatch.clean import clean_package
+from hatch.utils import temp_chdir
+
+
+def result(median):
+    return {'min': median, 'median': median, 'mean': median, 'stdev': 0.0, 'repeat': 1}
+
+
+def test_fixtures_are_cleaned():
+    with temp_chdir() as d:
+        package_dirs = fixtures.make_source_tree(d, 120)
+        compiled = fixtures.make_compiled_files(package_dirs)
+        fixtures.make_build_artifacts(d)
+
+        removed = clean_package(d)
+
+        assert len(package_dirs) == 3
+        assert compiled == 12
+        assert len(removed) == len(package_dirs) + 3
+
+
+def test_smoke():
+    results = run_benchmarks('smoke', repeat=1)
+
+    assert [name.split('[')[0] for name in results] == list(BENCHMARKS)
+    assert all(r['median'] > 0 and r['repeat'] == 1 for r in results.values())
+
+
+def test_select():
+    names = [name for name, _, _ in select_benchmarks('full', ['fix_venv'])]
+
+    assert names == ['fix_venv[1000]', 'fix_venv[5000]', 'fix_venv_current[1000]', 'fix_venv_current[5000]']
+
+
+def test_compare_results():
+    base = {'a': result(1.0), 'b': result(1.0), 'c': result(1.0)}
+    head = {'a': result(1.05), 'b': result(1.5), 'd': result(1.0)}
+
+    comparisons = compare_results(base, head, 0.1)
+
+    assert [(name, regressed) for name, _, _, _, regressed in comparisons] == [('a', False), ('b', True)]
+    assert comparisons[1][1:4] == (1.0, 1.5, 0.5)
+
+
+def test_history():
+    with temp_chdir() as d:
+        path = os.path.join(d, 'history', 'benchmarks.json')
+        first = create_entry({'a': result(1.0)}, 'smoke', 'first')
+        second = create_entry({'a': result(2.0)}, 'smoke', 'second')
+        second['commit'] = 'abc1234'
+        save_history([first, second], path)
+
+        history = load_history(path)
+
+        assert history == [first, second]
+        assert find_entry(history, 'first') == first
+        assert find_entry(history, 'abc') == second
+        assert find_entry(history, 'missing') is None
+
+
+def test_compare_command():
+    with temp_chdir() as d:
+        path = os.path.join(d, 'benchmarks.json')
+        save_history([
+            create_entry({'a': result(1.0)}, 'smoke', 'base'),
+            create_entry({'a': result(1.2)}, 'smoke', 'head'),
+        ], path)
+        runner = CliRunner()
+
+        regressed = runner.invoke(benchmarks, ['compare', '--history', path])
+        tolerated = runner.invoke(benchmarks, ['compare', 'base', 'head', '--threshold', '0.5', '--history', path])
+
+        assert regressed.exit_code == 1
+        assert 'a: 1.000s -> 1.200s (+20.0%)' in regressed.output
+        assert '1 benchmark regressed by more than 10%.' in regressed.output
+        assert tolerated.exit_code == 0
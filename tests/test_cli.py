@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+import hatch as hatch_package
+from hatch.cli import COMMANDS, hatch
+from hatch.utils import temp_chdir
+
+HEAVY_MODULES = ['pexpect', 'semver', 'sortedcontainers', 'toml', 'twine']
+
+
+def get_loaded_modules(args):
+    script = (
+        'import json, sys\n'
+        'from click.testing import CliRunner\n'
+        'from hatch.cli import hatch\n'
+        'CliRunner().invoke(hatch, {})\n'
+        'print(json.dumps(sorted(sys.modules)))\n'
+    ).format(args)
+    # Ensure this copy of Hatch is used even when it's not installed.
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.dirname(os.path.dirname(hatch_package.__file__))
+    output = subprocess.check_output([sys.executable, '-c', script], env=env)
+    return set(json.loads(output.decode()))
+
+
+def test_all_commands_resolve():
+    for name in COMMANDS:
+        assert hatch.get_command(None, name).name == name
+
+
+def test_alias():
+    assert hatch.get_command(None, 'use').name == 'shell'
+
+
+def test_unknown_command():
+    assert hatch.get_command(None, 'the_knights_who_say_ni') is None
+
+
+def test_version_imports_no_commands():
+    modules = get_loaded_modules(['--version'])
+
+    assert not set(COMMANDS.values()) & modules
+    assert not set(HEAVY_MODULES) & modules
+
+
+def test_clean_imports_no_heavy_modules():
+    with temp_chdir():
+        modules = get_loaded_modules(['clean'])
+
+    assert 'hatch.commands.clean' in modules
+    assert not set(HEAVY_MODULES) & modules
+
+
+def test_timings():
+    with temp_chdir():
+        result = CliRunner().invoke(hatch, ['--timings', 'shell', 'missing-env'])
+
+    assert result.exit_code == 1
+    assert 'Timings:' in result.output
+    assert 'Total: ' in result.output
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from hatch.clone import clone_file, clone_tree, copy_file
+from hatch.structures import File
+from hatch.utils import ON_WINDOWS, temp_chdir
+from .utils import read_file
+
+
+def create_tree(d):
+    File('a.py', 'a' * 100).write(os.path.join(d, 'src'))
+    File('b.py', 'b' * 200).write(os.path.join(d, 'src', 'pkg'))
+    File('c.cfg', 'c' * 300).write(os.path.join(d, 'src', 'pkg', 'sub'))
+
+
+def test_copy_file():
+    with temp_chdir() as d:
+        File('big', 'x' * (3 * 1024 * 1024 + 7)).write(d)
+        copy_file(os.path.join(d, 'big'), os.path.join(d, 'copy'))
+
+        assert read_file(os.path.join(d, 'copy')) == 'x' * (3 * 1024 * 1024 + 7)
+
+
+def test_clone_file_copy():
+    with temp_chdir() as d:
+        File('file', 'contents').write(d)
+        shared = clone_file(os.path.join(d, 'file'), os.path.join(d, 'clone'), mode='copy')
+
+        assert shared is False
+        assert read_file(os.path.join(d, 'clone')) == 'contents'
+        assert not os.path.samefile(os.path.join(d, 'file'), os.path.join(d, 'clone'))
+
+
+def test_clone_file_auto_never_hardlinks():
+    with temp_chdir() as d:
+        File('file', 'contents').write(d)
+        clone_file(os.path.join(d, 'file'), os.path.join(d, 'clone'))
+
+        assert read_file(os.path.join(d, 'clone')) == 'contents'
+        assert not os.path.samefile(os.path.join(d, 'file'), os.path.join(d, 'clone'))
+
+
+def test_clone_file_hardlink():
+    with temp_chdir() as d:
+        File('file', 'contents').write(d)
+        shared = clone_file(os.path.join(d, 'file'), os.path.join(d, 'clone'), mode='hardlink')
+
+        assert shared is True
+        assert os.path.samefile(os.path.join(d, 'file'), os.path.join(d, 'clone'))
+
+
+def test_clone_tree():
+    with temp_chdir() as d:
+        create_tree(d)
+        src = os.path.join(d, 'src')
+        dst = os.path.join(d, 'dst')
+
+        stats = clone_tree(src, dst, mode='hardlink', copy_only=lambda path: path.endswith('.cfg'))
+
+        assert stats.files == 3
+        assert stats.total_bytes == 600
+        assert stats.shared_bytes == 300
+        assert read_file(os.path.join(dst, 'pkg', 'b.py')) == 'b' * 200
+        assert os.path.samefile(os.path.join(src, 'a.py'), os.path.join(dst, 'a.py'))
+        assert not os.path.samefile(
+            os.path.join(src, 'pkg', 'sub', 'c.cfg'), os.path.join(dst, 'pkg', 'sub', 'c.cfg')
+        )
+
+
+@pytest.mark.skipif(ON_WINDOWS, reason='Symlinks require privileges on Windows')
+def test_clone_tree_symlinks():
+    with temp_chdir() as d:
+        create_tree(d)
+        src = os.path.join(d, 'src')
+        dst = os.path.join(d, 'dst')
+        os.symlink(os.path.join(src, 'pkg'), os.path.join(src, 'absolute'))
+        os.symlink('pkg', os.path.join(src, 'relative'))
+        os.symlink(os.path.join(d, 'old', 'pkg'), os.path.join(src, 'moved'))
+
+        clone_tree(src, dst, mode='copy', link_prefixes=[os.path.join(d, 'old')])
+
+        assert os.readlink(os.path.join(dst, 'absolute')) == os.path.join(dst, 'pkg')
+        assert os.readlink(os.path.join(dst, 'relative')) == 'pkg'
+        assert os.readlink(os.path.join(dst, 'moved')) == os.path.join(dst, 'pkg')
+
+
+def test_clone_tree_unknown_mode():
+    with temp_chdir() as d:
+        with pytest.raises(ValueError):
+            clone_tree(d, os.path.join(d, 'dst'), mode='teleport')
@@ -0,0 +1,88 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from hatch.context import ExecutionContext
+from hatch.env import get_python_info
+from hatch.utils import env_vars, temp_chdir
+from hatch.venv import create_venv, locate_exe_dir, venv
+
+PRINT_ENV = 'import os, sys; print(os.getcwd()); print(os.environ.get(sys.argv[1], ""))'
+
+
+def test_snapshot():
+    with env_vars({'_HATCH_CONTEXT_TEST_': '1'}):
+        context = ExecutionContext()
+
+    assert context.env['_HATCH_CONTEXT_TEST_'] == '1'
+    assert '_HATCH_CONTEXT_TEST_' not in os.environ
+    assert context.cwd == os.getcwd()
+
+
+def test_with_env():
+    context = ExecutionContext({'FOO': 'foo', 'BAR': 'bar'}, os.getcwd())
+    new_context = context.with_env({'BAZ': 'baz'}, ignore=['BAR'])
+
+    assert new_context.env == {'FOO': 'foo', 'BAZ': 'baz'}
+    assert context.env == {'FOO': 'foo', 'BAR': 'bar'}
+
+
+def test_with_cwd():
+    with temp_chdir() as d:
+        os.makedirs(os.path.join(d, 'sub'))
+        context = ExecutionContext().with_cwd('sub')
+
+        assert context.cwd == os.path.join(d, 'sub')
+        assert os.getcwd() == d
+
+
+def test_run():
+    with temp_chdir() as d:
+        os.makedirs(os.path.join(d, 'sub'))
+        context = ExecutionContext().with_cwd('sub').with_env({'_HATCH_CONTEXT_TEST_': 'ok'})
+
+        output = context.check_output(
+            [sys.executable, '-c', PRINT_ENV, '_HATCH_CONTEXT_TEST_']
+        ).decode().splitlines()
+
+        assert os.path.realpath(output[0]) == os.path.realpath(os.path.join(d, 'sub'))
+        assert output[1] == 'ok'
+
+
+def test_with_venv():
+    with temp_chdir() as d:
+        venv_dir = os.path.join(d, 'venv')
+        create_venv(venv_dir)
+        path = os.environ.get('PATH')
+
+        context = ExecutionContext().with_venv(venv_dir)
+
+        assert os.environ.get('PATH') == path
+        assert os.environ.get('VIRTUAL_ENV') != venv_dir
+        assert context.venv_active
+        assert context.env['VIRTUAL_ENV'] == venv_dir
+        assert os.path.dirname(context.python) == locate_exe_dir(venv_dir)
+        assert os.path.dirname(context.pip) == locate_exe_dir(venv_dir)
+
+        with venv(venv_dir):
+            assert get_python_info(context=context) == get_python_info()
+
+
+def test_concurrent_venvs():
+    with temp_chdir() as d:
+        venv_dirs = [os.path.join(d, name) for name in ('venv1', 'venv2', 'venv3')]
+        for venv_dir in venv_dirs:
+            create_venv(venv_dir)
+
+        def get_prefix(venv_dir):
+            context = ExecutionContext().with_venv(venv_dir)
+            return context.check_output(
+                [context.python, '-c', 'import sys; print(sys.prefix)']
+            ).decode().strip()
+
+        with ThreadPoolExecutor(max_workers=len(venv_dirs)) as executor:
+            prefixes = list(executor.map(get_prefix, venv_dirs))
+
+        assert [os.path.realpath(prefix) for prefix in prefixes] == [
+            os.path.realpath(venv_dir) for venv_dir in venv_dirs
+        ]
@@ -0,0 +1,148 @@
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import pytest
+from click.testing import CliRunner
+
+import hatch as hatch_package
+from hatch import __version__
+from hatch.cli import hatch
+from hatch.client import DAEMON_SUPPORTED, SOCKET_ENV_VAR, forward, request
+from hatch.daemon import get_peer_uid
+from hatch.utils import create_file, env_vars, temp_chdir
+
+pytestmark = pytest.mark.skipif(not DAEMON_SUPPORTED, reason='Requires Unix domain sockets')
+
+# So that the daemon imports this hatch wherever it starts.
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(hatch_package.__file__)))
+
+
+@contextmanager
+def running_daemon(d):
+    path = os.path.join(d, 'daemon.sock')
+    python_path = os.pathsep.join(filter(None, (PACKAGE_ROOT, os.environ.get('PYTHONPATH'))))
+    # Keeps what commands write, e.g. the trash, out of the user's data.
+    with env_vars({
+        SOCKET_ENV_VAR: path, 'PYTHONPATH': python_path,
+        'XDG_CACHE_HOME': os.path.join(d, 'cache'), 'XDG_DATA_HOME': os.path.join(d, 'data'),
+    }):
+        daemon_process = subprocess.Popen(
+            [sys.executable, '-m', 'hatch', 'daemon', '--foreground'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            end_time = time.time() + 30
+            while request({'command': 'status'}, path) is None:
+                assert daemon_process.poll() is None and time.time() < end_time
+                time.sleep(0.05)
+
+            yield path
+        finally:
+            if request({'command': 'stop'}, path) is None:  # no cov
+                daemon_process.kill()
+            daemon_process.wait()
+
+
+def test_not_running():
+    with temp_chdir() as d:
+        assert forward(['--version'], os.path.join(d, 'daemon.sock')) is None
+
+
+def test_forward(capfd):
+    with temp_chdir() as d:
+        with running_daemon(d) as path:
+            capfd.readouterr()
+            code = forward(['--version'], path)
+            output = capfd.readouterr().out
+            status = request({'command': 'status'}, path)
+
+        assert code == 0
+        assert 'version {}'.format(__version__) in output
+        assert status['requests'] == 1
+        assert not os.path.exists(path)
+
+
+def test_forward_cwd_and_env(capfd):
+    with temp_chdir() as d:
+        project_dir = os.path.join(d, 'project')
+        create_file(os.path.join(project_dir, 'setup.py'))
+        create_file(os.path.join(project_dir, '__pycache__', 'module.pyc'))
+        trace_file = os.path.join(d, 'trace.json')
+
+        with running_daemon(d) as path:
+            os.chdir(project_dir)
+            with env_vars({'HATCH_TRACE': trace_file}):
+                code = forward(['clean', '-v'], path)
+            output = capfd.readouterr().out
+
+        assert code == 0
+        assert os.path.join(project_dir, '__pycache__') in output
+        assert not os.path.exists(os.path.join(project_dir, '__pycache__'))
+        with open(trace_file) as f:
+            assert any(event['name'] == 'clean_package' for event in json.load(f)['traceEvents'])
+
+
+def test_exit_code(capfd):
+    with temp_chdir() as d:
+        with running_daemon(d) as path:
+            code = forward(['grow', 'invalid'], path)
+
+        assert code == 2
+        assert "Invalid value for '{major|minor|patch|fix|pre|build}'" in capfd.readouterr().err
+
+
+def test_fallback():
+    with temp_chdir() as d:
+        with running_daemon(d) as path:
+            local = [forward([command], path) for command in ('shell', 'release', 'new')]
+            incompatible = request({
+                'command': 'run', 'version': '0.0.0', 'executable': sys.executable,
+                'argv': [], 'env': dict(os.environ), 'cwd': d
+            }, path)
+            other_python = request({
+                'command': 'run', 'version': __version__, 'executable': os.path.join(d, 'python'),
+                'argv': [], 'env': dict(os.environ), 'cwd': d
+            }, path)
+            status = request({'command': 'status'}, path)
+
+        assert local == [None, None, None]
+        assert 'fallback' in incompatible
+        assert 'fallback' in other_python
+        assert status['requests'] == 0
+
+
+def test_socket_permissions():
+    with temp_chdir() as d:
+        with running_daemon(d) as path:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(path)
+                peer_uid = get_peer_uid(sock)
+
+        assert mode == 0o600
+        assert peer_uid in (None, os.getuid())
+
+
+def test_command_status_and_stop():
+    with temp_chdir() as d:
+        with running_daemon(d) as path:
+            runner = CliRunner()
+            status = runner.invoke(hatch, ['daemon', '--status'])
+            stop = runner.invoke(hatch, ['daemon', '--stop'])
+
+            end_time = time.time() + 30
+            while os.path.exists(path) and time.time() < end_time:
+                time.sleep(0.05)
+            not_running = runner.invoke(hatch, ['daemon', '--status'])
+
+        assert status.exit_code == 0
+        assert 'Socket: {}'.format(path) in status.output
+        assert stop.exit_code == 0
+        assert 'Stopped the daemon' in stop.output
+        assert 'The daemon is not running.' in not_running.output
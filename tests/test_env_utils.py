@@ -1,17 +1,156 @@
+import json
 import os
+import sys
+from pathlib import Path
 
+import pytest
 from click.testing import CliRunner
 
+from hatch import env
 from hatch.cli import hatch
 from hatch.env import (
-    get_editable_package_location, get_installed_packages, get_package_version,
-    install_packages
+    PYTHON_INFO_VERSION, get_editable_package_location,
+    get_env_sync_steps, get_installed_packages, get_package_version,
+    get_python_info, get_site_packages, install_packages, load_cache,
+    save_env_sync, scan_site_packages
 )
-from hatch.utils import temp_chdir
+from hatch.structures import File
+from hatch.utils import remove_path, temp_chdir
 from hatch.venv import create_venv, venv
 from .utils import requires_internet
 
 
+def test_get_python_info():
+    info = get_python_info(sys.executable)
+
+    assert info['executable'] == sys.executable
+    assert info['version'] == '.'.join(str(i) for i in sys.version_info[:3])
+    assert info['prefix'] == sys.prefix
+    assert info['site_packages']
+
+
+def test_get_python_info_cached(monkeypatch, tmp_path):
+    cache_file = str(tmp_path / 'pythons.json')
+    monkeypatch.setattr(env, 'PYTHON_INFO_CACHE', cache_file)
+    path = os.path.abspath(sys.executable)
+    get_python_info(path)
+
+    with open(cache_file, 'r') as f:
+        assert path in json.loads(f.read())['entries']
+
+    entry = load_cache(cache_file, PYTHON_INFO_VERSION)['entries'][path]
+    entry['info'] = dict(entry['info'], version='cached')
+    assert get_python_info(path)['version'] == 'cached'
+
+    # A changed binary is probed again.
+    entry['signature'] = [0, 0, 0]
+    assert get_python_info(path)['version'] != 'cached'
+
+
+def test_get_env_sync_steps():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+        requirements = os.path.join(d, 'dev-requirements.txt')
+        with open(requirements, 'w') as f:
+            f.write('six\n-r base-requirements.txt\n')
+        base_requirements = os.path.join(d, 'base-requirements.txt')
+        with open(base_requirements, 'w') as f:
+            f.write('toml\n')
+
+        venv_dir = os.path.join(d, 'venv')
+        create_venv(venv_dir)
+
+        with venv(venv_dir):
+            site_packages = get_site_packages()[-1]
+            for name in ('pytest', 'coverage'):
+                File('METADATA', 'Name: {}\nVersion: 1.0\n'.format(name)).write(
+                    os.path.join(site_packages, '{}-1.0.dist-info'.format(name))
+                )
+
+            steps, marker = get_env_sync_steps(venv_dir, d, ['pytest'], requirements)
+            assert steps == [
+                ('project', ['-e', '.']),
+                ('packages', ['pytest']),
+                ('requirements', ['-r', requirements]),
+            ]
+
+            save_env_sync(venv_dir, marker)
+            assert get_env_sync_steps(venv_dir, d, ['pytest'], requirements)[0] == []
+            assert get_env_sync_steps(venv_dir, d)[0] == []
+
+            with open(base_requirements, 'a') as f:
+                f.write('click\n')
+            assert get_env_sync_steps(venv_dir, d, ['pytest', 'coverage'], requirements)[0] == [
+                ('packages', ['coverage']),
+                ('requirements', ['-r', requirements]),
+            ]
+
+            with open(os.path.join(d, 'setup.py'), 'a') as f:
+                f.write('\n')
+            assert get_env_sync_steps(venv_dir, d)[0] == [('project', ['-e', '.'])]
+
+            # Packages that are no longer installed are installed again.
+            remove_path(os.path.join(site_packages, 'pytest-1.0.dist-info'))
+            assert get_env_sync_steps(venv_dir, d, ['pytest'], requirements)[0] == [
+                ('project', ['-e', '.']),
+                ('packages', ['pytest']),
+                ('requirements', ['-r', requirements]),
+            ]
+
+
+def test_scan_site_packages():
+    with temp_chdir() as d:
+        site_packages = os.path.join(d, 'site-packages')
+        project = os.path.join(d, 'project')
+        File(
+            'METADATA',
+            'Metadata-Version: 2.1\nName: Foo-Bar\nVersion: 1.0\n'
+            'Requires-Dist: six\nRequires-Dist: toml; extra == "toml"\n\nName: no'
+        ).write(os.path.join(site_packages, 'Foo_Bar-1.0.dist-info'))
+        File('PKG-INFO', 'Name: baz\nVersion: 2.0\n').write(
+            os.path.join(site_packages, 'baz-2.0-py3.6.egg-info')
+        )
+        File('requires.txt', 'six\n\n[:python_version < "3"]\nenum34\n\n[fast]\nujson\n').write(
+            os.path.join(site_packages, 'baz-2.0-py3.6.egg-info')
+        )
+        File('legacy-3.0-py3.6.egg-info', 'Name: legacy\nVersion: 3.0\n').write(site_packages)
+        File('ok.egg-link', project + '\n.').write(site_packages)
+        File('PKG-INFO', 'Name: ok\nVersion: 0.0.1\n').write(os.path.join(project, 'ok.egg-info'))
+        File('METADATA', 'Name: new\nVersion: 4.0\n').write(
+            os.path.join(site_packages, 'new-4.0.dist-info')
+        )
+        File('direct_url.json', json.dumps({
+            'url': Path(project).as_uri(), 'dir_info': {'editable': True}
+        })).write(os.path.join(site_packages, 'new-4.0.dist-info'))
+
+        distributions, dependencies = scan_site_packages(site_packages)
+        distributions = {dist['name']: dist for dist in distributions}
+
+        assert distributions['Foo-Bar'] == {
+            'name': 'Foo-Bar', 'version': '1.0', 'editable': False, 'location': site_packages,
+            'requires': ['six', 'toml; extra == "toml"'],
+        }
+        assert distributions['baz']['version'] == '2.0'
+        assert distributions['baz']['requires'] == [
+            'six', 'enum34; (python_version < "3")', 'ujson; extra == "fast"'
+        ]
+        assert distributions['legacy']['version'] == '3.0'
+        assert distributions['ok'] == {
+            'name': 'ok', 'version': '0.0.1', 'editable': True, 'location': project,
+            'requires': [],
+        }
+        assert distributions['new'] == {
+            'name': 'new', 'version': '4.0', 'editable': True, 'location': project,
+            'requires': [],
+        }
+        assert project in dependencies
+
+
+def test_get_package_version():
+    assert get_package_version('pytest') == pytest.__version__
+
+
 def test_get_package_version_not_installed():
     assert get_package_version('the_knights_who_say_ni') == ''
 
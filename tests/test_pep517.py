@@ -0,0 +1,116 @@
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from hatch.cli import hatch
+from hatch.exceptions import BuildBackendError
+from hatch.pep517 import (
+    DEFAULT_BUILD_BACKEND, BuildBackend, get_build_env, get_build_system,
+    start_build_backend
+)
+from hatch.utils import temp_chdir
+from hatch.venv import is_venv
+from .utils import requires_internet
+
+IN_TREE_BACKEND = """\
+import os
+
+
+def get_requires_for_build_sdist(config_settings=None):
+    return []
+
+
+def build_sdist(sdist_directory, config_settings=None):
+    with open(os.path.join(sdist_directory, 'ok.tar.gz'), 'w') as f:
+        f.write(os.getcwd())
+    return 'ok.tar.gz'
+
+
+def build_wheel(wheel_directory, config_settings=None, metadata_directory=None):
+    print('noise')
+    raise RuntimeError('nope')
+"""
+
+
+def write_project(d, build_system):
+    with open(os.path.join(d, 'pyproject.toml'), 'w') as f:
+        f.write('[build-system]\n' + build_system)
+
+
+def test_get_build_system_missing():
+    with temp_chdir() as d:
+        assert get_build_system(d) is None
+
+
+def test_get_build_system_no_requires():
+    with temp_chdir() as d:
+        write_project(d, "build-backend = 'backend'\n")
+
+        assert get_build_system(d) is None
+
+
+def test_get_build_system_default_backend():
+    with temp_chdir() as d:
+        write_project(d, "requires = ['setuptools']\n")
+
+        assert get_build_system(d) == {
+            'requires': ['setuptools'],
+            'build-backend': DEFAULT_BUILD_BACKEND,
+            'backend-path': [],
+        }
+
+
+def test_get_build_env_reused():
+    env_dir = get_build_env([])
+
+    assert is_venv(env_dir)
+    assert os.path.isfile(env_dir + '.json')
+    assert get_build_env([]) == env_dir
+
+
+def test_backend_in_tree():
+    with temp_chdir() as d:
+        os.mkdir(os.path.join(d, 'backend'))
+        with open(os.path.join(d, 'backend', 'ok_backend.py'), 'w') as f:
+            f.write(IN_TREE_BACKEND)
+        write_project(d, "requires = []\nbuild-backend = 'ok_backend'\nbackend-path = ['backend']\n")
+
+        with start_build_backend(d, get_build_system(d)) as backend:
+            name = backend.build('sdist', 'dist')
+
+            with open(os.path.join(d, 'dist', name), 'r') as f:
+                assert f.read() == os.path.realpath(d)
+
+            # The helper outlives failures.
+            with pytest.raises(BuildBackendError):
+                backend.build('wheel', 'dist')
+            pid = backend.process.pid
+            backend.build('sdist', 'dist')
+
+            assert backend.process.pid == pid
+            assert backend.get_requires('wheel') == []
+            assert backend.process.poll() is None
+
+        assert backend.process.poll() == 0
+
+
+def test_backend_missing():
+    with temp_chdir() as d:
+        with BuildBackend(d, get_build_env([]), 'missing_backend') as backend:
+            with pytest.raises(BuildBackendError):
+                backend.build('sdist', 'dist')
+
+
+@requires_internet
+def test_build_both_with_one_helper():
+    with temp_chdir() as d:
+        runner = CliRunner()
+        runner.invoke(hatch, ['init', 'ok', '--basic', '-ne'])
+
+        with start_build_backend(d, get_build_system(d)) as backend:
+            sdist = backend.build('sdist', 'dist')
+            wheel = backend.build('wheel', 'dist')
+
+        assert sorted(os.listdir(os.path.join(d, 'dist'))) == sorted([sdist, wheel])
+        assert wheel.endswith('-py3-none-any.whl')
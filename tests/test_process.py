@@ -0,0 +1,114 @@
+import subprocess
+import sys
+
+import pytest
+
+from hatch.process import (
+    ProcessRecord, check_output, clear_records, get_phase, get_records, popen,
+    run, summarize_records, supports_rusage, timed
+)
+from hatch.utils import ON_WINDOWS
+from .utils import wait_until
+
+
+def test_get_phase():
+    assert get_phase(['pip3', 'install', 'six']) == 'pip'
+    assert get_phase(['/venv/bin/pip3.7', 'install', 'six']) == 'pip'
+    assert get_phase(['python3', '-m', 'pip', 'install']) == 'pip'
+    assert get_phase(['python', '-m', 'coverage', 'run', '--parallel-mode', '-m', 'pytest']) == 'pytest'
+    assert get_phase(['python3.6m', 'setup.py', 'sdist']) == 'setup.py'
+    assert get_phase(['git', 'init']) == 'git'
+    assert get_phase('git config --get user.name') == 'git'
+    assert get_phase([]) == 'unknown'
+
+
+def test_run_records():
+    clear_records()
+    result = run(
+        [sys.executable, '-c', 'import sys; x = bytearray(32 * 1024 * 1024); sys.exit(3)'],
+        'allocate'
+    )
+    records = get_records()
+
+    assert result.returncode == 3
+    assert len(records) == 1
+
+    record = records[0]
+    assert record.phase == 'allocate'
+    assert record.argv[0] == sys.executable
+    assert record.returncode == 3
+    assert record.wall_time > 0
+    if not ON_WINDOWS:
+        assert record.user_time is not None
+        assert record.system_time is not None
+        assert record.max_rss >= 32 * 1024 * 1024
+
+
+def test_popen_records_on_wait():
+    clear_records()
+    process = popen([sys.executable, '-c', 'print("ok")'], stdout=subprocess.PIPE)
+    assert process.stdout.read().strip() == b'ok'
+    assert get_records() == []
+
+    process.wait()
+    process.wait()
+    records = get_records()
+
+    assert len(records) == 1
+    assert records[0].phase == 'python'
+
+
+def test_popen_records_on_poll():
+    clear_records()
+    process = popen([sys.executable, '-c', 'pass'])
+
+    assert wait_until(lambda: process.poll() is not None)
+    assert process.poll() == 0
+    records = get_records()
+
+    assert len(records) == 1
+    assert records[0].returncode == 0
+
+
+def test_supports_rusage_changed_internals(monkeypatch):
+    monkeypatch.delattr(subprocess.Popen, '_try_wait', raising=False)
+    assert supports_rusage() is False
+
+    monkeypatch.setattr(subprocess.Popen, '_try_wait', lambda self, pid, flags: None, raising=False)
+    assert supports_rusage() is False
+
+
+def test_check_output():
+    assert check_output([sys.executable, '-c', 'print("ok")']).strip() == b'ok'
+
+    with pytest.raises(subprocess.CalledProcessError) as e:
+        check_output([sys.executable, '-c', 'import sys; sys.exit(2)'])
+
+    assert e.value.returncode == 2
+
+
+def test_timed():
+    clear_records()
+    with timed('work'):
+        pass
+    records = get_records()
+
+    assert len(records) == 1
+    assert records[0].phase == 'work'
+    assert records[0].argv is None
+    assert records[0].user_time is None
+
+
+def test_summarize_records():
+    records = [
+        ProcessRecord('venv', None, 1.0, None, None, None, None),
+        ProcessRecord('pip', ['pip'], 2.0, 1.0, 0.5, 100, 0),
+        ProcessRecord('pip', ['pip'], 3.0, 1.5, 0.5, 300, 0),
+        ProcessRecord('pytest', ['python'], 4.0, None, None, None, 1),
+    ]
+
+    assert summarize_records(records) == [
+        ('venv', 1, 1.0, None, None, None),
+        ('pip', 2, 5.0, 2.5, 1.0, 300),
+        ('pytest', 1, 4.0, None, None, None),
+    ]
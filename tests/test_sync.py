@@ -0,0 +1,139 @@
+import os
+
+import pytest
+
+from hatch.exceptions import RequirementsError
+from hatch.structures import File
+from hatch.sync import (
+    get_missing_requirements, get_requirements_files,
+    get_unrequired_distributions, parse_requirements
+)
+from hatch.utils import temp_chdir
+
+MARKERS = {
+    'implementation_name': 'cpython',
+    'implementation_version': '3.6.0',
+    'os_name': 'posix',
+    'platform_machine': 'x86_64',
+    'platform_python_implementation': 'CPython',
+    'platform_release': '',
+    'platform_system': 'Linux',
+    'platform_version': '',
+    'python_full_version': '3.6.0',
+    'python_version': '3.6',
+    'sys_platform': 'linux',
+}
+
+
+def dist(name, version='1.0', requires=(), editable=False, location='/env/site-packages'):
+    return {
+        'name': name, 'version': version, 'editable': editable,
+        'location': location, 'requires': list(requires),
+    }
+
+
+def test_parse_requirements():
+    with temp_chdir() as d:
+        File('requirements.txt', (
+            '# comment\n'
+            '--index-url https://example.com/simple\n'
+            '-r base.txt\n'
+            '--constraint=constraints.txt\n'
+            '-e ./ok\n'
+            '-e git+https://github.com/ofek/ko.git#egg=ko\n'
+            'toml >= 0.9 \\\n'
+            '    ; python_version >= "3"  # trailing comment\n'
+            'six==1.11.0 --hash=sha256:abc\n'
+            './local\n'
+        )).write(d)
+        File('base.txt', 'appdirs\n-r requirements.txt\n').write(d)
+        File('constraints.txt', 'six<2\n--pre\n').write(d)
+
+        parsed = parse_requirements(os.path.join(d, 'requirements.txt'))
+
+        assert [str(r) for r in parsed['requirements']] == [
+            'appdirs', 'toml>=0.9; python_version >= "3"', 'six==1.11.0'
+        ]
+        assert [str(r) for r in parsed['constraints']] == ['six<2']
+        assert parsed['constraint_files'] == [os.path.join(d, 'constraints.txt')]
+        assert parsed['editables'] == [
+            os.path.join(d, 'ok'), 'git+https://github.com/ofek/ko.git#egg=ko'
+        ]
+        assert parsed['unnamed'] == [os.path.join(d, 'local')]
+        assert parsed['options'] == ['--index-url', 'https://example.com/simple']
+
+
+def test_parse_requirements_errors():
+    with temp_chdir() as d:
+        with pytest.raises(RequirementsError):
+            parse_requirements(os.path.join(d, 'requirements.txt'))
+
+        File('requirements.txt', '--unknown-option\n').write(d)
+        with pytest.raises(RequirementsError):
+            parse_requirements(os.path.join(d, 'requirements.txt'))
+
+
+def test_get_requirements_files():
+    with temp_chdir() as d:
+        File('requirements.txt', '-r base.txt\n-c constraints.txt\n').write(d)
+        File('base.txt', '-r requirements.txt\n--unknown-option\n').write(d)
+
+        assert get_requirements_files(os.path.join(d, 'requirements.txt')) == sorted(
+            os.path.join(d, name) for name in ('base.txt', 'requirements.txt')
+        )
+
+
+def test_get_missing_requirements():
+    with temp_chdir() as d:
+        File('requirements.txt', (
+            'six>=1.10\n'
+            'toml>=0.9\n'
+            'appdirs\n'
+            'enum34; python_version < "3"\n'
+            '-e {}\n'
+            '-e git+https://github.com/ofek/ko.git#egg=ko\n'
+        ).format(os.path.join(d, 'ok'))).write(d)
+        parsed = parse_requirements(os.path.join(d, 'requirements.txt'))
+        distributions = [
+            dist('six', '1.11.0'),
+            dist('toml', '0.8'),
+            dist('ok', editable=True, location=os.path.join(d, 'ok')),
+        ]
+
+        assert get_missing_requirements(parsed, distributions, MARKERS) == [
+            'toml>=0.9', 'appdirs', '-e', 'git+https://github.com/ofek/ko.git#egg=ko'
+        ]
+
+
+def test_get_missing_requirements_constraints():
+    with temp_chdir() as d:
+        File('requirements.txt', 'six\n-c constraints.txt\n').write(d)
+        File('constraints.txt', 'six>=1.11\n').write(d)
+        parsed = parse_requirements(os.path.join(d, 'requirements.txt'))
+
+        assert get_missing_requirements(parsed, [dist('six', '1.10.0')], MARKERS) == ['six']
+        assert get_missing_requirements(parsed, [dist('six', '1.11.0')], MARKERS) == []
+
+
+def test_get_unrequired_distributions():
+    with temp_chdir() as d:
+        File('requirements.txt', 'requests[socks]\n').write(d)
+        parsed = parse_requirements(os.path.join(d, 'requirements.txt'))
+        distributions = [
+            dist('requests', requires=['idna', 'PySocks; extra == "socks"', 'chardet; extra == "x"']),
+            dist('idna'),
+            dist('PySocks'),
+            dist('chardet'),
+            dist('pip'),
+            dist('ok', requires=['toml'], editable=True, location=d),
+            dist('toml'),
+            dist('six'),
+            dist('outside', location='/usr/lib/site-packages'),
+        ]
+
+        assert get_unrequired_distributions(parsed, distributions, MARKERS, '/env') == [
+            'chardet', 'six'
+        ]
+        assert get_unrequired_distributions(
+            parsed, distributions, MARKERS, '/env', protected=['Six']
+        ) == ['chardet']
@@ -0,0 +1,135 @@
+import os
+import sys
+
+from hatch.testing import (
+    DEFAULT_TEST_DURATION, RELAY_CHUNK_SIZE, OutputRelay, combine_exit_codes, get_slowest_tests,
+    get_test_priorities, normalize_path, read_coverage_contexts,
+    select_affected_tests, shard_tests, split_junit_args, update_test_history
+)
+from hatch.utils import create_file, temp_chdir
+
+
+def history_of(durations):
+    return {'tests': {nodeid: {'duration': duration} for nodeid, duration in durations.items()}}
+
+
+def test_shard_tests_balanced():
+    node_ids = ['t::a', 't::b', 't::c', 't::d', 't::e']
+    history = history_of({'t::a': 4, 't::b': 1, 't::c': 3, 't::d': 2, 't::e': 2})
+
+    assert shard_tests(node_ids, history, 2) == [['t::a', 't::e'], ['t::b', 't::c', 't::d']]
+
+
+def test_shard_tests_no_history():
+    node_ids = ['t::{}'.format(i) for i in range(5)]
+
+    shards = shard_tests(node_ids, history_of({}), 2)
+
+    assert [len(shard) for shard in shards] == [3, 2]
+    assert sorted(sum(shards, [])) == node_ids
+
+
+def test_shard_tests_more_jobs_than_tests():
+    assert shard_tests(['t::a', 't::b'], history_of({}), 8) == [['t::a'], ['t::b']]
+
+
+def test_split_junit_args():
+    assert split_junit_args(['-x', '--junitxml=a.xml', '-k', 'ok']) == (['-x', '-k', 'ok'], 'a.xml')
+    assert split_junit_args(['--junit-xml', 'b.xml', '-x']) == (['-x'], 'b.xml')
+    assert split_junit_args(['-x']) == (['-x'], None)
+
+
+def test_combine_exit_codes():
+    assert combine_exit_codes([0, 0]) == 0
+    assert combine_exit_codes([0, 5]) == 0
+    assert combine_exit_codes([5, 5]) == 5
+    assert combine_exit_codes([0, 1, 2]) == 1
+
+
+def test_update_test_history_keeps_previous():
+    history = {'tests': {}}
+
+    update_test_history(history, {'t::a': {'duration': 1.0, 'outcome': 'failed'}})
+    update_test_history(history, {'t::a': {'duration': 1.5, 'outcome': 'passed'}})
+
+    assert history['tests']['t::a'] == {
+        'duration': 1.5,
+        'outcome': 'passed',
+        'previous_duration': 1.0,
+        'previous_outcome': 'failed',
+    }
+
+
+def test_get_slowest_tests():
+    history = {'tests': {}}
+    update_test_history(history, {'t::a': {'duration': 1.0, 'outcome': 'passed'}})
+    results = {
+        't::a': {'duration': 2.0, 'outcome': 'passed'},
+        't::b': {'duration': 3.0, 'outcome': 'passed'},
+        't::c': {'duration': 0.5, 'outcome': 'passed'},
+    }
+    update_test_history(history, results)
+
+    assert get_slowest_tests(history, results, 2) == [('t::b', 3.0, None), ('t::a', 2.0, 1.0)]
+
+
+def test_get_test_priorities():
+    history = {'tests': {
+        't::a': {'duration': 1.0, 'outcome': 'passed'},
+        't::b': {'duration': 2.0, 'outcome': 'error'},
+    }}
+
+    assert get_test_priorities(history, 'failed-first') == ({'t::a': 1, 't::b': 0}, 1)
+    assert get_test_priorities(history, 'longest-first') == (
+        {'t::a': -1.0, 't::b': -2.0}, -DEFAULT_TEST_DURATION
+    )
+
+
+def test_select_affected_tests():
+    with temp_chdir() as d:
+        paths = {}
+        for name in ('add.py', 'sub.py', 'setup.cfg', os.path.join('tests', 'test_math.py')):
+            paths[name] = os.path.join(d, name)
+            create_file(paths[name])
+
+        coverage_map = {
+            'tests/test_math.py::test_add': {normalize_path(paths['add.py'])},
+            'tests/test_math.py::test_sub': {normalize_path(paths['sub.py'])},
+        }
+
+        assert select_affected_tests(coverage_map, {paths['sub.py']}, d) == [
+            'tests/test_math.py::test_sub'
+        ]
+        assert select_affected_tests(
+            coverage_map, {paths[os.path.join('tests', 'test_math.py')]}, d
+        ) == ['tests/test_math.py']
+        assert select_affected_tests(coverage_map, {paths['setup.cfg']}, d) is None
+
+
+def test_read_coverage_contexts_missing():
+    with temp_chdir() as d:
+        assert read_coverage_contexts(os.path.join(d, '.coverage')) == {}
+
+
+def test_output_relay(capsys):
+    with temp_chdir() as d:
+        tee_file = os.path.join(d, 'output.log')
+        script = (
+            'import sys\n'
+            'print("out")\n'
+            'sys.stdout.flush()\n'
+            'print("err", file=sys.stderr)\n'
+            'print("x" * {})\n'.format(RELAY_CHUNK_SIZE * 2)
+        )
+
+        with OutputRelay(tee_file) as relay:
+            return_code = relay.run([sys.executable, '-c', script])
+
+        captured = capsys.readouterr()
+        with open(tee_file, 'r') as f:
+            tee = f.read()
+
+        assert return_code == 0
+        assert captured.out == 'out\n' + 'x' * RELAY_CHUNK_SIZE * 2 + '\n'
+        assert captured.err == 'err\n'
+        assert sorted(tee.splitlines()) == ['err', 'out', 'x' * RELAY_CHUNK_SIZE * 2]
@@ -0,0 +1,102 @@
+import json
+import os
+import sys
+
+from click.testing import CliRunner
+
+from hatch.cli import hatch
+from hatch.process import run
+from hatch.trace import clear_events, get_events, span, write_trace
+from hatch.utils import env_vars, temp_chdir
+
+
+def test_disabled():
+    clear_events()
+    with env_vars({'HATCH_TRACE': ''}):
+        with span('work', 'test'):
+            pass
+
+    assert get_events() == []
+
+
+def test_span():
+    clear_events()
+    with env_vars({'HATCH_TRACE': 'trace.json'}):
+        with span('outer', 'test', {'key': 'value'}):
+            with span('inner', 'test'):
+                pass
+    events = get_events()
+    clear_events()
+
+    inner, outer = events
+    assert outer['name'] == 'outer'
+    assert outer['ph'] == 'X'
+    assert outer['args'] == {'key': 'value'}
+    assert inner['name'] == 'inner'
+    assert outer['ts'] <= inner['ts']
+    assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+
+
+def test_decorator():
+    @span('decorated', 'test')
+    def f():
+        return 1
+
+    clear_events()
+    with env_vars({'HATCH_TRACE': 'trace.json'}):
+        assert f() == 1
+        assert f() == 1
+    events = get_events()
+    clear_events()
+
+    assert [event['name'] for event in events] == ['decorated', 'decorated']
+
+
+def test_process_span():
+    clear_events()
+    with env_vars({'HATCH_TRACE': 'trace.json'}):
+        run([sys.executable, '-c', 'import sys; sys.exit(4)'])
+    events = get_events()
+    clear_events()
+
+    assert len(events) == 1
+    assert events[0]['cat'] == 'process'
+    assert events[0]['name'] == 'python'
+    assert events[0]['args']['argv'][0] == sys.executable
+    assert events[0]['args']['returncode'] == 4
+
+
+def test_write_trace():
+    with temp_chdir() as d:
+        clear_events()
+        with env_vars({'HATCH_TRACE': 'trace.json'}):
+            with span('work', 'test'):
+                pass
+
+        trace_file = os.path.join(d, 'trace.json')
+        write_trace(trace_file)
+        clear_events()
+
+        with open(trace_file) as f:
+            trace = json.loads(f.read())
+
+    phases = [event['ph'] for event in trace['traceEvents']]
+    assert phases == ['M', 'M', 'X']
+    assert trace['traceEvents'][0]['args'] == {'name': 'hatch'}
+    assert trace['traceEvents'][1]['args'] == {'name': 'main'}
+
+
+def test_cli():
+    with temp_chdir() as d:
+        trace_file = os.path.join(d, 'trace.json')
+        with env_vars({'HATCH_TRACE': trace_file}):
+            result = CliRunner().invoke(hatch, ['clean', '-v'])
+
+        with open(trace_file) as f:
+            trace = json.loads(f.read())
+
+    assert result.exit_code == 0
+    spans = {event['name']: event for event in trace['traceEvents'] if event['ph'] == 'X'}
+    assert spans['hatch']['args']['argv'] == ['clean', '-v']
+    assert 'clean_package' in spans
+    assert get_events() == []
@@ -0,0 +1,87 @@
+import os
+
+from hatch import trash
+from hatch.trash import (
+    LOCAL_TRASH_NAME, empty_trash, get_trash_dir, load_local_trashes,
+    remove_paths, save_local_trashes, spawn_trash_worker
+)
+from hatch.utils import create_file, ensure_dir_exists, temp_chdir
+from .utils import wait_until
+
+
+def test_remove_paths_wait():
+    with temp_chdir() as d:
+        directory = os.path.join(d, 'build')
+        file = os.path.join(d, 'ok.pyc')
+        create_file(os.path.join(directory, 'lib', 'ok', 'ok.py'))
+        create_file(os.path.join(directory, 'ok.txt'))
+        create_file(file)
+
+        removed = remove_paths([directory, file, os.path.join(d, 'missing')], wait=True)
+
+        assert removed == [directory, file, os.path.join(d, 'missing')]
+        assert os.listdir(d) == []
+
+
+def test_remove_paths_background():
+    with temp_chdir() as d:
+        directory = os.path.join(d, 'venv')
+        create_file(os.path.join(directory, 'bin', 'python'))
+
+        remove_paths([directory])
+
+        assert not os.path.exists(directory)
+
+
+def test_empty_trash_leftovers():
+    leftover = os.path.join(trash.TRASH_DIR, 'leftover')
+    ensure_dir_exists(os.path.join(leftover, 'lib'))
+    create_file(os.path.join(leftover, 'lib', 'ok.py'))
+
+    empty_trash()
+
+    assert not os.path.exists(leftover)
+
+
+def test_empty_local_trash():
+    with temp_chdir() as d:
+        trash_dir = os.path.join(d, LOCAL_TRASH_NAME)
+        create_file(os.path.join(trash_dir, 'build', 'lib', 'ok.py'))
+
+        empty_trash([trash_dir])
+
+        assert os.listdir(d) == []
+
+
+def test_trash_worker():
+    with temp_chdir() as d:
+        trash_dir = os.path.join(d, LOCAL_TRASH_NAME)
+        create_file(os.path.join(trash_dir, 'build', 'lib', 'ok.py'))
+
+        spawn_trash_worker([trash_dir])
+
+        assert wait_until(lambda: not os.path.exists(trash_dir))
+
+
+def test_get_trash_dir():
+    with temp_chdir() as d:
+        trash_dir = get_trash_dir(os.path.join(d, 'build'))
+
+        if os.stat(d).st_dev == os.stat(trash.TRASH_DIR).st_dev:
+            assert trash_dir == trash.TRASH_DIR
+        else:  # no cov
+            assert trash_dir == os.path.join(d, LOCAL_TRASH_NAME)
+
+
+def test_remove_paths_empties_local_trashes_left_behind():
+    with temp_chdir() as d:
+        trash_dir = os.path.join(d, LOCAL_TRASH_NAME)
+        create_file(os.path.join(trash_dir, 'build', 'lib', 'ok.py'))
+        save_local_trashes(load_local_trashes() + [trash_dir])
+        directory = os.path.join(d, 'venv')
+        create_file(os.path.join(directory, 'bin', 'python'))
+
+        remove_paths([directory], wait=True)
+
+        assert os.listdir(d) == []
+        assert trash_dir not in load_local_trashes()
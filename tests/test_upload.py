@@ -0,0 +1,217 @@
+import hashlib
+import os
+import zipfile
+
+import pytest
+
+from hatch.upload import (
+    UploadResult, create_session, get_distributions, get_indexed_files,
+    get_keyring_password, get_recorded_uploads, get_simple_index_url,
+    get_upload_metadata, hash_distribution, record_uploads, upload_file,
+    upload_files
+)
+from hatch.utils import create_file, temp_chdir
+from .utils import LocalRepository
+
+METADATA = """\
+Metadata-Version: 2.1
+Name: ok
+Version: {}
+Summary: Ok
+Classifier: Programming Language :: Python :: 2
+Classifier: Programming Language :: Python :: 3
+
+Ok ok ok.
+"""
+
+
+def create_wheel(d, version='0.0.1', size=0):
+    path = os.path.join(d, 'ok-{}-py2.py3-none-any.whl'.format(version))
+    with zipfile.ZipFile(path, 'w') as f:
+        f.writestr('ok-{}.dist-info/METADATA'.format(version), METADATA.format(version))
+        f.writestr('ok/data.bin', os.urandom(size))
+    return path
+
+
+def test_get_distributions():
+    with temp_chdir() as d:
+        wheel = create_wheel(d)
+        create_file(os.path.join(d, 'ok-0.0.1.tar.gz'))
+        create_file(os.path.join(d, 'ok-0.0.1.tar.gz.asc'))
+
+        assert get_distributions(d) == [wheel, os.path.join(d, 'ok-0.0.1.tar.gz')]
+
+
+def test_hash_distribution():
+    with temp_chdir() as d:
+        wheel = create_wheel(d, size=3 * 1024 * 1024)
+        with open(wheel, 'rb') as f:
+            contents = f.read()
+
+        assert hash_distribution(wheel) == {
+            'md5_digest': hashlib.md5(contents).hexdigest(),
+            'sha256_digest': hashlib.sha256(contents).hexdigest(),
+            'blake2_256_digest': hashlib.blake2b(contents, digest_size=32).hexdigest(),
+        }
+
+
+def test_get_upload_metadata():
+    with temp_chdir() as d:
+        fields = get_upload_metadata(create_wheel(d))
+
+        assert (':action', 'file_upload') in fields
+        assert ('filetype', 'bdist_wheel') in fields
+        assert ('pyversion', 'py2.py3') in fields
+        assert ('metadata_version', '2.1') in fields
+        assert ('name', 'ok') in fields
+        assert ('summary', 'Ok') in fields
+        assert [value for name, value in fields if name == 'classifiers'] == [
+            'Programming Language :: Python :: 2', 'Programming Language :: Python :: 3'
+        ]
+        assert ('description', 'Ok ok ok.\n') in fields
+
+
+def test_upload_files():
+    with temp_chdir() as d, LocalRepository() as repository:
+        wheels = [create_wheel(d, '0.0.{}'.format(i), 1024 * 64) for i in range(8)]
+        reported = []
+
+        results = upload_files(wheels, repository.url, 'user', 'pass', jobs=2, callback=reported.append)
+
+        assert [result.path for result in results] == wheels
+        assert sorted(result.path for result in reported) == wheels
+        assert all(result.status == 'uploaded' for result in results)
+        assert sorted(repository.uploads) == sorted(os.path.basename(wheel) for wheel in wheels)
+        # Connections are kept alive between files.
+        assert repository.connections <= 2
+
+        for wheel in wheels:
+            fields = repository.uploads[os.path.basename(wheel)]
+            with open(wheel, 'rb') as f:
+                contents = f.read()
+            assert fields['content'] == [contents]
+            assert fields['sha256_digest'] == [hashlib.sha256(contents).hexdigest().encode()]
+            assert fields['version'] == [os.path.basename(wheel).split('-')[1].encode()]
+
+
+def test_upload_retry():
+    with temp_chdir() as d, LocalRepository() as repository:
+        wheel = create_wheel(d)
+        repository.fail_next = 2
+
+        with create_session('user', 'pass') as session:
+            result = upload_file(session, repository.url, wheel, backoff=0)
+
+        assert result.status == 'uploaded'
+        assert result.attempts == 3
+        assert result.throughput > 0
+
+
+def test_upload_retry_exhausted():
+    with temp_chdir() as d, LocalRepository() as repository:
+        wheel = create_wheel(d)
+        repository.fail_next = 5
+
+        with create_session('user', 'pass') as session:
+            result = upload_file(session, repository.url, wheel, attempts=3, backoff=0)
+
+        assert result.status == 'failed'
+        assert result.message == '503 Service Unavailable'
+        assert repository.requests == 3
+
+
+def test_upload_unauthorized():
+    with temp_chdir() as d, LocalRepository() as repository:
+        wheel = create_wheel(d)
+
+        with create_session('user', 'wrong') as session:
+            result = upload_file(session, repository.url, wheel, backoff=0)
+
+        assert result.status == 'failed'
+        assert result.attempts == 1
+        assert not repository.uploads
+
+
+def test_upload_existing():
+    with temp_chdir() as d, LocalRepository() as repository:
+        wheel = create_wheel(d)
+
+        with create_session('user', 'pass') as session:
+            upload_file(session, repository.url, wheel)
+            skipped = upload_file(session, repository.url, wheel)
+            failed = upload_file(session, repository.url, wheel, skip_existing=False)
+
+        assert skipped.status == 'skipped'
+        assert failed.status == 'failed'
+        assert failed.message == '400 File already exists.'
+
+
+def test_upload_known():
+    with temp_chdir() as d, LocalRepository() as repository:
+        wheel = create_wheel(d)
+        sha256 = hash_distribution(wheel)['sha256_digest']
+        name = os.path.basename(wheel)
+
+        with create_session('user', 'pass') as session:
+            changed = upload_file(session, repository.url, wheel, existing={name: 'abc'})
+            known = upload_file(session, repository.url, wheel, existing={name: sha256})
+            indexed = upload_file(session, repository.url, wheel, existing={name: None}, skip_existing=False)
+
+        assert changed.status == 'uploaded'
+        assert known.status == 'skipped'
+        assert known.message == 'already uploaded'
+        assert indexed.status == 'failed'
+        assert indexed.message == 'already exists'
+        assert indexed.sha256 is None
+        assert repository.requests == 1
+
+
+def test_record_uploads():
+    with LocalRepository() as repository:
+        record_uploads(repository.url, [
+            UploadResult('ok-1.whl', 'uploaded', sha256='a'),
+            UploadResult('ok-2.whl', 'skipped', sha256='b'),
+            UploadResult('ok-3.whl', 'failed', sha256='c'),
+        ])
+        record_uploads(repository.url.rstrip('/'), [UploadResult('ok-4.whl', 'uploaded', sha256='d')])
+
+        assert get_recorded_uploads(repository.url) == {'ok-1.whl': 'a', 'ok-2.whl': 'b', 'ok-4.whl': 'd'}
+
+
+def test_get_keyring_password(monkeypatch):
+    keyring = pytest.importorskip('keyring')
+    passwords = {('https://upload.pypi.org/legacy/', '__token__'): 'pypi-token'}
+    monkeypatch.setattr(keyring, 'get_password', lambda url, username: passwords.get((url, username)))
+
+    assert get_keyring_password('https://upload.pypi.org/legacy/', '__token__') == 'pypi-token'
+    assert get_keyring_password('https://test.pypi.org/legacy/', '__token__') is None
+
+    def locked(url, username):
+        raise RuntimeError('locked')
+
+    monkeypatch.setattr(keyring, 'get_password', locked)
+    assert get_keyring_password('https://upload.pypi.org/legacy/', '__token__') is None
+
+
+def test_get_simple_index_url():
+    assert get_simple_index_url('https://upload.pypi.org/legacy/') == 'https://pypi.org/simple/'
+    assert get_simple_index_url('https://test.pypi.org/legacy/') == 'https://test.pypi.org/simple/'
+    assert get_simple_index_url('http://localhost:8080') == 'http://localhost:8080/simple/'
+
+
+def test_get_indexed_files():
+    with temp_chdir() as d, LocalRepository() as repository:
+        wheel = create_wheel(d)
+
+        assert get_indexed_files(repository.index_url, ['ok']) == {}
+
+        with create_session('user', 'pass') as session:
+            upload_file(session, repository.url, wheel)
+
+        repository.uploads['ok-0.0.2-py2.py3-none-any.whl'] = {}
+
+        assert get_indexed_files(repository.index_url, ['ok']) == {
+            os.path.basename(wheel): hash_distribution(wheel)['sha256_digest'],
+            'ok-0.0.2-py2.py3-none-any.whl': None,
+        }
+        assert get_indexed_files('http://127.0.0.1:1/simple/', ['ok']) is None
@@ -5,7 +5,8 @@ import pytest
 from hatch.create import create_package
 from hatch.settings import copy_default_settings
 from hatch.utils import (
-    chdir, create_file, download_file, find_project_root, get_current_year,
+    chdir, create_file, download_file, find_project_root, format_size,
+    get_current_year,
     get_random_venv_name, get_requirements_file, is_setup_managed,
     normalize_package_name, parse_setup, remove_path, temp_chdir, temp_move_path
 )
@@ -17,6 +18,10 @@ def test_get_random_venv_name():
     assert 3 <= len(get_random_venv_name()) <= 5
 
 
+def test_get_random_venv_name_not_option():
+    assert not any(get_random_venv_name().startswith('-') for _ in range(1000))
+
+
 class TestGetRequirementsFile:
     def test_default_exists(self):
         with temp_chdir() as d:
@@ -57,6 +62,14 @@ def test_get_current_year():
     assert int(year) >= 2017
 
 
+def test_format_size():
+    assert format_size(0) == '0 B'
+    assert format_size(1023) == '1023 B'
+    assert format_size(1536) == '1.50 KiB'
+    assert format_size(3 * 1024 ** 3) == '3.00 GiB'
+    assert format_size(2048 * 1024 ** 3) == '2048.00 GiB'
+
+
 def test_normalize_package_name():
     assert normalize_package_name('aN___inVaLiD..pAckaGe---naME') == 'an_invalid_package_name'
 
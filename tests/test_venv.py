@@ -1,4 +1,5 @@
 import os
+import subprocess
 
 import pytest
 
@@ -8,7 +9,8 @@ from hatch.env import get_python_path
 from hatch.structures import File
 from hatch.utils import ON_WINDOWS, temp_chdir
 from hatch.venv import (
-    create_venv, fix_executable, get_new_venv_name, is_venv, venv
+    create_venv, fix_executable, get_new_venv_name, get_venv_template, is_venv,
+    locate_exe_dir, venv
 )
 from .utils import read_file
 
@@ -53,6 +55,35 @@ def test_pypath():
         assert os.path.exists(d)
 
 
+@pytest.mark.skipif(ON_WINDOWS, reason='Templates are not used on Windows')
+def test_template():
+    with temp_chdir() as d:
+        d = os.path.join(d, 'test_env')
+        assert create_venv(d) == 0
+
+        template_dir, origin = get_venv_template(get_python_path())
+        exe_dir = locate_exe_dir(d)
+
+        assert is_venv(template_dir)
+        assert subprocess.check_output(
+            [os.path.join(exe_dir, 'python'), '-c', 'import sys;print(sys.prefix)']
+        ).decode().strip() == d
+        assert read_file(os.path.join(exe_dir, 'pip')).startswith('#!' + exe_dir)
+        for path in (os.path.join(exe_dir, 'activate'), os.path.join(d, 'pyvenv.cfg')):
+            if os.path.exists(path):
+                assert origin not in read_file(path)
+
+        # Nothing is shared with the template, so envs can be modified.
+        for root, _, files in os.walk(os.path.join(d, 'lib')):
+            for file in files:
+                path = os.path.join(root, file)
+                if not os.path.islink(path):
+                    assert os.access(path, os.W_OK)
+                    assert not os.path.samefile(
+                        path, os.path.join(template_dir, os.path.relpath(path, d))
+                    )
+
+
 def test_venv():
     with temp_chdir() as d:
         d = os.path.join(d, 'test_env')
@@ -240,3 +271,33 @@ class TestFixExecutable:
                 "    sys.argv[0] = re.sub(r'(-script\\.pyw?|\\.exe)?$', '', sys.argv[0])\n"
                 '    sys.exit(main())\n'.format(new_path + os.path.sep)
             )
+
+    def test_already_fixed(self):
+        with temp_chdir() as d:
+            file = os.path.join(d, 'pip')
+            File(
+                'pip',
+                '#!{}\n'
+                'import pip\n'.format(os.path.join(d, 'python'))
+            ).write(d)
+            inode = os.stat(file).st_ino
+
+            assert not fix_executable(file, d)
+            assert os.stat(file).st_ino == inode
+
+    def test_streams_contents(self):
+        with temp_chdir() as d:
+            file = os.path.join(d, 'pip')
+            contents = b'\r\n' + bytes(range(256)) * 1000
+            with open(file, 'wb') as f:
+                f.write(b'#!/home/Klaatu/.local/share/hatch/venvs/Gort/bin/python')
+                f.write(contents)
+            os.chmod(file, 0o750)
+
+            assert fix_executable(file, d)
+
+            with open(file, 'rb') as f:
+                updated = f.read()
+
+            assert updated == '#!{}'.format(os.path.join(d, 'python')).encode() + contents
+            assert os.stat(file).st_mode & 0o777 == 0o750
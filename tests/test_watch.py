@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+from hatch.utils import ON_LINUX, create_file, temp_chdir
+from hatch.watch import InotifyWatcher, PollingWatcher, get_watcher, walk_project
+
+
+def change_later(f, *args):
+    def change():
+        time.sleep(0.5)
+        f(*args)
+
+    thread = threading.Thread(target=change)
+    thread.start()
+    return thread
+
+
+def write(path, contents):
+    with open(path, 'w') as f:
+        f.write(contents)
+
+
+def test_walk_project():
+    with temp_chdir() as d:
+        for path in (
+            ('ok', '__init__.py'), ('ok', 'README.rst'), ('setup.cfg', ), ('venv', 'lib.py'),
+            ('.git', 'hook.py'), ('build', 'lib.py'), ('ok', '__pycache__', 'ok.py')
+        ):
+            create_file(os.path.join(d, *path))
+
+        files = {
+            os.path.relpath(os.path.join(root, name), d)
+            for root, names in walk_project(d) for name in names
+        }
+
+        assert files == {os.path.join('ok', '__init__.py'), 'setup.cfg'}
+
+
+def test_polling_watcher():
+    with temp_chdir() as d:
+        create_file(os.path.join(d, 'ok', 'core.py'))
+        watcher = PollingWatcher(d, interval=0.1)
+
+        thread = change_later(write, os.path.join(d, 'ok', 'core.py'), 'x = 1\n')
+        changed = watcher.wait()
+        thread.join()
+
+        assert changed == {os.path.join(d, 'ok', 'core.py')}
+
+
+def test_inotify_watcher():
+    if not ON_LINUX:  # no cov
+        return
+
+    with temp_chdir() as d:
+        create_file(os.path.join(d, 'ok', 'core.py'))
+        watcher = InotifyWatcher(d)
+
+        try:
+            thread = change_later(write, os.path.join(d, 'ok', 'core.py'), 'x = 1\n')
+            changed = watcher.wait()
+            thread.join()
+
+            assert changed == {os.path.join(d, 'ok', 'core.py')}
+
+            # Files in new directories are found too.
+            thread = change_later(create_file, os.path.join(d, 'ok', 'sub', 'new.py'))
+            changed = watcher.wait()
+            thread.join()
+
+            assert changed == {os.path.join(d, 'ok', 'sub', 'new.py')}
+        finally:
+            watcher.close()
+
+
+def test_get_watcher_polling():
+    with temp_chdir() as d:
+        assert isinstance(get_watcher(d, polling=True), PollingWatcher)
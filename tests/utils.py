@@ -1,8 +1,14 @@
+import base64
 import os
 import re
 import socket
+import threading
 import time
 import traceback
+import uuid
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 
 import pytest
 
@@ -66,3 +72,112 @@ requires_conda = pytest.mark.skipif(
 requires_internet = pytest.mark.skipif(
     not connected_to_internet(), reason='Not connected to internet'
 )
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class LocalRepository:
+    """A stand-in for a package index's upload API, serving on localhost
+    in a background thread.
+    """
+    def __init__(self, username='user', password='pass'):
+        self.credentials = 'Basic {}'.format(
+            base64.b64encode('{}:{}'.format(username, password).encode('utf-8')).decode('ascii')
+        )
+        self.uploads = {}
+        self.requests = 0
+        self.index_requests = 0
+        self.connections = 0
+        self.fail_next = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.create_handler())
+        # Unique, so nothing recorded for a previous server applies.
+        self.url = 'http://127.0.0.1:{}/{}/legacy/'.format(self.server.server_port, uuid.uuid4().hex)
+        self.index_url = self.url[:-len('legacy/')] + 'simple/'
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle_upload(self, headers, body):
+        with self.lock:
+            self.requests += 1
+            if self.fail_next:
+                self.fail_next -= 1
+                return 503, 'Service Unavailable'
+
+        if headers.get('Authorization') != self.credentials:
+            return 403, 'Invalid or non-existent authentication information.'
+
+        message = BytesParser().parsebytes(
+            'Content-Type: {}\r\n\r\n'.format(headers['Content-Type']).encode('utf-8') + body
+        )
+        fields = {}
+        for part in message.get_payload():
+            fields.setdefault(part.get_param('name', header='content-disposition'), []).append(
+                part.get_payload(decode=True)
+            )
+
+        filename = message.get_payload()[-1].get_filename()
+        with self.lock:
+            if filename in self.uploads:
+                return 400, 'File already exists.'
+            self.uploads[filename] = fields
+
+        return 200, 'OK'
+
+    def handle_index(self):
+        with self.lock:
+            self.index_requests += 1
+            files = sorted(
+                (name, fields.get('sha256_digest', [b''])[0].decode('ascii'))
+                for name, fields in self.uploads.items()
+            )
+
+        if not files:
+            return 404, ''
+
+        return 200, '<html><body>{}</body></html>'.format(''.join(
+            '<a href="../../files/{0}{1}">{0}</a><br/>'.format(
+                name, '#sha256={}'.format(sha256) if sha256 else ''
+            )
+            for name, sha256 in files
+        ))
+
+    def create_handler(self):
+        repository = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with repository.lock:
+                    repository.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                status, reason = repository.handle_upload(self.headers, body)
+                self.send_response(status, reason)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_GET(self):
+                status, page = repository.handle_index()
+                body = page.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler